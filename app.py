@@ -1,22 +1,258 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash
-from datamanager.json_data_manager import JSONDataManager
-from flask_wtf import FlaskForm
-from wtforms import StringField, IntegerField, FloatField
-from wtforms.validators import DataRequired
-
-class UpdateMovieForm(FlaskForm):
-    # Define your form fields here
-    title = StringField('Title', validators=[DataRequired()])
-    director = StringField('Director', validators=[DataRequired()])
-    year = IntegerField('Year', validators=[DataRequired()])
-    rating = FloatField('Rating', validators=[DataRequired()])
+import time
+
+# Taken before the other imports, so that the startup report includes them
+IMPORTS_STARTED = time.perf_counter()
+
+import json
+import os
+import threading
+from collections.abc import Mapping
+from itertools import islice
+
+from flask import (Flask, Response, request, jsonify, render_template, redirect, url_for, flash, make_response,
+                   stream_with_context, g)
+from flask.json.provider import DefaultJSONProvider
+from datamanager.data_manager_interface import DEFAULT_MOVIES_PER_PAGE
+from datamanager.enrichment import ENRICHMENT_DONE
+from datamanager import metrics
+from datamanager.omdb import omdb_cache
+from fragment_cache import FragmentCache, DEFAULT_MAX_ENTRIES
+from profiling import SlowRequestProfiler, DEFAULT_INTERVAL_MS, DEFAULT_MAX_PROFILES
+from startup import LazyDataManager, StartupTimer
+from web_helpers import (is_admin_request, parse_page_args, wants_json, wants_ndjson, parse_movie_filters,
+                         parse_movie_entry, encode_cursor, decode_cursor, cache_validators, is_fresh,
+                         add_validators, stream_json_object, stream_ndjson)
+from markupsafe import Markup
+
+startup_timer = StartupTimer(IMPORTS_STARTED)
+startup_timer.record('imports', time.perf_counter() - IMPORTS_STARTED)
+
+
+class MovieJSONProvider(DefaultJSONProvider):
+    """Lets jsonify() serialize the MovieRecords and snapshot mappings kept by JSONDataManager."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Mapping):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
 
 app = Flask(__name__)
+app.json = MovieJSONProvider(app)
 app.secret_key = 'your_secret_key_here'
 
 # Choose the data manager implementation (use either DataManager or CSVDataManager)
 
-data_manager = JSONDataManager()
+def create_data_manager():
+    """
+    Builds the data manager selected by the MOVIES_BACKEND environment variable.
+
+    MOVIES_BACKEND=sqlite uses SQLiteDataManager (MOVIES_DB_PATH overrides the
+    database file; fill it once with `python -m datamanager.sqlite_data_manager`).
+    MOVIES_BACKEND=sharded uses ShardedJSONDataManager, one JSON file per user
+    (MOVIES_SHARDS_DIR overrides the directory, MOVIES_SHARD_CACHE caps the movies kept in memory).
+    Otherwise JSONDataManager is used, configured by:
+    MOVIES_JOURNAL=1 to append mutations to a journal instead of rewriting movies.json,
+    MOVIES_COMMIT_WINDOW_MS=N to group writes that arrive within N ms into one flush,
+    MOVIES_PROCESS_SAFE=1 when several worker processes (e.g. gunicorn -w N) share movies.json, and
+    MOVIES_SNAPSHOT_FORMAT=json|msgpack writes movies.json as compact JSON or msgpack instead of
+    indented JSON (export it back with `python -m datamanager.serializers movies.json out.json`).
+    Every backend accepts MOVIES_DEFERRED_ENRICHMENT=1 to save new movies at once and
+    fetch their OMDb details in the background.
+
+    Only the selected backend's module is imported.
+    """
+    deferred_enrichment = os.environ.get('MOVIES_DEFERRED_ENRICHMENT') == '1'
+    if os.environ.get('MOVIES_BACKEND') == 'sqlite':
+        from datamanager.sqlite_data_manager import SQLiteDataManager
+        return SQLiteDataManager(os.environ.get('MOVIES_DB_PATH'), deferred_enrichment=deferred_enrichment)
+    if os.environ.get('MOVIES_BACKEND') == 'sharded':
+        from datamanager.sharded_json_data_manager import ShardedJSONDataManager, DEFAULT_MAX_CACHED_MOVIES
+        return ShardedJSONDataManager(os.environ.get('MOVIES_SHARDS_DIR'),
+                                      max_cached_movies=int(os.environ.get('MOVIES_SHARD_CACHE',
+                                                                           DEFAULT_MAX_CACHED_MOVIES)),
+                                      deferred_enrichment=deferred_enrichment)
+
+    from datamanager.json_data_manager import JSONDataManager
+    return JSONDataManager(journal=os.environ.get('MOVIES_JOURNAL') == '1',
+                           commit_window_ms=int(os.environ.get('MOVIES_COMMIT_WINDOW_MS', '0')),
+                           process_safe=os.environ.get('MOVIES_PROCESS_SAFE') == '1',
+                           snapshot_format=os.environ.get('MOVIES_SNAPSHOT_FORMAT', 'pretty'),
+                           deferred_enrichment=deferred_enrichment)
+
+
+def build_data_manager():
+    with startup_timer.phase('data_manager'):
+        return metrics.instrument(create_data_manager())
+
+
+# Set once the data manager is built, whether by the warm-up or by a request
+warm_up_done = threading.Event()
+
+# Built on first use or by the warm-up thread (see create_app()), so that a
+# new worker can answer health checks before movies.json is parsed
+data_manager = LazyDataManager(build_data_manager, on_load=lambda manager: warm_up_done.set())
+
+# Rendered user cards and pages, keyed on data versions; MOVIES_FRAGMENT_CACHE_SIZE=0 disables it
+fragment_cache = FragmentCache(int(os.environ.get('MOVIES_FRAGMENT_CACHE_SIZE', DEFAULT_MAX_ENTRIES)))
+
+request_duration = metrics.registry.histogram(
+    "movies_http_request_duration_seconds", "Duration of HTTP requests, until the view returned.",
+    ("endpoint", "method", "status"))
+
+
+def collect_cache_counts(attribute):
+    """Reads the hit or miss count of every cache, for the /metrics callbacks."""
+    return {("omdb",): getattr(omdb_cache, attribute), ("fragment",): getattr(fragment_cache, attribute)}
+
+
+def collect_file_sizes():
+    """Returns the size in bytes of each data file the current backend uses."""
+    if not getattr(data_manager, 'loaded', True):
+        # Not worth loading the data for; the files are reported once it is
+        return {("omdb_cache",): os.path.getsize(omdb_cache.path)} if os.path.exists(omdb_cache.path) else {}
+    paths = {
+        "snapshot": getattr(data_manager, 'file_path', None),
+        "journal": getattr(data_manager, 'journal_path', None),
+        "database": getattr(data_manager, 'db_path', None),
+        "omdb_cache": omdb_cache.path,
+    }
+    if getattr(data_manager, 'shards_dir', None):
+        paths["manifest"] = os.path.join(data_manager.shards_dir, 'manifest.json')
+    return {(name,): os.path.getsize(path) for name, path in paths.items() if path and os.path.exists(path)}
+
+
+metrics.registry.callback("movies_cache_hits_total", "Cache lookups that found an entry.", ("cache",),
+                          lambda: collect_cache_counts('hits'), type="counter")
+metrics.registry.callback("movies_cache_misses_total", "Cache lookups that found nothing.", ("cache",),
+                          lambda: collect_cache_counts('misses'), type="counter")
+metrics.registry.callback("movies_file_size_bytes", "Size of the data files on disk.", ("file",),
+                          collect_file_sizes)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # The endpoint name, not the URL, keeps the number of label values bounded
+        request_duration.observe(time.perf_counter() - start,
+                                 (request.endpoint or 'unknown', request.method, str(response.status_code)))
+    return response
+
+
+# MOVIES_PROFILE_SLOW_MS=N records a sampled stack profile of every request slower than N ms
+slow_request_profiler = None
+if os.environ.get('MOVIES_PROFILE_SLOW_MS'):
+    slow_request_profiler = SlowRequestProfiler(
+        app.wsgi_app, threshold_ms=float(os.environ['MOVIES_PROFILE_SLOW_MS']),
+        interval_ms=float(os.environ.get('MOVIES_PROFILE_INTERVAL_MS', DEFAULT_INTERVAL_MS)),
+        max_profiles=int(os.environ.get('MOVIES_PROFILE_KEEP', DEFAULT_MAX_PROFILES)))
+    app.wsgi_app = slow_request_profiler
+
+
+@app.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Lists the kept slow request profiles, newest first."""
+    if slow_request_profiler is None or not is_admin_request(request):
+        return jsonify({"error": "Not found"}), 404
+    return jsonify({"profiles": slow_request_profiler.profiles()})
+
+
+@app.route('/admin/profiles/<int:profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """Downloads one profile as collapsed stacks, for flamegraph.pl or speedscope."""
+    if slow_request_profiler is None or not is_admin_request(request):
+        return jsonify({"error": "Not found"}), 404
+    collapsed = slow_request_profiler.collapsed(profile_id)
+    if collapsed is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return Response(collapsed, mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.txt'})
+
+
+def precompile_templates():
+    """Compiles every template into the Jinja environment's cache, so no request has to."""
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            print(f"Error compiling template {name}: {e}")
+
+
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def warm_up():
+    """Compiles the templates and builds the data manager, then prints the startup breakdown."""
+    try:
+        with startup_timer.phase('templates'):
+            precompile_templates()
+        data_manager.load()
+    except Exception as e:
+        # The first request that needs the data tries again
+        print(f"Error warming up: {e}")
+        return
+    print(f"Startup: {startup_timer.summary()}")
+
+
+def start_warm_up():
+    """Runs warm_up() in a background thread, once per process."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+            _warm_up_thread.start()
+
+
+def create_app():
+    """
+    Returns the app ready to serve, for WSGI servers: gunicorn 'app:create_app()'.
+
+    Importing this module only registers the routes; heavy work is left to
+    a background warm-up started here, so the worker serves /healthz at once
+    and /readyz once the warm-up is done. MOVIES_WARM_UP=0 skips the warm-up:
+    the data is then loaded by the first request that needs it.
+    """
+    if os.environ.get('MOVIES_WARM_UP', '1') == '1':
+        start_warm_up()
+    else:
+        warm_up_done.set()
+    return app
+
+
+@app.route('/healthz')
+def health_check():
+    """Liveness check: answers without touching the data, with the startup breakdown."""
+    return jsonify({"status": "ok", "data_loaded": getattr(data_manager, 'loaded', True),
+                    "startup": startup_timer.report()})
+
+
+@app.route('/readyz')
+def readiness_check():
+    """
+    Answers 503 until the data manager is built, for load balancers to hold
+    traffic back. When the app was imported without create_app(), the first
+    check starts the warm-up, so the worker still becomes ready on its own.
+    """
+    if not warm_up_done.is_set():
+        start_warm_up()
+        return jsonify({"status": "warming_up"}), 503
+    return jsonify({"status": "ready"})
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text format metrics of this process, for holders of MOVIES_ADMIN_TOKEN."""
+    if not is_admin_request(request):
+        return jsonify({"error": "Not found"}), 404
+    return Response(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # data_manager = CSVDataManager('data/movies.csv')
@@ -31,14 +267,22 @@ data_manager = JSONDataManager()
 @app.route('/')
 def index():
     try:
-        # Get the movie data from the data manager
-        movies_data = data_manager.load_movies_data()
+        # Read the requested page from the query string
+        page, per_page = parse_page_args(request.args, DEFAULT_MOVIES_PER_PAGE)
+
+        version = data_manager.get_data_version()
 
-        # Calculate total pages (assuming you have a function for this)
-        total_pages = data_manager.calculate_total_pages(movies_data)
+        def render():
+            # Get only the movies on this page from the data manager
+            movies_data = data_manager.get_movies_page(page, per_page)
+            total_pages = data_manager.calculate_total_pages(per_page)
+            user_cards = render_user_cards(movies_data, version)
 
-        # Render the template with the movie data and total pages
-        return render_template('index.html', movies=movies_data, total_pages=total_pages)
+            # Render the template with the movie data and total pages
+            return render_template('index.html', movies=movies_data, user_cards=user_cards,
+                                   total_pages=total_pages, current_page=page, per_page=per_page)
+
+        return conditional_response(version, render)
 
     except Exception as e:
         # Handle any exceptions that might occur
@@ -47,13 +291,86 @@ def index():
         # You might want to render an error template or log the error
         return render_template('error.html', error_message=error_message)
 
+@app.route('/search', methods=['GET'])
+def search():
+    """
+    Full-text search over movie names, directors, actors and plots.
+
+    Takes ?q=&page=&per_page=. Returns JSON when the client asks for it
+    (Accept: application/json or ?format=json), otherwise an HTML page.
+    """
+    query = request.args.get('q', '').strip()
+    page, per_page = parse_page_args(request.args, 10)
+
+    try:
+        found = data_manager.search_movies(query, page, per_page)
+    except Exception as e:
+        error_message = f"An error occurred: {e}"
+        if wants_json(request):
+            return jsonify({"error": error_message}), 500
+        return render_template('error.html', error_message=error_message)
+
+    if wants_json(request):
+        return jsonify({"query": query, "page": page, "per_page": per_page, **found})
+
+    total_pages = (found["total"] + per_page - 1) // per_page
+    return render_template('search_results.html', query=query, results=found["results"], total=found["total"],
+                           total_pages=total_pages, current_page=page, per_page=per_page)
+
+
+def render_user_cards(movies_data, version):
+    """
+    Renders the index page's card of each user, reusing cached cards of
+    users whose movies did not change.
+
+    Args:
+        movies_data: one page of movies, as returned by get_movies_page().
+        version: the global data version read before movies_data was.
+    Returns:
+        A dict mapping each user id to the HTML of their card.
+    """
+    user_versions = {user_id: data_manager.get_data_version(user_id)[0] for user_id in movies_data}
+    # A mutation since version was read may be missing from movies_data
+    # yet counted in user_versions, so nothing rendered now may be cached
+    cacheable = data_manager.get_data_version()[0] == version[0]
+
+    user_cards = {}
+    for user_id, user in movies_data.items():
+        render = lambda: render_template('user_card.html', user=user)
+        if cacheable:
+            # The same user shows different movies on different pages
+            key = ('user_card', user_id, user_versions[user_id], tuple(user['movies']))
+            html = fragment_cache.get_or_render(key, render)
+        else:
+            html = render()
+        user_cards[user_id] = Markup(html)
+    return user_cards
+
+
+def conditional_response(version, build_response, variant=None):
+    """
+    Answers a GET with 304 Not Modified when the client's copy is current.
+
+    Args:
+        version: the (version, modified_at) pair from data_manager.get_data_version(),
+            read before the data the response is built from.
+        build_response: called to build the full response, only when one is needed.
+        variant: tells apart representations of the same URL, e.g. "ndjson".
+    Returns:
+        The response, with a strong ETag and Last-Modified header.
+    """
+    etag, last_modified = cache_validators(version, variant)
+    response = Response(status=304) if is_fresh(request, etag, last_modified) else make_response(build_response())
+    return add_validators(response, etag, last_modified)
+
+
 @app.route('/users', methods=['GET'])
 def list_users():
     try:
-        users_list = data_manager.get_all_users()
+        version = data_manager.get_data_version()
 
         # Render the template with the list of users
-        return render_template('list_of_users.html', users=users_list)
+        return conditional_response(version, lambda: render_users_list(version))
 
     except ValueError as ve:
         # Handle specific validation errors
@@ -67,11 +384,57 @@ def list_users():
 
 
 
+def render_users_list(version):
+    """Renders list_of_users.html, cached until the global data version changes."""
+    return fragment_cache.get_or_render(
+        ('list_of_users', version[0]),
+        lambda: render_template('list_of_users.html', users=data_manager.get_all_users()))
+
+
 @app.route('/movies_by_user/<int:user_id>', methods=['GET'])
 def list_of_movies_by_user(user_id):
-    movies_by_user = data_manager.get_user_movies(user_id)
-    print(f"{movies_by_user}")
-    return jsonify(movies_by_user)
+    """
+    Streams a user's movies without building the whole body in memory.
+
+    By default the body is a JSON object {movie_id: movie}. With
+    ?format=ndjson (or Accept: application/x-ndjson) it is one JSON
+    movie per line. With ?limit=N only N movies are sent; if there are
+    more, the X-Next-Cursor header (and a Link rel="next" header) holds
+    the cursor to pass as ?cursor= for the next batch.
+    """
+    try:
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = data_manager.get_data_version(user_id)
+    movies = data_manager.iter_user_movies(user_id, after)
+    next_cursor = None
+    if limit is not None:
+        # One extra movie tells us whether there is a next batch
+        movies = list(islice(movies, limit + 1))
+        if len(movies) > limit:
+            movies = movies[:limit]
+            next_cursor = encode_cursor(movies[-1][0])
+
+    ndjson = wants_ndjson(request)
+    if ndjson:
+        build = lambda: Response(stream_with_context(stream_ndjson(movies)), mimetype='application/x-ndjson')
+    else:
+        build = lambda: Response(stream_with_context(stream_json_object(movies)), mimetype='application/json')
+    response = conditional_response(version, build, variant='ndjson' if ndjson else None)
+    response.vary.add('Accept')
+
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_url = url_for('list_of_movies_by_user', user_id=user_id, cursor=next_cursor, limit=limit,
+                           format=request.args.get('format'))
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
 
 
 @app.route('/add_user', methods=['GET', 'POST'])
@@ -207,14 +570,16 @@ def add_movie_route(user_id):
             rating = float(rating)
 
             # validate and add the movie to the user's list
-            data_manager.add_movie(user_id, movie_name, director, year, rating)
+            movie_id = data_manager.add_movie(user_id, movie_name, director, year, rating)
 
             # Flash a success message
             flash("Movie added successfully!", "success")
 
             # Check  if the request is Json, and return JSON response
             if request.is_json:
-                return jsonify({"Message": "Movie added Successfully!"})
+                movie = data_manager.get_user_movies(user_id).get(movie_id, {})
+                return jsonify({"Message": "Movie added Successfully!", "movie_id": movie_id,
+                                "enrichment_status": movie.get("enrichment_status", ENRICHMENT_DONE)})
 
             # Redirect to the movies list for the user
             return redirect(url_for('list_of_movies_by_user', user_id=user_id))
@@ -244,14 +609,54 @@ def add_movie_route(user_id):
         return render_template('error.html', error_message=error_message)
 
 
+@app.route('/users/<user_id>/add_movies', methods=['POST'])
+def add_movies_route(user_id):
+    """
+    Adds many movies to a user's list at once.
+
+    The body is either a JSON array of movies, or NDJSON (one movie object
+    per line, sent as application/x-ndjson) which is read line by line.
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            entries = (json.loads(line) for line in request.stream if line.strip())
+        else:
+            entries = request.get_json(silent=True)
+            if not isinstance(entries, list):
+                raise ValueError("Expected a JSON array of movies")
+
+        movies = [parse_movie_entry(entry) for entry in entries]
+        result = data_manager.add_movies(user_id, movies)
+        return jsonify(result), 201
+
+    except ValueError as e:
+        # Handle specific validation errors
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        # Handle any exceptions that might occur
+        return jsonify({"error": f"An error occurred: {e}"}), 500
+
+
+@app.route('/users/<user_id>/movies/<movie_id>/enrichment', methods=['GET'])
+def movie_enrichment_status(user_id, movie_id):
+    """Reports whether the OMDb details of a movie have been filled in yet."""
+    movie = data_manager.get_user_movies(user_id).get(str(movie_id))
+    if not movie:
+        return jsonify({"error": "Movie not found"}), 404
+
+    # Movies added without deferred enrichment were complete from the start
+    return jsonify({"movie_id": movie_id,
+                    "enrichment_status": movie.get("enrichment_status", ENRICHMENT_DONE)})
+
+
 @app.route('/list_of_users')
 def list_of_users():
     try:
-        # Retrieve the list of users from the data manager
-        users = data_manager.get_all_users()
+        version = data_manager.get_data_version()
 
-        # Render the template with the list of users
-        return render_template('list_of_users.html', users=users)
+        # Retrieve the list of users from the data manager and render the template
+        return conditional_response(version, lambda: render_users_list(version))
 
     except Exception as e:
         # Handle any exceptions that might occur
@@ -263,7 +668,7 @@ def list_of_users():
 def update_movie(user_id, movie_id):
 
 
-    user = data_manager.load_movies_data().get(str(user_id))
+    user = data_manager.get_user(user_id)
 
     if not user:
         return render_template('error.html', error_message="User not found")
@@ -316,12 +721,52 @@ def update_movie(user_id, movie_id):
 
 @app.route('/users/<user_id>/movies')
 def user_movies(user_id):
-    user = data_manager.load_movies_data().get(str(user_id))
+    version = data_manager.get_data_version(user_id)
+    user = data_manager.get_user(user_id)
 
     if not user:
         return render_template('error.html', error_message='User not found')
 
-    return render_template('user_movies.html', user=user)
+    # Same query parameters as /movies, applied to this user's list
+    try:
+        filters = parse_movie_filters(request.args)
+    except ValueError as e:
+        return render_template('error.html', error_message=f'Error parsing data: {e}')
+
+    def render():
+        movies_user = user
+        if filters:
+            found = data_manager.filter_movies(user_id=user_id, per_page=max(len(user.get('movies', {})), 1),
+                                               **filters)
+            movies = {movie['movie_id']: movie for movie in found['results']}
+            movies_user = {**user, 'movies': movies}
+        return render_template('user_movies.html', user=movies_user)
+
+    # The query string picks the filters, so each combination is cached separately
+    key = ('user_movies', str(user_id), version[0], request.query_string)
+    try:
+        return conditional_response(version, lambda: fragment_cache.get_or_render(key, render))
+    except ValueError as e:
+        return render_template('error.html', error_message=f'Error parsing data: {e}')
+
+
+@app.route('/movies', methods=['GET'])
+def filter_movies():
+    """
+    Filters and sorts movies across all users, e.g.
+    /movies?year_from=1990&year_to=2010&min_rating=8&director=Christopher%20Nolan&sort=rating
+    """
+    try:
+        filters = parse_movie_filters(request.args)
+        page, per_page = parse_page_args(request.args, 10)
+        found = data_manager.filter_movies(page=page, per_page=per_page, **filters)
+        return jsonify({"page": page, "per_page": per_page, **found})
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {e}"}), 500
 
 
 @app.route('/users/<user_id>/delete_movie/<movie_id>', methods=['GET', 'POST'])
@@ -338,4 +783,4 @@ def delete_movie_route(user_id, movie_id):
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,444 @@
+"""
+Async (ASGI) entry point, serving the routes of app.py with Quart.
+
+    uvicorn asgi:app            (or: hypercorn asgi:app)
+
+Data manager calls run in a thread pool (MOVIES_ASYNC_IO_THREADS threads)
+and OMDb is called through an async HTTP client, so requests waiting on
+disk or on OMDb do not hold a thread each. The data manager, fragment cache
+and metrics are the ones app.py builds from the same environment
+variables; the sync app keeps working as before. The slow request profiler
+(MOVIES_PROFILE_SLOW_MS) is WSGI middleware and is only available there.
+Needs the quart and httpx packages.
+"""
+import json
+import os
+import time
+
+from quart import Quart, Response, request, jsonify, render_template, redirect, url_for, flash, make_response, g
+from markupsafe import Markup
+
+import app as sync_app
+from app import MovieJSONProvider, fragment_cache, request_duration
+from datamanager import metrics
+from datamanager.async_data_manager import AsyncDataManager, DEFAULT_IO_THREADS
+from datamanager.enrichment import ENRICHMENT_DONE
+from datamanager.data_manager_interface import DEFAULT_MOVIES_PER_PAGE
+from datamanager.omdb import close_async_omdb_client
+from web_helpers import (is_admin_request, parse_page_args, wants_json, wants_ndjson, parse_movie_filters,
+                         parse_movie_entry, encode_cursor, decode_cursor, cache_validators, is_fresh,
+                         add_validators, async_stream_json_object, async_stream_ndjson)
+
+app = Quart(__name__)
+app.json = MovieJSONProvider(app)
+app.secret_key = sync_app.app.secret_key
+
+# With deferred enrichment add_movie does not wait on OMDb, so there is nothing to look up first
+data_manager = AsyncDataManager(sync_app.data_manager,
+                                max_workers=int(os.environ.get('MOVIES_ASYNC_IO_THREADS', DEFAULT_IO_THREADS)),
+                                prefetch_omdb=os.environ.get('MOVIES_DEFERRED_ENRICHMENT') != '1')
+
+
+@app.before_serving
+async def start_warm_up():
+    sync_app.start_warm_up()
+
+
+@app.after_serving
+async def close_resources():
+    data_manager.shutdown()
+    await close_async_omdb_client()
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def record_request_duration(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        request_duration.observe(time.perf_counter() - start,
+                                 (request.endpoint or 'unknown', request.method, str(response.status_code)))
+    return response
+
+
+@app.route('/healthz')
+async def health_check():
+    """Liveness check: answers without touching the data, with the startup breakdown."""
+    return jsonify({"status": "ok", "data_loaded": sync_app.data_manager.loaded,
+                    "startup": sync_app.startup_timer.report()})
+
+
+@app.route('/readyz')
+async def readiness_check():
+    """Answers 503 until the data manager is built."""
+    if not sync_app.warm_up_done.is_set():
+        return jsonify({"status": "warming_up"}), 503
+    return jsonify({"status": "ready"})
+
+
+@app.route('/metrics')
+async def metrics_endpoint():
+    """Prometheus text format metrics of this process, for holders of MOVIES_ADMIN_TOKEN."""
+    if not is_admin_request(request):
+        return jsonify({"error": "Not found"}), 404
+    return Response(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/')
+async def index():
+    try:
+        # Read the requested page from the query string
+        page, per_page = parse_page_args(request.args, DEFAULT_MOVIES_PER_PAGE)
+
+        version = await data_manager.get_data_version()
+
+        async def render():
+            movies_data = await data_manager.get_movies_page(page, per_page)
+            total_pages = await data_manager.calculate_total_pages(per_page)
+            user_cards = await render_user_cards(movies_data, version)
+            return await render_template('index.html', movies=movies_data, user_cards=user_cards,
+                                         total_pages=total_pages, current_page=page, per_page=per_page)
+
+        return await conditional_response(version, render)
+
+    except Exception as e:
+        error_message = f"An error occurred: {e}"
+        return await render_template('error.html', error_message=error_message)
+
+
+@app.route('/search', methods=['GET'])
+async def search():
+    """Full-text search, as in app.py: JSON or an HTML page."""
+    query = request.args.get('q', '').strip()
+    page, per_page = parse_page_args(request.args, 10)
+
+    try:
+        found = await data_manager.search_movies(query, page, per_page)
+    except Exception as e:
+        error_message = f"An error occurred: {e}"
+        if wants_json(request):
+            return jsonify({"error": error_message}), 500
+        return await render_template('error.html', error_message=error_message)
+
+    if wants_json(request):
+        return jsonify({"query": query, "page": page, "per_page": per_page, **found})
+
+    total_pages = (found["total"] + per_page - 1) // per_page
+    return await render_template('search_results.html', query=query, results=found["results"],
+                                 total=found["total"], total_pages=total_pages, current_page=page,
+                                 per_page=per_page)
+
+
+async def render_user_cards(movies_data, version):
+    """Async version of app.render_user_cards()."""
+    user_versions = {user_id: (await data_manager.get_data_version(user_id))[0] for user_id in movies_data}
+    # A mutation since version was read may be missing from movies_data
+    # yet counted in user_versions, so nothing rendered now may be cached
+    cacheable = (await data_manager.get_data_version())[0] == version[0]
+
+    user_cards = {}
+    for user_id, user in movies_data.items():
+        render = lambda user=user: render_template('user_card.html', user=user)
+        if cacheable:
+            key = ('user_card', user_id, user_versions[user_id], tuple(user['movies']))
+            html = await fragment_cache.get_or_render_async(key, render)
+        else:
+            html = await render()
+        user_cards[user_id] = Markup(html)
+    return user_cards
+
+
+async def conditional_response(version, build_response, variant=None):
+    """Async version of app.conditional_response(); build_response is a coroutine function."""
+    etag, last_modified = cache_validators(version, variant)
+    if is_fresh(request, etag, last_modified):
+        response = Response('', status=304)
+    else:
+        response = await make_response(await build_response())
+    return add_validators(response, etag, last_modified)
+
+
+@app.route('/users', methods=['GET'])
+async def list_users():
+    try:
+        version = await data_manager.get_data_version()
+        return await conditional_response(version, lambda: render_users_list(version))
+
+    except Exception as e:
+        error_message = f"An error occurred: {e}"
+        return await render_template('error.html', error_message=error_message)
+
+
+@app.route('/list_of_users')
+async def list_of_users():
+    return await list_users()
+
+
+async def render_users_list(version):
+    """Renders list_of_users.html, cached until the global data version changes."""
+    async def render():
+        return await render_template('list_of_users.html', users=await data_manager.get_all_users())
+
+    return await fragment_cache.get_or_render_async(('list_of_users', version[0]), render)
+
+
+@app.route('/movies_by_user/<int:user_id>', methods=['GET'])
+async def list_of_movies_by_user(user_id):
+    """Streams a user's movies, with the same formats and cursors as app.py."""
+    try:
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = await data_manager.get_data_version(user_id)
+    next_cursor = None
+    if limit is None:
+        movies = data_manager.iter_user_movies(user_id, after)
+    else:
+        # One extra movie tells us whether there is a next batch
+        movies = []
+        async for movie in data_manager.iter_user_movies(user_id, after, batch_size=limit + 1):
+            movies.append(movie)
+            if len(movies) > limit:
+                break
+        if len(movies) > limit:
+            movies = movies[:limit]
+            next_cursor = encode_cursor(movies[-1][0])
+
+    ndjson = wants_ndjson(request)
+    if ndjson:
+        build = lambda: Response(async_stream_ndjson(movies), mimetype='application/x-ndjson')
+    else:
+        build = lambda: Response(async_stream_json_object(movies), mimetype='application/json')
+    response = await conditional_response(version, as_coroutine(build), variant='ndjson' if ndjson else None)
+    response.vary.add('Accept')
+
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_url = url_for('list_of_movies_by_user', user_id=user_id, cursor=next_cursor, limit=limit,
+                           format=request.args.get('format'))
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+
+def as_coroutine(function):
+    """Wraps a plain function for conditional_response(), which awaits what it builds."""
+    async def wrapper():
+        return function()
+    return wrapper
+
+
+async def read_form_or_json():
+    """Returns (form, json): the submitted form, or the JSON body when there is no form."""
+    form = await request.form
+    if form:
+        return form, None
+    return None, await request.get_json(silent=True)
+
+
+@app.route('/add_user', methods=['GET', 'POST'])
+async def add_new_user():
+    try:
+        if request.method == 'POST':
+            form, data = await read_form_or_json()
+            user_name = form.get('name') if form else (data or {}).get('name')
+
+            if not user_name:
+                raise ValueError("User name is required")
+
+            await data_manager.add_user(user_name)
+            await flash("showSuccessPopup()", "javascript")
+            return redirect(url_for('list_users'))
+
+        return await render_template('add_user.html')
+
+    except ValueError as e:
+        error_message = str(e)
+        if request.is_json:
+            return jsonify({"error": error_message}), 400
+        await flash(error_message, "danger")
+        return await render_template('error.html', error_message=error_message)
+
+    except Exception as e:
+        error_message = f"An error occurred: {e}"
+        if request.is_json:
+            return jsonify({"error": error_message}), 500
+        await flash(error_message, "danger")
+        return await render_template('error.html', error_message=error_message)
+
+
+@app.route('/users/<user_id>/add_movie', methods=['GET', 'POST'])
+async def add_movie_route(user_id):
+    try:
+        if request.method == 'POST':
+            if request.is_json:
+                data = await request.get_json()
+            else:
+                data = await request.form
+            movie_name = data.get('name')
+            director = data.get('director')
+            year = data.get('year')
+            rating = data.get('rating')
+
+            if year is None or rating is None:
+                raise ValueError("Year and Rating are required fields")
+
+            year = int(year)
+            rating = float(rating)
+
+            movie_id = await data_manager.add_movie(user_id, movie_name, director, year, rating)
+            await flash("Movie added successfully!", "success")
+
+            if request.is_json:
+                movie = (await data_manager.get_user_movies(user_id)).get(movie_id, {})
+                return jsonify({"Message": "Movie added Successfully!", "movie_id": movie_id,
+                                "enrichment_status": movie.get("enrichment_status", ENRICHMENT_DONE)})
+
+            return redirect(url_for('list_of_movies_by_user', user_id=user_id))
+
+        return await render_template('add_movie.html', user_id=user_id)
+
+    except ValueError as e:
+        error_message = str(e)
+        if request.is_json:
+            return jsonify({"error": error_message}), 400
+        return await render_template('error.html', error_message=error_message)
+
+    except Exception as e:
+        error_message = f"An error occurred: {e}"
+        if request.is_json:
+            return jsonify({"error": error_message}), 500
+        return await render_template('error.html', error_message=error_message)
+
+
+@app.route('/users/<user_id>/add_movies', methods=['POST'])
+async def add_movies_route(user_id):
+    """Adds many movies to a user's list at once, from a JSON array or NDJSON."""
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            body = await request.get_data()
+            entries = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            entries = await request.get_json(silent=True)
+            if not isinstance(entries, list):
+                raise ValueError("Expected a JSON array of movies")
+
+        movies = [parse_movie_entry(entry) for entry in entries]
+        result = await data_manager.add_movies(user_id, movies)
+        return jsonify(result), 201
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {e}"}), 500
+
+
+@app.route('/users/<user_id>/movies/<movie_id>/enrichment', methods=['GET'])
+async def movie_enrichment_status(user_id, movie_id):
+    """Reports whether the OMDb details of a movie have been filled in yet."""
+    movie = (await data_manager.get_user_movies(user_id)).get(str(movie_id))
+    if not movie:
+        return jsonify({"error": "Movie not found"}), 404
+    return jsonify({"movie_id": movie_id,
+                    "enrichment_status": movie.get("enrichment_status", ENRICHMENT_DONE)})
+
+
+@app.route('/users/<user_id>/update_movie/<movie_id>', methods=['GET', 'POST'])
+async def update_movie(user_id, movie_id):
+    user = await data_manager.get_user(user_id)
+    if not user:
+        return await render_template('error.html', error_message="User not found")
+
+    movie_details = user.get('movies', {}).get(str(movie_id))
+    if not movie_details:
+        return await render_template('error.html', error_message="Movie not found")
+
+    if request.method == 'GET':
+        return await render_template('update_movie_form.html', user_id=user_id, movie_id=movie_id,
+                                     movie_details=movie_details)
+
+    try:
+        form, new_movie_data = await read_form_or_json()
+        if form:
+            new_movie_data = {}
+            for field, convert in (("name", str), ("director", str), ("year", int), ("rating", float),
+                                   ("poster", str), ("actors", str), ("plot", str)):
+                if field in form:
+                    new_movie_data[field] = convert(form.get(field))
+
+        success = await data_manager.update_movie(user_id, movie_id, new_movie_data)
+        if success:
+            return redirect(url_for('user_movies', user_id=user_id))
+        return await render_template('error.html', error_message='Failed to update movie details')
+
+    except ValueError as e:
+        return await render_template('error.html', error_message=f'Error parsing data: {e}')
+
+
+@app.route('/users/<user_id>/movies')
+async def user_movies(user_id):
+    version = await data_manager.get_data_version(user_id)
+    user = await data_manager.get_user(user_id)
+
+    if not user:
+        return await render_template('error.html', error_message='User not found')
+
+    try:
+        filters = parse_movie_filters(request.args)
+    except ValueError as e:
+        return await render_template('error.html', error_message=f'Error parsing data: {e}')
+
+    async def render():
+        movies_user = user
+        if filters:
+            found = await data_manager.filter_movies(user_id=user_id, per_page=max(len(user.get('movies', {})), 1),
+                                                     **filters)
+            movies = {movie['movie_id']: movie for movie in found['results']}
+            movies_user = {**user, 'movies': movies}
+        return await render_template('user_movies.html', user=movies_user)
+
+    # The query string picks the filters, so each combination is cached separately
+    key = ('user_movies', str(user_id), version[0], request.query_string)
+    try:
+        return await conditional_response(version, lambda: fragment_cache.get_or_render_async(key, render))
+    except ValueError as e:
+        return await render_template('error.html', error_message=f'Error parsing data: {e}')
+
+
+@app.route('/movies', methods=['GET'])
+async def filter_movies():
+    """Filters and sorts movies across all users; see app.filter_movies()."""
+    try:
+        filters = parse_movie_filters(request.args)
+        page, per_page = parse_page_args(request.args, 10)
+        found = await data_manager.filter_movies(page=page, per_page=per_page, **filters)
+        return jsonify({"page": page, "per_page": per_page, **found})
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {e}"}), 500
+
+
+@app.route('/users/<user_id>/delete_movie/<movie_id>', methods=['GET', 'POST'])
+async def delete_movie_route(user_id, movie_id):
+    if request.method == 'POST':
+        success = await data_manager.delete_movie(user_id, movie_id)
+        if success:
+            return redirect(url_for('user_movies', user_id=user_id))
+        return await render_template('error.html', error_message='Failed to delete movie')
+
+    return await render_template('delete_confirmation.html', user_id=user_id, movie_id=movie_id)
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
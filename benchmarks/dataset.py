@@ -0,0 +1,62 @@
+import argparse
+import json
+import random
+
+# Pools the synthetic values are drawn from; small enough that directors
+# and casts repeat across movies, as they do in real data
+DIRECTORS = [f"Director {i}" for i in range(500)]
+ACTORS = [f"Actor {i}" for i in range(2000)]
+PLOT_WORDS = ("a", "young", "man", "woman", "city", "war", "love", "secret", "journey", "family",
+              "crime", "space", "island", "night", "revenge", "friend", "king", "ghost", "race", "dream")
+
+
+def generate_movie(rng, title):
+    """Returns one movie shaped like the ones add_movie stores."""
+    has_details = rng.random() < 0.8
+    return {
+        "name": title,
+        "director": rng.choice(DIRECTORS),
+        "year": rng.randint(1930, 2024),
+        "rating": round(rng.uniform(1, 10), 1),
+        "poster": f"https://m.media-amazon.com/images/M/{rng.getrandbits(48):x}.jpg" if has_details else "N/A",
+        "actors": ", ".join(rng.sample(ACTORS, 3)) if has_details else "N/A",
+        "plot": " ".join(rng.choice(PLOT_WORDS) for _ in range(rng.randint(8, 30))) if has_details else "N/A",
+    }
+
+
+def generate_dataset(users, movies_per_user, seed=0):
+    """
+    Builds a synthetic movies.json.
+
+    Args:
+        users: number of users.
+        movies_per_user: number of movies of each user.
+        seed: the same seed always gives the same dataset.
+    Returns:
+        A dict shaped like movies.json.
+    """
+    rng = random.Random(seed)
+    data = {}
+    for user_number in range(1, users + 1):
+        user_id = str(user_number)
+        movies = {str(movie_number): generate_movie(rng, f"Movie {user_number}-{movie_number}")
+                  for movie_number in range(1, movies_per_user + 1)}
+        data[user_id] = {"id": user_id, "name": f"User {user_number}", "movies": movies,
+                         "last_movie_id": movies_per_user}
+    return data
+
+
+def write_dataset(path, users, movies_per_user, seed=0):
+    with open(path, 'w') as fileobj:
+        json.dump(generate_dataset(users, movies_per_user, seed), fileobj, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write a synthetic movies.json")
+    parser.add_argument('path')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--movies-per-user', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_dataset(args.path, args.users, args.movies_per_user, args.seed)
+    print(f"Wrote {args.users * args.movies_per_user} movies of {args.users} users to {args.path}")
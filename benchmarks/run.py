@@ -0,0 +1,253 @@
+"""
+Benchmarks the data managers and the Flask routes on a synthetic dataset.
+
+    python -m benchmarks.run --users 100 --movies-per-user 50 --output results.json
+    python -m benchmarks.run --backend sqlite --compare results.json
+    python -m benchmarks.run --journal --snapshot-format msgpack
+
+Results are written as JSON (to stdout, or --output) so that runs can be
+compared; --compare prints each benchmark's median next to an earlier run's.
+OMDb is never called: the managers are built with a stub lookup.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.dataset import write_dataset
+from datamanager import serializers
+from datamanager.json_data_manager import JSONDataManager
+from datamanager.omdb import MISSING_DETAILS
+from datamanager.sharded_json_data_manager import ShardedJSONDataManager
+from datamanager.sqlite_data_manager import SQLiteDataManager
+
+BACKENDS = ("json", "sqlite", "sharded")
+
+
+def stub_omdb(title):
+    """Stands in for the OMDb lookup, so timings do not depend on the network."""
+    return dict(MISSING_DETAILS)
+
+
+def make_manager(backend, json_path, **options):
+    """
+    Builds a data manager of the given backend over the dataset at json_path;
+    options go to its constructor.
+    """
+    directory = os.path.dirname(json_path)
+    options.setdefault("fetch", stub_omdb)
+    if backend == "json":
+        class BenchJSONDataManager(JSONDataManager):
+            def get_movies_json_path(self):
+                return json_path
+
+        return BenchJSONDataManager(**options)
+
+    if backend == "sqlite":
+        class BenchSQLiteDataManager(SQLiteDataManager):
+            def get_movies_json_path(self):
+                return json_path
+
+        manager = BenchSQLiteDataManager(os.path.join(directory, 'movies.db'), **options)
+        manager.migrate_from_json()
+        return manager
+
+    class BenchShardedJSONDataManager(ShardedJSONDataManager):
+        def get_movies_json_path(self):
+            return json_path
+
+    return BenchShardedJSONDataManager(os.path.join(directory, 'movies'), **options)
+
+
+def summarize(name, timings, **extra):
+    """Turns a list of durations in seconds into a result entry, in milliseconds."""
+    timings = sorted(timings)
+    return {
+        "name": name,
+        "runs": len(timings),
+        "min_ms": round(timings[0] * 1000, 4),
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 4),
+        "max_ms": round(timings[-1] * 1000, 4),
+        **extra,
+    }
+
+
+def time_calls(function, runs):
+    """Calls function(i) for i in range(runs) and returns each call's duration."""
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        function(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_data_manager(manager, users, movies_per_user, runs):
+    """Times the data manager operations; returns a list of result entries."""
+    results = []
+
+    def bench(name, function, count=runs):
+        function(0)  # warm-up
+        results.append(summarize(f"data_manager.{name}", time_calls(function, count)))
+
+    if hasattr(manager, "load_movies_data"):
+        bench("load_movies_data", lambda i: manager.load_movies_data(), max(runs // 10, 3))
+    if hasattr(manager, "save_data"):
+        bench("save_data", lambda i: manager.save_data(), max(runs // 10, 3))
+    bench("calculate_total_pages", lambda i: manager.calculate_total_pages(10))
+    bench("get_movies_page", lambda i: manager.get_movies_page(i % 10 + 1, 10))
+    bench("search_movies", lambda i: manager.search_movies("movie love", 1, 10))
+    bench("filter_movies", lambda i: manager.filter_movies(min_rating=7, sort="rating", per_page=10))
+    bench("add_user", lambda i: manager.add_user(f"Bench user {i}"))
+
+    # Added movies are deleted again, so later benchmarks see the same dataset
+    added = []
+
+    def add_movie(i):
+        user_id = str(i % users + 1)
+        added.append((user_id, manager.add_movie(user_id, f"Bench movie {time.perf_counter_ns()}", "Bench", 2000, 5.0)))
+
+    bench("add_movie", add_movie)
+    bench("update_movie", lambda i: manager.update_movie(str(i % users + 1), str(i % movies_per_user + 1),
+                                                         {"rating": i % 10}))
+    bench("delete_movie", lambda i: manager.delete_movie(*added.pop()), len(added) - 1)
+    return results
+
+
+def bench_routes(manager, users, requests, concurrency):
+    """
+    Drives the Flask routes through the test client, with concurrency
+    threads each sending requests / concurrency of them.
+    """
+    import app as app_module
+    app_module.data_manager = manager
+    app_module.app.config['TESTING'] = True
+
+    routes = {
+        "index": lambda i: f"/?page={i % 10 + 1}",
+        "list_of_users": lambda i: "/list_of_users",
+        "user_movies": lambda i: f"/users/{i % users + 1}/movies",
+        "movies_by_user": lambda i: f"/movies_by_user/{i % users + 1}",
+        "search": lambda i: "/search?q=movie+love&format=json",
+        "filter": lambda i: "/movies?min_rating=7&sort=rating",
+    }
+    results = []
+    for name, url in routes.items():
+        def worker(offset):
+            client = app_module.app.test_client()
+            timings = []
+            for i in range(offset, requests, concurrency):
+                start = time.perf_counter()
+                response = client.get(url(i))
+                response.get_data()
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url(i)} answered {response.status_code}")
+            return timings
+
+        worker(0)  # warm-up
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = [timing for worker_timings in executor.map(worker, range(concurrency))
+                       for timing in worker_timings]
+        elapsed = time.perf_counter() - start
+        results.append(summarize(f"route.{name}", timings, concurrency=concurrency,
+                                 requests_per_second=round(len(timings) / elapsed, 1)))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Prints each benchmark's median against the same benchmark in an earlier run."""
+    with open(baseline_path) as fileobj:
+        baseline = {entry["name"]: entry for entry in json.load(fileobj)["results"]}
+    for entry in results:
+        before = baseline.get(entry["name"])
+        if before is None:
+            print(f"{entry['name']:40} {entry['median_ms']:>10.3f} ms   (new)", file=sys.stderr)
+            continue
+        ratio = entry["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        print(f"{entry['name']:40} {before['median_ms']:>10.3f} -> {entry['median_ms']:>10.3f} ms  x{ratio:.2f}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=BACKENDS, default="json")
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--snapshot-format', choices=("pretty", "json", "msgpack"),
+                        help="how the json backend writes movies.json (default: pretty)")
+    parser.add_argument('--journal', action='store_true', help="run the json backend in journal mode")
+    parser.add_argument('--movies-per-user', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=100, help="timed calls per data manager operation")
+    parser.add_argument('--requests', type=int, default=200, help="requests per route")
+    parser.add_argument('--concurrency', type=int, default=4, help="threads sending route requests")
+    parser.add_argument('--skip-routes', action='store_true')
+    parser.add_argument('--output', help="write the results here instead of stdout")
+    parser.add_argument('--compare', help="an earlier results file to compare medians with")
+    args = parser.parse_args(argv)
+    options = {}
+    if args.snapshot_format:
+        options["snapshot_format"] = args.snapshot_format
+    if args.journal:
+        options["journal"] = True
+    if options and args.backend != "json":
+        parser.error("--snapshot-format and --journal only apply to --backend json")
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'movies.json')
+        write_dataset(json_path, args.users, args.movies_per_user, args.seed)
+        if args.snapshot_format:
+            # So that startup and load_movies_data read the format under test too
+            serializers.convert(json_path, json_path, args.snapshot_format)
+
+        start = time.perf_counter()
+        manager = make_manager(args.backend, json_path, **options)
+        startup = time.perf_counter() - start
+
+        results = [summarize("data_manager.startup", [startup])]
+        results += bench_data_manager(manager, args.users, args.movies_per_user, args.runs)
+        if not args.skip_routes:
+            results += bench_routes(manager, args.users, args.requests, args.concurrency)
+
+    report = {
+        "meta": {
+            "backend": args.backend,
+            "users": args.users,
+            "movies_per_user": args.movies_per_user,
+            "seed": args.seed,
+            "options": options,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fileobj:
+            json.dump(report, fileobj, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from datamanager.data_manager_interface import AsyncDataManagerInterface
+from datamanager.omdb import async_fetch_omdb_movie_details, async_fetch_many_omdb_movie_details
+
+# Threads doing the blocking file and database work of the async app
+DEFAULT_IO_THREADS = 16
+
+# Movies fetched per trip to the thread pool by iter_user_movies
+DEFAULT_ITER_BATCH_SIZE = 500
+
+
+class AsyncDataManager(AsyncDataManagerInterface):
+    """
+    Runs any synchronous data manager behind coroutines.
+
+    Every call is handed to a bounded thread pool, so reading and writing
+    movies.json (or the SQLite database, or the shards) never blocks the
+    event loop. Before add_movie and add_movies, the OMDb details are looked
+    up with the async client and handed to the data manager, failures
+    (placeholders) included, so it never waits on OMDb from a pool thread.
+    Only the titles that will be inserted are looked up: the user and the
+    titles they have already are checked in the pool first. With
+    deferred enrichment the manager does not wait on OMDb anyway, so pass
+    prefetch_omdb=False.
+    """
+
+    def __init__(self, data_manager, max_workers=DEFAULT_IO_THREADS, prefetch_omdb=True):
+        self.data_manager = data_manager
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async-data-manager')
+        self._prefetch_omdb = prefetch_omdb
+
+    async def _run(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+    async def get_all_users(self):
+        return await self._run(self.data_manager.get_all_users)
+
+    async def get_user_movies(self, user_id):
+        return await self._run(self.data_manager.get_user_movies, user_id)
+
+    async def get_user(self, user_id):
+        return await self._run(self.data_manager.get_user, user_id)
+
+    async def get_data_version(self, user_id=None):
+        return await self._run(self.data_manager.get_data_version, user_id)
+
+    async def iter_user_movies(self, user_id, after=None, batch_size=DEFAULT_ITER_BATCH_SIZE):
+        """
+        Yields a user's movies in id order, fetching batch_size of them per
+        trip to the thread pool.
+
+        Each batch resumes after the last movie id of the previous one, so
+        no iterator is shared between pool threads (the SQLite manager's
+        connections belong to the thread that opened them).
+        """
+        while True:
+            batch = await self._run(self._next_batch, user_id, after, batch_size)
+            for movie in batch:
+                yield movie
+            if len(batch) < batch_size:
+                return
+            after = int(batch[-1][0])
+
+    def _next_batch(self, user_id, after, batch_size):
+        movies = self.data_manager.iter_user_movies(user_id, after)
+        try:
+            return list(islice(movies, batch_size))
+        finally:
+            movies.close()
+
+    async def get_movies_page(self, page, per_page):
+        return await self._run(self.data_manager.get_movies_page, page, per_page)
+
+    async def calculate_total_pages(self, movies_per_page):
+        return await self._run(self.data_manager.calculate_total_pages, movies_per_page)
+
+    async def search_movies(self, query, page, per_page):
+        return await self._run(self.data_manager.search_movies, query, page, per_page)
+
+    async def filter_movies(self, year_from=None, year_to=None, min_rating=None, director=None, user_id=None,
+                            sort=None, descending=True, page=1, per_page=10):
+        return await self._run(self.data_manager.filter_movies, year_from=year_from, year_to=year_to,
+                               min_rating=min_rating, director=director, user_id=user_id, sort=sort,
+                               descending=descending, page=page, per_page=per_page)
+
+    async def add_movie(self, user_id, movie_name, director, year, rating, omdb_details=None):
+        if omdb_details is None and self._prefetch_omdb and movie_name:
+            if await self._run(self._new_titles, user_id, [movie_name]):
+                omdb_details = await async_fetch_omdb_movie_details(movie_name)
+        # A missing user or a duplicate title is rejected by the data manager
+        # before it would look the movie up itself
+        return await self._run(self.data_manager.add_movie, user_id, movie_name, director, year, rating,
+                               omdb_details=omdb_details)
+
+    async def add_movies(self, user_id, movies, omdb_details=None):
+        movies = list(movies)
+        if omdb_details is None and self._prefetch_omdb:
+            titles = await self._run(self._new_titles, user_id, [movie.get("name") for movie in movies])
+            omdb_details = await async_fetch_many_omdb_movie_details(titles) if titles else {}
+        return await self._run(self.data_manager.add_movies, user_id, movies, omdb_details=omdb_details)
+
+    def _new_titles(self, user_id, names):
+        """
+        Returns the names the user does not have yet, each once, matched
+        case-insensitively as the data managers do; none if there is no
+        such user. Runs in the pool.
+        """
+        user = self.data_manager.get_user(user_id)
+        if user is None:
+            return []
+        seen = {movie["name"].lower() for movie in user.get("movies", {}).values()}
+        titles = []
+        for name in names:
+            if isinstance(name, str) and name and name.lower() not in seen:
+                seen.add(name.lower())
+                titles.append(name)
+        return titles
+
+    async def add_user(self, user_name):
+        return await self._run(self.data_manager.add_user, user_name)
+
+    async def update_movie(self, user_id, movie_id, updated_data):
+        return await self._run(self.data_manager.update_movie, user_id, movie_id, updated_data)
+
+    async def delete_movie(self, user_id, movie_id):
+        return await self._run(self.data_manager.delete_movie, user_id, movie_id)
+
+    def shutdown(self):
+        """Waits for the calls in flight and stops the thread pool."""
+        self._executor.shutdown(wait=True)
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
 
+# Number of movies shown per page on the index route
+DEFAULT_MOVIES_PER_PAGE = 4
+
+
 class DataManagerInterface(ABC):
 
     @abstractmethod
@@ -10,14 +14,77 @@ class DataManagerInterface(ABC):
     def get_user_movies(self, user_id):
         pass
 
+    @abstractmethod
+    def get_user(self, user_id):
+        """Return one user ({"id", "name", "movies"}), or None if there is no such user."""
+        pass
+
+    @abstractmethod
+    def get_data_version(self, user_id=None):
+        """
+        Return a (version, modified_at) pair for all data, or for one user
+        and their movies; version changes whenever that data does.
+        """
+        pass
+
+    @abstractmethod
+    def iter_user_movies(self, user_id, after=None):
+        """
+        Yield (movie_id, movie) pairs of a user's movies in id order,
+        starting after the movie id given in after.
+        """
+        pass
+
     @abstractmethod
     def get_movies_json_path(self):
         pass
 
     @abstractmethod
-    def add_movie(self, user_id, movie_name, director, year, rating):
+    def get_movies_page(self, page, per_page):
+        """Return one page of movies across all users, grouped by user."""
         pass
 
+    @abstractmethod
+    def calculate_total_pages(self, movies_per_page):
+        """Return the number of pages needed to show all movies."""
+        pass
+
+    @abstractmethod
+    def search_movies(self, query, page, per_page):
+        """
+        Full-text search over movie names, directors, actors and plots.
+        Return a dict with "total" and the "results" on the requested page.
+        """
+        pass
+
+    @abstractmethod
+    def filter_movies(self, year_from=None, year_to=None, min_rating=None, director=None, user_id=None,
+                      sort=None, descending=True, page=1, per_page=10):
+        """
+        Filter movies by year range, minimum rating, director and user, and
+        sort them by rating or year. Return a dict with "total" and the
+        "results" on the requested page.
+        """
+        pass
+
+    @abstractmethod
+    def add_movie(self, user_id, movie_name, director, year, rating, omdb_details=None):
+        """
+        Add a movie to a user's list and return its id. omdb_details, if
+        given, are the movie's OMDb details looked up already (placeholders
+        included), so OMDb is not asked again.
+        """
+        pass
+
+
+    @abstractmethod
+    def add_movies(self, user_id, movies, omdb_details=None):
+        """
+        Add many movies (dicts with name, director, year and rating) to a
+        user's list in one write, skipping titles the user already has.
+        omdb_details maps titles to details looked up already.
+        """
+        pass
 
     @abstractmethod
     def add_user(self, user_name):
@@ -50,4 +117,68 @@ class DataManagerInterface(ABC):
     # @abstractmethod
     # def list_movies(self, user_id):
     #     """List all movies for a user."""
-    #     pass
\ No newline at end of file
+    #     pass
+
+class AsyncDataManagerInterface(ABC):
+    """
+    Coroutine counterpart of DataManagerInterface, for the async app.
+    Methods take the same arguments and return the same values.
+    """
+
+    @abstractmethod
+    async def get_all_users(self):
+        pass
+
+    @abstractmethod
+    async def get_user_movies(self, user_id):
+        pass
+
+    @abstractmethod
+    async def get_user(self, user_id):
+        pass
+
+    @abstractmethod
+    async def get_data_version(self, user_id=None):
+        pass
+
+    @abstractmethod
+    def iter_user_movies(self, user_id, after=None):
+        """Async generator of (movie_id, movie) pairs, like DataManagerInterface.iter_user_movies."""
+        pass
+
+    @abstractmethod
+    async def get_movies_page(self, page, per_page):
+        pass
+
+    @abstractmethod
+    async def calculate_total_pages(self, movies_per_page):
+        pass
+
+    @abstractmethod
+    async def search_movies(self, query, page, per_page):
+        pass
+
+    @abstractmethod
+    async def filter_movies(self, year_from=None, year_to=None, min_rating=None, director=None, user_id=None,
+                            sort=None, descending=True, page=1, per_page=10):
+        pass
+
+    @abstractmethod
+    async def add_movie(self, user_id, movie_name, director, year, rating, omdb_details=None):
+        pass
+
+    @abstractmethod
+    async def add_movies(self, user_id, movies, omdb_details=None):
+        pass
+
+    @abstractmethod
+    async def add_user(self, user_name):
+        pass
+
+    @abstractmethod
+    async def update_movie(self, user_id, movie_id, updated_data):
+        pass
+
+    @abstractmethod
+    async def delete_movie(self, user_id, movie_id):
+        pass
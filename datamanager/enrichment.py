@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from datamanager.omdb import MISSING_DETAILS, lookup_omdb_movie_details
+
+# Values of a movie's "enrichment_status" field
+ENRICHMENT_PENDING = "pending"
+ENRICHMENT_DONE = "done"
+ENRICHMENT_FAILED = "failed"
+
+# OMDb fields stored on a movie that is still waiting to be enriched
+PENDING_DETAILS = {**MISSING_DETAILS, "enrichment_status": ENRICHMENT_PENDING}
+
+DEFAULT_ENRICHMENT_WORKERS = 4
+
+
+class EnrichmentWorker:
+    """
+    Fills in OMDb details for movies in the background.
+
+    The data manager saves a new movie with PENDING_DETAILS and submits it
+    here; a pool thread then fetches the details and patches the movie
+    through the manager's update_movie(), setting enrichment_status to
+    "done", or "failed" if OMDb could not be reached (fetch raises).
+    Movies left pending or failed by an earlier run are queued again by
+    resume().
+    """
+
+    def __init__(self, data_manager, fetch=lookup_omdb_movie_details, max_workers=DEFAULT_ENRICHMENT_WORKERS):
+        self._data_manager = data_manager
+        self._fetch = fetch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='omdb-enrichment')
+
+    def submit(self, user_id, movie_id, title):
+        """Queues a movie for enrichment and returns the Future of the job."""
+        return self._executor.submit(self._enrich, user_id, movie_id, title)
+
+    def resume(self):
+        """
+        Scans the data manager, in a pool thread, for movies that are still
+        pending or whose enrichment failed, and queues them again.
+
+        Returns: the Future of the scan, whose result is the number queued.
+        A movie added while the scan runs may be queued twice; enriching it
+        again is harmless.
+        """
+        return self._executor.submit(self._resume)
+
+    def _resume(self):
+        queued = 0
+        try:
+            for user_id, user in self._data_manager.get_all_users().items():
+                for movie_id, movie in user.get("movies", {}).items():
+                    if movie.get("enrichment_status") in (ENRICHMENT_PENDING, ENRICHMENT_FAILED):
+                        self.submit(user_id, movie_id, movie["name"])
+                        queued += 1
+        except Exception as e:
+            print(f"Error looking for movies to enrich: {e}")
+        return queued
+
+    def _enrich(self, user_id, movie_id, title):
+        try:
+            details = self._fetch(title)
+            updated = self._data_manager.update_movie(user_id, movie_id,
+                                                      {**details, "enrichment_status": ENRICHMENT_DONE})
+            if not updated:
+                print(f"Movie {movie_id} of user {user_id} was removed before it could be enriched")
+        except Exception as e:
+            print(f"Error enriching movie {title}: {e}")
+            try:
+                self._data_manager.update_movie(user_id, movie_id, {"enrichment_status": ENRICHMENT_FAILED})
+            except Exception as e:
+                print(f"Error marking movie {title} as failed: {e}")
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
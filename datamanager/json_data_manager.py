@@ -1,16 +1,238 @@
-import urllib
+import atexit
+import math
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from collections import ChainMap, Counter
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 
-import requests
-from datamanager.data_manager_interface import DataManagerInterface
+from datamanager.data_manager_interface import DataManagerInterface, DEFAULT_MOVIES_PER_PAGE
+from datamanager.enrichment import EnrichmentWorker, PENDING_DETAILS
+from datamanager.locks import FileLock, ReadWriteLock
+from datamanager.omdb import fetch_omdb_movie_details, fetch_many_omdb_movie_details, lookup_omdb_movie_details
+from datamanager.movie_columns import MovieColumns
+from datamanager.movie_record import MovieRecord
+from datamanager import serializers
+from datamanager.search_index import InvertedIndex
 import os
 
-import json
+# In journal mode, fold the journal into movies.json after this many records
+DEFAULT_COMPACT_THRESHOLD = 500
+
+
+# Overlays of OverlayMap are folded into a new base once they hold more
+# entries than this, or than the square root of the base's size if larger
+MIN_OVERLAY_FOLD = 32
+
+
+class OverlayMap(Mapping):
+    """
+    Read-only mapping made of a base dict plus a small dict of the entries
+    changed since it was built.
+
+    with_changes() returns a new map and leaves this one as it is, copying
+    only the overlay, so publishing a change to one user does not copy
+    every user. Once the overlay outgrows about the square root of the
+    base, the two are folded into a new base, which keeps the amortized
+    cost of a change near O(sqrt(n)). Keys keep their position in the base;
+    new keys come after it, in the order they were added.
+    """
+
+    __slots__ = ("_base", "_overlay", "_added")
+
+    def __init__(self, base=None, overlay=None):
+        self._base = {} if base is None else base
+        self._overlay = overlay or {}
+        self._added = sum(1 for key in self._overlay if key not in self._base)
+
+    def __getitem__(self, key):
+        try:
+            return self._overlay[key]
+        except KeyError:
+            return self._base[key]
+
+    def __contains__(self, key):
+        return key in self._overlay or key in self._base
+
+    def __iter__(self):
+        yield from self._base
+        for key in self._overlay:
+            if key not in self._base:
+                yield key
+
+    def __len__(self):
+        return len(self._base) + self._added
+
+    def with_changes(self, changes):
+        """Returns a new map with the given entries set."""
+        if not changes:
+            return self
+        overlay = {**self._overlay, **changes}
+        if len(overlay) > max(MIN_OVERLAY_FOLD, math.isqrt(len(self._base))):
+            return OverlayMap({**self._base, **overlay})
+        return OverlayMap(self._base, overlay)
+
+    def to_dict(self):
+        return {**self._base, **self._overlay}
+
+
+class DataSnapshot:
+    """
+    One published state of JSONDataManager's data, never modified after
+    it is published.
+
+    Each write transaction copies only the users it changes (their dicts
+    and movie dicts; everything else is shared) and publishes them as
+    a new OverlayMap by replacing the manager's snapshot reference in one
+    assignment. Readers and save_data() take the reference once and work
+    on a stable view, without a lock, however many writes happen meanwhile.
+    """
+
+    __slots__ = ("data", "movie_count", "version", "modified_at", "user_versions", "loaded_version",
+                 "_page_offsets")
+
+    def __init__(self, data, movie_count, version, modified_at, user_versions, loaded_version):
+        # OverlayMap of user_id -> user
+        self.data = data
+        self.movie_count = movie_count
+        self.version = version
+        self.modified_at = modified_at
+        # OverlayMap of user_id -> (version, modified_at)
+        self.user_versions = user_versions
+        self.loaded_version = loaded_version
+        self._page_offsets = None
+
+    def page_offsets(self):
+        """
+        Returns the ids of the users that have movies, in display order,
+        and the position of each one's first movie in the flat list of all
+        movies. Built on first use, once per snapshot.
+        """
+        if self._page_offsets is None:
+            user_ids, offsets, total = [], [], 0
+            for user_id, user in self.data.items():
+                count = len(user.get("movies", {}))
+                if count:
+                    user_ids.append(user_id)
+                    offsets.append(total)
+                    total += count
+            # Two readers racing here build the same value
+            self._page_offsets = (user_ids, offsets)
+        return self._page_offsets
+
+
+def replay_journal(path, data):
+    """
+    Applies every record in the journal file at path to data, in order.
+
+    Returns: the number of records applied.
+    """
+    records = 0
+    try:
+        with open(path, 'rb') as journal:
+            for line in journal:
+                try:
+                    record = serializers.loads(line)
+                except ValueError:
+                    # A crash mid-append can leave a partial last line
+                    print(f"Skipping corrupt journal record: {line!r}")
+                    continue
+                JSONDataManager._apply_record(data, record)
+                records += 1
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error replaying journal: {e}")
+    return records
 
 
 class JSONDataManager(DataManagerInterface):
-    def __init__(self):
+    def __init__(self, journal=False, compact_threshold=DEFAULT_COMPACT_THRESHOLD, commit_window_ms=0,
+                 process_safe=False, deferred_enrichment=False, snapshot_format="pretty",
+                 fetch=fetch_omdb_movie_details):
+        """
+        Args:
+            journal: if True, mutations are appended to movies.json.journal
+                instead of rewriting movies.json each time.
+            compact_threshold: number of journal records after which the
+                journal is folded back into movies.json.
+            commit_window_ms: if greater than 0, mutations made within this
+                many milliseconds of each other are written and fsynced
+                together (group commit) instead of one by one.
+            process_safe: if True, mutations hold an inter-process lock on
+                movies.json.lock and reload the data first if another worker
+                changed it. Needed when several worker processes share the
+                file; writes are then flushed at the end of every mutation,
+                so commit_window_ms has no effect.
+            deferred_enrichment: if True, add_movie saves the movie at once
+                with pending OMDb fields and a background EnrichmentWorker
+                fills them in later.
+            snapshot_format: how save_data writes movies.json: "pretty"
+                (indented JSON), "json" (compact JSON) or "msgpack". Any
+                of them is recognized on load.
+            fetch: the OMDb lookup add_movie and add_movies use, e.g. a stub
+                in benchmarks; defaults to fetch_omdb_movie_details().
+        """
+        self._fetch = fetch
         self._file_path = self.get_movies_json_path()
+        self._serializer = serializers.get_serializer(snapshot_format)
+        # Guards the search index and columns; writers also hold it exclusively
+        # while building the next snapshot. Readers of the snapshot need no lock.
+        self._rw_lock = ReadWriteLock()
+        self._file_lock = FileLock(self._file_path + '.lock') if process_safe else None
+        self._journal = journal
+        self._compact_threshold = compact_threshold
+        # Number of records currently in the journal file
+        self._journal_records = 0
+        self._commit_window = commit_window_ms / 1000
+        # Published mutations that have not been written to disk yet
+        self._pending_records = []
+        # Mutations of the write transaction in progress, published with its snapshot
+        self._transaction_records = []
+        self._flush_timer = None
+        # Serializes flushes; _pending_lock guards _pending_records and the timer
+        self._commit_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        if self._commit_window > 0:
+            atexit.register(self.flush)
+        # (mtime, size) of movies.json (and the journal) as of the last load or save
+        self._file_signature = None
+        # Number of movies, for paging
+        self._movie_count = 0
+        # Users (user_id -> copied user dict) and user versions changed by
+        # the write transaction in progress
+        self._changes = {}
+        self._version_changes = {}
+        # user_id -> Counter of lowercased movie names, for duplicate checks
+        self._title_index = {}
+        # user_id -> highest movie id ever handed out; ids are never reused
+        self._last_movie_ids = {}
+        self._last_user_id = 0
+        # Full-text index over name, director, actors and plot
+        self._search_index = InvertedIndex()
+        # Year, rating, user and director columns for filter_movies
+        self._columns = MovieColumns()
+        # Bumped by every mutation and reload; the random token keeps versions
+        # from an earlier run of the app from matching this one's
+        self._version_token = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._modified_at = None
+        # Users missing from the snapshot's user_versions are unchanged since
+        # the last load (_loaded_version)
+        self._loaded_version = (0, None)
+        # Writers change _movies_data (a view of the snapshot with their
+        # changes on top) and the fields above, then publish them as
+        # _snapshot; everything outside a write transaction reads _snapshot
+        self._snapshot = None
         self._movies_data = self.load_movies_data()
+        self._rebuild_indexes()
+        self._enrichment = EnrichmentWorker(self, fetch=self.lookup_omdb_movie_details) if deferred_enrichment else None
+        if self._enrichment is not None:
+            self._enrichment.resume()
 
     @property
     def file_path(self):
@@ -27,22 +249,395 @@ class JSONDataManager(DataManagerInterface):
         # Construct the path to static/movies.json
         return os.path.join(project_root, 'Movie_WebApi_App', 'static', 'movies.json')
 
+    @property
+    def journal_path(self):
+        return self._file_path + '.journal'
+
     def load_movies_data(self):
+        """
+        Reads movies.json from disk, replaying the journal on top of it
+        when journal mode is enabled.
+
+        Routes should not call this directly; use get_all_users() instead,
+        which serves the in-memory copy and only re-reads the file when it
+        has changed on disk.
+        """
+        data = {}
         try:
-            with open(self._file_path, 'r') as fileobj:
-                return json.load(fileobj)
+            self._file_signature = self._get_file_signature()
+            with open(self._file_path, 'rb') as fileobj:
+                data = serializers.loads(fileobj.read())
 
-        except Exception as e:
+        except FileNotFoundError as e:
             print(f"Error loading data: {e}")
-        return {}
+
+        except ValueError as e:
+            # Never fall back to {} here: the next save would wipe the file
+            raise ValueError(f"{self._file_path} is corrupt: {e}")
+
+        if self._journal:
+            self._replay_journal(data)
+        return data
+
+    def _get_file_signature(self):
+        """Returns the (mtime, size) of movies.json and the journal."""
+        return self._stat_signature(self._file_path), self._stat_signature(self.journal_path)
+
+    @staticmethod
+    def _stat_signature(path):
+        """Returns the (mtime, size) of a file, or None if it is missing."""
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _replay_journal(self, data):
+        """Applies every record in the journal file to data, in order."""
+        self._journal_records = replay_journal(self.journal_path, data)
+
+    @staticmethod
+    def _apply_record(data, record):
+        """
+        Applies one journal record to data.
+
+        Records are idempotent, so replaying a journal that was already
+        folded into movies.json (e.g. after a crash during compaction)
+        is harmless.
+        """
+        op = record["op"]
+        user_id = record["user_id"]
+        if op == "put_user":
+            data[user_id] = record["user"]
+        elif op == "put_movie":
+            user = data.setdefault(user_id, {"id": user_id, "name": None, "movies": {}})
+            user.setdefault("movies", {})[record["movie_id"]] = record["movie"]
+            # Keep the id counter ahead of the movie even if it is deleted later
+            user["last_movie_id"] = max(int(user.get("last_movie_id", 0)), int(record["movie_id"]))
+        elif op == "delete_movie":
+            data.get(user_id, {}).get("movies", {}).pop(record["movie_id"], None)
+        else:
+            print(f"Unknown journal operation: {op}")
+
+    def _needs_reload(self):
+        # Unflushed mutations live only in memory, so never reload over them
+        return not self._pending_records and self._get_file_signature() != self._file_signature
+
+    def _reload_if_changed(self):
+        """Re-reads movies.json only if it was modified outside this manager."""
+        if self._needs_reload():
+            with self._rw_lock.write_lock():
+                self._reload_if_changed_locked()
+
+    def _reload_if_changed_locked(self):
+        """Same as _reload_if_changed(); the caller must hold the write lock."""
+        if self._needs_reload():
+            self._movies_data = self.load_movies_data()
+            self._rebuild_indexes()
+
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Runs a mutation with exclusive access to the data.
+
+        The mutation's changes (see _writable_user()) are published as the
+        new snapshot when it succeeds. If it raises, they are thrown away and
+        the lookup structures are rebuilt from the published snapshot, so
+        readers, disk and indexes never see half a mutation. With
+        process_safe, the inter-process file lock is held for the whole
+        transaction and the data is reloaded first if another worker changed
+        it, so workers never overwrite each other's updates. Pending writes
+        are flushed after the in-process write lock is released.
+        """
+        process_lock = self._file_lock.acquire() if self._file_lock else nullcontext()
+        with process_lock:
+            with self._rw_lock.write_lock():
+                self._reload_if_changed_locked()
+                self._changes = {}
+                self._version_changes = {}
+                self._movies_data = ChainMap(self._changes, self._snapshot.data)
+                try:
+                    yield
+                except BaseException:
+                    if self._changes or self._transaction_records:
+                        self._discard_changes()
+                    raise
+                else:
+                    if self._changes or self._transaction_records:
+                        self._publish(self._snapshot.data.with_changes(self._changes),
+                                      self._snapshot.user_versions.with_changes(self._version_changes))
+                finally:
+                    self._movies_data = self._snapshot.data
+            if self._commit_window <= 0 or self._file_lock:
+                self.flush()
+
+    def _writable_user(self, user_id):
+        """
+        Returns the user's dict for the transaction in progress to change,
+        copying it (and its movies dict) the first time, as the published
+        snapshot shares it.
+        """
+        if user_id not in self._changes:
+            user = self._movies_data[user_id]
+            self._changes[user_id] = {**user, "movies": dict(user.get("movies", {}))}
+        return self._changes[user_id]
+
+    def _discard_changes(self):
+        """Goes back to the published snapshot after a failed transaction."""
+        snapshot = self._snapshot
+        self._changes = {}
+        self._version_changes = {}
+        self._transaction_records = []
+        self._version, self._modified_at = snapshot.version, snapshot.modified_at
+        self._index_all(snapshot.data)
+
+    def _publish(self, data, user_versions):
+        """
+        Publishes data and the current versions as the new snapshot, and
+        queues the transaction's records for writing; the caller must hold
+        the write lock.
+        """
+        snapshot = DataSnapshot(data, self._movie_count, self._version, self._modified_at, user_versions,
+                                self._loaded_version)
+        records, self._transaction_records = self._transaction_records, []
+        # The snapshot and its records change together, so a flush never
+        # takes records whose changes are missing from the snapshot it saves
+        with self._pending_lock:
+            self._snapshot = snapshot
+            self._pending_records.extend(records)
+            if records and self._commit_window > 0 and not self._file_lock and self._flush_timer is None:
+                self._flush_timer = threading.Timer(self._commit_window, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _rebuild_indexes(self):
+        """Rebuilds the derived lookup structures from freshly loaded _movies_data and publishes it."""
+        self._index_all(self._movies_data)
+
+        # Anything may have changed on disk, so every user gets a new version
+        modified_times = [signature[0] for signature in self._file_signature or () if signature]
+        self._version += 1
+        self._modified_at = max(modified_times) / 1e9 if modified_times else time.time()
+        self._loaded_version = (self._version, self._modified_at)
+        self._publish(OverlayMap(self._movies_data), OverlayMap())
+        self._movies_data = self._snapshot.data
+
+    def _index_all(self, data):
+        """Builds the lookup structures from scratch over data."""
+        self._movie_count = 0
+        self._title_index = {}
+        self._last_movie_ids = {}
+        self._search_index = InvertedIndex()
+        self._columns = MovieColumns()
+        with self._search_index.bulk_add():
+            for user_id, user in data.items():
+                movies = user.get("movies", {})
+                self._title_index[user_id] = Counter()
+                self._last_movie_ids[user_id] = max([int(user.get("last_movie_id", 0))] +
+                                                    [int(movie_id) for movie_id in movies])
+                for movie_id, movie in movies.items():
+                    # Loaded and replayed movies arrive as dicts
+                    if not isinstance(movie, MovieRecord):
+                        movie = movies[movie_id] = MovieRecord(movie)
+                    self._index_movie(user_id, movie_id, movie)
+        self._last_user_id = max((int(user_id) for user_id in data), default=0)
+
+    def _index_movie(self, user_id, movie_id, movie):
+        """Adds a movie to the lookup structures."""
+        self._movie_count += 1
+        self._title_index.setdefault(user_id, Counter())[movie["name"].lower()] += 1
+        self._search_index.add((user_id, movie_id), movie)
+        self._columns.add((user_id, movie_id), movie)
+
+    def _unindex_movie(self, user_id, movie_id, movie):
+        """Removes a movie from the lookup structures."""
+        self._movie_count -= 1
+        titles = self._title_index[user_id]
+        titles[movie["name"].lower()] -= 1
+        if titles[movie["name"].lower()] <= 0:
+            del titles[movie["name"].lower()]
+        self._search_index.remove((user_id, movie_id))
+        self._columns.remove((user_id, movie_id))
+
+    def _reindex_movie(self, user_id, movie_id, old_movie, new_movie):
+        """Updates the lookup structures after a movie was replaced by a changed copy."""
+        if old_movie["name"].lower() != new_movie["name"].lower():
+            titles = self._title_index[user_id]
+            titles[old_movie["name"].lower()] -= 1
+            if titles[old_movie["name"].lower()] <= 0:
+                del titles[old_movie["name"].lower()]
+            titles[new_movie["name"].lower()] += 1
+        self._search_index.add((user_id, movie_id), new_movie)
+        self._columns.add((user_id, movie_id), new_movie)
+
+    def _insert_movie(self, user_id, movie):
+        """
+        Stores a new movie under the next free id; the caller must hold the
+        write lock. Returns the new movie id.
+        """
+        user = self._writable_user(user_id)
+        new_movie_id = self._last_movie_ids.get(user_id, 0) + 1
+        self._last_movie_ids[user_id] = new_movie_id
+        # Persisted so that deleting the newest movie cannot free its id
+        user["last_movie_id"] = new_movie_id
+
+        new_movie_id = str(new_movie_id)
+        movie = MovieRecord(movie)
+        user["movies"][new_movie_id] = movie
+        self._index_movie(user_id, new_movie_id, movie)
+        self._queue_commit({"op": "put_movie", "user_id": user_id, "movie_id": new_movie_id, "movie": movie})
+        return new_movie_id
 
     def save_data(self):
-        """Save data to the JSON file."""
+        """
+        Save data to the JSON file, in the snapshot format chosen at construction.
+
+        The current snapshot is serialized without holding any lock, so
+        neither readers nor writers wait for it. The data is written to a
+        temporary file in the same directory, fsynced and then renamed over
+        movies.json, so readers and crashes only ever see the old or the new
+        file, never a half-written one.
+
+        Returns: True if movies.json was written, False if that failed.
+        """
         try:
-            with open(self._file_path, 'w') as file:
-                json.dump(self._movies_data, file, indent=2)
+            directory = os.path.dirname(self._file_path)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.movies-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(self._serializer.dumps(self._snapshot.data.to_dict()))
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(temp_path, self._file_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self._fsync_directory(directory)
+            # Our own write should not trigger a reload on the next read
+            self._file_signature = self._get_file_signature()
+            return True
         except Exception as e:
             print(f"Error saving data: {e}")
+            return False
+
+    @staticmethod
+    def _fsync_directory(directory):
+        """Makes a rename in directory durable (no-op where unsupported)."""
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+    def _queue_commit(self, record):
+        """
+        Records one mutation to be persisted; the caller must hold the write lock.
+
+        The record is queued when the transaction publishes its snapshot.
+        Without a commit window the transaction then flushes it as soon as
+        the write lock is released. With one, the first mutation starts a
+        timer and everything that arrives before it fires is written by a
+        single flush().
+        """
+        self._transaction_records.append(record)
+        self._version += 1
+        self._modified_at = time.time()
+        self._version_changes[record["user_id"]] = (self._version, self._modified_at)
+
+    def flush(self):
+        """Writes any pending mutations to disk."""
+        with self._commit_lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        """
+        Writes pending mutations; the caller must hold _commit_lock.
+
+        Without journal mode this rewrites movies.json; with it, the pending
+        records are appended to the journal with one write and one fsync,
+        and the journal is compacted once it reaches the threshold. The
+        records stay pending until they are written, so a reader meanwhile
+        does not mistake our own write for an outside change and reload.
+        If the write fails they stay pending too, and the next flush (the
+        next mutation's, or the commit window's retry) writes them again.
+        """
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            records = list(self._pending_records)
+        if not records:
+            return
+
+        written = self.save_data() if not self._journal else self._append_to_journal(records)
+        with self._pending_lock:
+            if not written:
+                if self._commit_window > 0 and not self._file_lock and self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self._commit_window, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+            del self._pending_records[:len(records)]
+
+        if self._journal and self._journal_records >= self._compact_threshold:
+            self._compact_locked()
+
+    def _append_to_journal(self, records):
+        """
+        Appends records to the journal with one write and one fsync.
+
+        Returns: True if they were written. On failure the journal is cut
+        back to its previous length, so a retry does not land after a torn
+        record and get lost with it on replay.
+        """
+        lines = b''.join(serializers.dumps_line(record) for record in records)
+        signature = self._stat_signature(self.journal_path)
+        length = signature[1] if signature else 0
+        try:
+            with open(self.journal_path, 'ab') as journal:
+                journal.write(lines)
+                journal.flush()
+                os.fsync(journal.fileno())
+        except Exception as e:
+            print(f"Error writing journal: {e}")
+            try:
+                os.truncate(self.journal_path, length)
+            except OSError:
+                pass
+            return False
+        self._journal_records += len(records)
+        self._file_signature = self._get_file_signature()
+        return True
+
+    def export_json(self, path):
+        """Writes the current data to path as indented JSON, whatever the snapshot format."""
+        self._reload_if_changed()
+        with open(path, 'wb') as fileobj:
+            fileobj.write(serializers.get_serializer("pretty").dumps(self._snapshot.data.to_dict()))
+
+    def compact(self):
+        """Folds the journal into movies.json and empties the journal."""
+        with self._commit_lock:
+            self._flush_locked()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        if not self.save_data():
+            # The journal still holds the only copy of its records
+            return
+        try:
+            # Truncate only after the snapshot is written; a crash in between
+            # just replays records that are already in the snapshot.
+            open(self.journal_path, 'w').close()
+            self._journal_records = 0
+            self._file_signature = self._get_file_signature()
+        except Exception as e:
+            print(f"Error truncating journal: {e}")
 
     def get_all_users(self):
 
@@ -50,9 +645,12 @@ class JSONDataManager(DataManagerInterface):
         Retrieves a list of username from the movie database.
 
         Returns: A list of usernames.
+
+        The data belongs to the current snapshot and must not be modified.
         """
         try:
-            user_list = self._movies_data
+            self._reload_if_changed()
+            user_list = self._snapshot.data
             return user_list
 
         except KeyError as e:
@@ -67,7 +665,8 @@ class JSONDataManager(DataManagerInterface):
         Return all the movies of a specific user
         """
         try:
-            list_of_movies = self._movies_data.get(str(user_id))
+            self._reload_if_changed()
+            list_of_movies = self._snapshot.data.get(str(user_id))
             if list_of_movies:
                 return list_of_movies.get("movies", {})
             else:
@@ -79,7 +678,54 @@ class JSONDataManager(DataManagerInterface):
             print(f"Error: {e}. 'name' key not found in a user entry.")
             return []
 
-    def add_movie(self, user_id, movie_name, director, year, rating):
+    def get_user(self, user_id):
+        """
+        Returns one user with their movies, or None if there is no such user.
+
+        The data belongs to the current snapshot and must not be modified.
+        """
+        self._reload_if_changed()
+        return self._snapshot.data.get(str(user_id))
+
+    def get_data_version(self, user_id=None):
+        """
+        Tells whether the data changed since a client last saw it.
+
+        Args:
+            user_id: if given, only changes to this user and their movies count.
+        Returns:
+            A (version, modified_at) tuple: an opaque string that changes with
+            every mutation, and the Unix time of the last one.
+        """
+        self._reload_if_changed()
+        snapshot = self._snapshot
+        if user_id is None:
+            version, modified_at = snapshot.version, snapshot.modified_at
+        else:
+            version, modified_at = snapshot.user_versions.get(str(user_id), snapshot.loaded_version)
+        return f"{self._version_token}-{version}", modified_at
+
+    def iter_user_movies(self, user_id, after=None):
+        """
+        Iterates over a user's movies in id order.
+
+        Args:
+            user_id: The ID of the user.
+            after: if given, start with the first movie whose id is greater.
+        Yields: (movie_id, movie) pairs; nothing if the user does not exist.
+        """
+        self._reload_if_changed()
+        user = self._snapshot.data.get(str(user_id))
+        if not user:
+            return
+        # Ids are handed out in increasing order, so this is nearly always sorted already
+        items = sorted(user.get("movies", {}).items(), key=lambda item: int(item[0]))
+
+        for movie_id, movie in items:
+            if after is None or int(movie_id) > after:
+                yield movie_id, movie
+
+    def add_movie(self, user_id, movie_name, director, year, rating, omdb_details=None):
         """
                 Adds a new movie to a user's list of favorite movies.
 
@@ -89,50 +735,136 @@ class JSONDataManager(DataManagerInterface):
                 - director: The director of the movie.
                 - year: The year the movie was released.
                 - rating: The rating of the movie.
+                - omdb_details: OMDb details looked up already, if any.
+
+                Returns: the id of the new movie.
                 """
         try:
-            # Check if the user exists in the data
-            if user_id not in self._movies_data:
-                raise KeyError(f"User with ID {user_id} not found")
-
-            # Get the user's current list of movies
-            user_movies = self._movies_data[user_id].get("movies", {})
             # Check if movie_name is None
             if movie_name is None:
                 raise ValueError("Movie name cannot be None")
 
-            # checks if the movie already exist in the databasse or not
-            for movie_id, movie_data in user_movies.items():
-                if movie_data["name"].lower() == movie_name.lower():
-                    raise ValueError(f"Movie {movie_name} is already exist in the user's list")
-
-            # Generate a new movie ID
-            new_movie_id = str(len(user_movies) + 1)
+            # Validate up front so we don't call OMDb for a movie we will reject
+            self._reload_if_changed()
+            with self._rw_lock.read_lock():
+                self._check_new_movie(user_id, movie_name)
 
-            # Fetch additional movie info from OMDB API
-            omdb_data = self.fetch_omdb_movie_details(movie_name)
+            if self._enrichment is not None:
+                # Save right away; the enrichment worker fills in the details
+                omdb_data = PENDING_DETAILS
+            elif omdb_details is not None:
+                omdb_data = omdb_details
+            else:
+                # Fetch additional movie info from OMDB API, outside of any lock
+                omdb_data = self.fetch_omdb_movie_details(movie_name)
             #print(omdb_data)
             if not omdb_data:
                 raise ValueError(f"Error fetching details for movie {movie_name} from OMDB.")
 
-            # Add the new movie to the user's list
-            user_movies[new_movie_id] = {
-                "name": movie_name,
-                "director": director,
-                "year": year,
-                "rating": rating,
-                **omdb_data
-            }
+            with self._write_transaction():
+                # Check again, the data may have changed while OMDb was answering
+                self._check_new_movie(user_id, movie_name)
 
-            # Add the new movie list in the data structure
-            self._movies_data[user_id]["movies"] = user_movies
+                # Add the new movie to the user's list and save it
+                new_movie_id = self._insert_movie(user_id, {
+                    "name": movie_name,
+                    "director": director,
+                    "year": year,
+                    "rating": rating,
+                    **omdb_data
+                })
 
-            # save the new movie data into database
-            self.save_data()
+            if self._enrichment is not None:
+                self._enrichment.submit(user_id, new_movie_id, movie_name)
+            return new_movie_id
         except KeyError as e:
             # Handle the case where the user is not found
             raise ValueError(f"Error: {e}. User with ID {user_id} not found.")
 
+    def _check_new_movie(self, user_id, movie_name):
+        """Raises if the user is missing or already has a movie with this name."""
+        # Check if the user exists in the data
+        if user_id not in self._movies_data:
+            raise KeyError(f"User with ID {user_id} not found")
+
+        # checks if the movie already exist in the databasse or not
+        if movie_name.lower() in self._title_index.get(user_id, ()):
+            raise ValueError(f"Movie {movie_name} is already exist in the user's list")
+
+    def _check_rename(self, user_id, movie, updated_data):
+        """Raises if updated_data renames the movie to another of the user's titles, as add_movie would."""
+        new_name = updated_data.get("name")
+        if (isinstance(new_name, str) and new_name.lower() != str(movie.get("name")).lower()
+                and new_name.lower() in self._title_index.get(user_id, ())):
+            raise ValueError(f"Movie {new_name} is already exist in the user's list")
+
+    def add_movies(self, user_id, movies, omdb_details=None):
+        """
+        Adds many movies to a user's list with a single write.
+
+        Args:
+            user_id: The ID of the user.
+            movies: an iterable of dicts with name, director, year and rating.
+            omdb_details: {title: details} of titles looked up already.
+        Returns:
+            A dict with "added" ({movie_id: name}) and "skipped" (names the
+            user already has, or that appear more than once in movies).
+        """
+        movies = list(movies)
+        if any(not movie.get("name") for movie in movies):
+            raise ValueError("Movie name cannot be None")
+
+        self._reload_if_changed()
+        new_movies, skipped = [], []
+        with self._rw_lock.read_lock():
+            if user_id not in self._movies_data:
+                raise ValueError(f"Error: User with ID {user_id} not found.")
+            existing = self._title_index.get(user_id, ())
+
+            # Dedupe against the user's list and within the batch in one pass
+            seen = set()
+            for movie in movies:
+                key = movie["name"].lower()
+                if key in existing or key in seen:
+                    skipped.append(movie["name"])
+                else:
+                    seen.add(key)
+                    new_movies.append(movie)
+
+        if self._enrichment is not None:
+            details = {movie["name"]: PENDING_DETAILS for movie in new_movies}
+        else:
+            # Look the remaining titles up in parallel, outside of any lock
+            known = omdb_details or {}
+            details = fetch_many_omdb_movie_details([movie["name"] for movie in new_movies
+                                                     if movie["name"] not in known],
+                                                    fetch=self.fetch_omdb_movie_details)
+            details.update(known)
+
+        added = {}
+        with self._write_transaction():
+            if user_id not in self._movies_data:
+                raise ValueError(f"Error: User with ID {user_id} not found.")
+            for movie in new_movies:
+                # Added by another request while OMDb was answering
+                if movie["name"].lower() in self._title_index.get(user_id, ()):
+                    skipped.append(movie["name"])
+                    continue
+
+                new_movie_id = self._insert_movie(user_id, {
+                    "name": movie["name"],
+                    "director": movie.get("director"),
+                    "year": movie.get("year"),
+                    "rating": movie.get("rating"),
+                    **details[movie["name"]]
+                })
+                added[new_movie_id] = movie["name"]
+
+        if self._enrichment is not None:
+            for movie_id, name in added.items():
+                self._enrichment.submit(user_id, movie_id, name)
+        return {"added": added, "skipped": skipped}
+
     def fetch_omdb_movie_details(self, title):
         """
         Fetches additional details for a movie  from the OMDB API,
@@ -142,60 +874,116 @@ class JSONDataManager(DataManagerInterface):
             A dictionary containing details(poster, plot, Actors) fetched from the OMDB API.
 
         """
+        return self._fetch(title)
 
-        try:
-            omdb_apikey = '968d14fd'
-            omdb_url = f'http://www.omdbapi.com/?apikey={omdb_apikey}&t={urllib.parse.quote(title)}'
-            print(f"OMDB API URL: {omdb_url}")
-
-            # make sure the request send through OMDB API
-            response = requests.get(omdb_url)
-            data = response.json()
-            print(f"OMDB API Response: {data}")
-            actors_list = data.get("Actors", [])
-            actors_string = ",".join(actors_list) if isinstance(actors_list, list) else actors_list
-
-            # Check if the request is successful
-            if response.status_code == 200 and data.get("Response") == "True":
-                return {
-                    "poster": data.get("Poster", "N/A"),
-                    "actors": actors_string if actors_string else "N/A",
-                    "plot": data.get("Plot", "N/A"),
-                }
-            else:
-                print(
-                    f"Error fetching details for movie {title} from OMDB API: {data.get('Error', 'Unknown error')}")
-                return {
-                    "poster": "N/A",
-                    "actors": "N/A",
-                    "plot": "N/A",
-                }
-        except Exception as e:
-            print(f"Error fetching details for movie {title} from OMDB API: {e}")
-            return {
-                "poster": "N/A",
-                "actors": "N/A",
-                "plot": "N/A",
-            }
-
-    def calculate_total_pages(self, movies_data):
-        # Sample logic: assuming 4 movies per page
-        movies_per_page = 4
-        total_movies = sum(len(user['movies']) for user in movies_data.values())
+    def lookup_omdb_movie_details(self, title):
+        """Like fetch_omdb_movie_details(), but raises if OMDb could not be reached; used for enrichment."""
+        return lookup_omdb_movie_details(title)
+
+    def calculate_total_pages(self, movies_per_page=DEFAULT_MOVIES_PER_PAGE):
+        """Returns the number of index pages, from the snapshot's movie count."""
+        self._reload_if_changed()
+        total_movies = self._snapshot.movie_count
         return (total_movies + movies_per_page - 1) // movies_per_page
+
+    def get_movies_page(self, page, per_page=DEFAULT_MOVIES_PER_PAGE):
+        """
+        Returns one page of movies across all users.
+
+        Args:
+            page: 1-based page number.
+            per_page: number of movies on a page.
+        Returns:
+            A dict shaped like movies.json ({user_id: {"name", "movies"}}),
+            holding only the movies on the requested page.
+        """
+        self._reload_if_changed()
+        snapshot = self._snapshot
+        user_ids, offsets = snapshot.page_offsets()
+        start = (page - 1) * per_page
+        # The user whose movies include the first one on the page
+        position = bisect_right(offsets, start) - 1
+        skip = start - offsets[position] if position >= 0 else 0
+        page_data = {}
+        remaining = per_page
+        for user_id in user_ids[max(position, 0):]:
+            if remaining <= 0:
+                break
+            user = snapshot.data[user_id]
+            movies = dict(islice(user["movies"].items(), skip, skip + remaining))
+            if movies:
+                page_data[user_id] = {"name": user.get("name"), "movies": movies}
+            remaining -= len(movies)
+            skip = 0
+        return page_data
+
+    def search_movies(self, query, page=1, per_page=DEFAULT_MOVIES_PER_PAGE):
+        """
+        Full-text search over movie names, directors, actors and plots.
+
+        Every word of the query must match, either exactly or as the start
+        of a word; matches in the name count most.
+
+        Returns:
+            A dict with "total" (number of matching movies) and "results",
+            the movies on the requested page, best match first. Each result
+            is the movie's fields plus user_id, movie_id and score.
+        """
+        self._reload_if_changed()
+        with self._rw_lock.read_lock():
+            total, matches = self._search_index.search(query, per_page, (page - 1) * per_page)
+            # Under the read lock the snapshot matches the search index
+            data = self._snapshot.data
+            results = [
+                {**data[user_id]["movies"][movie_id], "user_id": user_id, "movie_id": movie_id,
+                 "score": round(score, 3)}
+                for (user_id, movie_id), score in matches
+            ]
+        return {"total": total, "results": results}
+
+    def filter_movies(self, year_from=None, year_to=None, min_rating=None, director=None, user_id=None,
+                      sort=None, descending=True, page=1, per_page=DEFAULT_MOVIES_PER_PAGE):
+        """
+        Filters and sorts movies across all users, or within one user.
+
+        Args:
+            year_from, year_to: inclusive release year range.
+            min_rating: lowest rating to include.
+            director: exact director name, case-insensitive.
+            user_id: only movies of this user.
+            sort: "rating" or "year"; None keeps the stored order.
+            descending: sort direction.
+        Returns:
+            A dict with "total" (number of matching movies) and "results",
+            the movies on the requested page. Each result is the movie's
+            fields plus user_id and movie_id.
+        """
+        self._reload_if_changed()
+        with self._rw_lock.read_lock():
+            total, keys = self._columns.query(year_from, year_to, min_rating, director,
+                                              None if user_id is None else str(user_id),
+                                              sort, descending, per_page, (page - 1) * per_page)
+            data = self._snapshot.data
+            results = [
+                {**data[key_user_id]["movies"][movie_id], "user_id": key_user_id, "movie_id": movie_id}
+                for key_user_id, movie_id in keys
+            ]
+        return {"total": total, "results": results}
+
     def add_user(self, user_name):
         try:
-            # Get the max current list of users
-            max_user_id = max(int(user_id) for user_id in self._movies_data.keys())
+            with self._write_transaction():
+                # Generate a unique user_id (incrementing IDs)
+                self._last_user_id += 1
+                user_id = str(self._last_user_id)
 
-            # Generate a unique user_id (incrementing IDs)
-            user_id = str(max_user_id + 1)
+                # Add the new user to the data
+                self._movies_data[user_id] = {"id": user_id, "name": user_name, "movies": {}}
+                self._title_index[user_id] = Counter()
+                self._last_movie_ids[user_id] = 0
 
-            # Add the new user to the data
-            self._movies_data[user_id] = {"id": user_id, "name": user_name, "movies": {}}
-
-            # Save the updated data
-            self.save_data()
+                # Save the updated data
+                self._queue_commit({"op": "put_user", "user_id": user_id, "user": self._movies_data[user_id]})
 
             # Success message
             success_message = f"User {user_name} added successfully with ID {user_id}"
@@ -209,30 +997,36 @@ class JSONDataManager(DataManagerInterface):
         updated the user movie information
         """
         try:
-            user_data = self._movies_data.get(str(user_id))
-
-            # user not Found
-            if not user_data:
-                return False
+            with self._write_transaction():
+                user_data = self._movies_data.get(str(user_id))
 
-            movies = user_data.get('movies', {})
+                # user not Found
+                if not user_data:
+                    return False
 
-            if str(movie_id) not in movies:
-                return False
-            movies[str(movie_id)].update(updated_data)
+                if str(movie_id) not in user_data.get('movies', {}):
+                    return False
+                self._check_rename(str(user_id), user_data['movies'][str(movie_id)], updated_data)
+                movies = self._writable_user(str(user_id))['movies']
+                # Published snapshots share the old movie, so change a copy
+                old_movie = movies[str(movie_id)]
+                movies[str(movie_id)] = MovieRecord(old_movie)
+                movies[str(movie_id)].update(updated_data)
+                self._reindex_movie(str(user_id), str(movie_id), old_movie, movies[str(movie_id)])
 
-            self.save_data()
+                self._queue_commit({"op": "put_movie", "user_id": str(user_id), "movie_id": str(movie_id),
+                                    "movie": movies[str(movie_id)]})
             return True
         except Exception as e:
             raise ValueError(f"An error occurred: {e}")
 
     def delete_movie(self, user_id, movie_id):
-        user = self._movies_data.get(str(user_id))
-        if user:
-            movies = user.get('movies', {})
-            if str(movie_id) in movies:
-                del movies[str(movie_id)]
-                user['movies'] = movies
-                self.save_data()
-                return True
+        with self._write_transaction():
+            user = self._movies_data.get(str(user_id))
+            if user:
+                if str(movie_id) in user.get('movies', {}):
+                    movie = self._writable_user(str(user_id))['movies'].pop(str(movie_id))
+                    self._unindex_movie(str(user_id), str(movie_id), movie)
+                    self._queue_commit({"op": "delete_movie", "user_id": str(user_id), "movie_id": str(movie_id)})
+                    return True
         return False
@@ -0,0 +1,79 @@
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is not available on Windows; FileLock then only guards this process
+    fcntl = None
+
+
+class ReadWriteLock:
+    """
+    A lock that lets many readers in at once but gives writers exclusive access.
+
+    Waiting writers are preferred over new readers, so a steady stream of
+    reads cannot starve a write. The lock is not re-entrant.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class FileLock:
+    """
+    An exclusive advisory lock on a file, shared by every process on the box.
+
+    Each acquisition opens its own file descriptor, so threads of the same
+    process also exclude each other.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        if fcntl is None:
+            with self._thread_lock:
+                yield
+            return
+
+        with open(self._path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
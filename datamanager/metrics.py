@@ -0,0 +1,197 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """
+    Counts observations (durations, in seconds) into cumulative buckets,
+    per label combination, as Prometheus histograms do.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._buckets = tuple(buckets)
+        # labels -> [count per bucket (last one is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self._buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._values.items()}
+        for labels, (counts, total, count) in values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield (self.name + "_bucket",
+                       _format_labels(self.labelnames, labels, [("le", _format_value(float(bound)))]), cumulative)
+            yield self.name + "_sum", _format_labels(self.labelnames, labels), total
+            yield self.name + "_count", _format_labels(self.labelnames, labels), count
+
+
+class CallbackMetric:
+    """
+    A gauge or counter whose values are read from a function at scrape
+    time, so keeping it up to date costs nothing on the hot path.
+    """
+
+    def __init__(self, name, help, labelnames, collect, type="gauge"):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.type = type
+        # Returns {labels tuple: value}
+        self._collect = collect
+
+    def samples(self):
+        try:
+            values = self._collect()
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {e}")
+            return
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class MetricsRegistry:
+    """Holds the metrics of this process and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            # Registering the same name again returns the existing metric
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, labelnames, collect, type="gauge"):
+        with self._lock:
+            # Replaced, not kept: the callback may close over a new object
+            self._metrics[name] = CallbackMetric(name, help, labelnames, collect, type)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by the data layer and the app
+registry = MetricsRegistry()
+
+data_manager_duration = registry.histogram(
+    "movies_data_manager_call_duration_seconds", "Duration of data manager calls.", ("method",))
+data_manager_errors = registry.counter(
+    "movies_data_manager_errors_total", "Data manager calls that raised.", ("method",))
+omdb_duration = registry.histogram(
+    "movies_omdb_request_duration_seconds", "Duration of OMDb lookups that went to the network.", ("outcome",))
+
+# Data manager methods that are timed when present; generators such as
+# iter_user_movies are left out, their work happens after the call returns
+INSTRUMENTED_METHODS = (
+    "get_all_users", "get_user_movies", "get_user", "get_movies_page", "calculate_total_pages", "search_movies",
+    "filter_movies", "get_data_version", "add_user", "add_movie", "add_movies", "update_movie", "delete_movie",
+    "load_movies_data", "save_data", "flush", "compact", "fetch_omdb_movie_details",
+)
+
+
+def instrument(data_manager):
+    """
+    Times the calls to a data manager's methods into
+    movies_data_manager_call_duration_seconds.
+
+    The timed wrappers are set on the instance, so calls the manager makes
+    to itself (e.g. save_data from flush) are timed too. Returns the manager.
+    """
+    for name in INSTRUMENTED_METHODS:
+        method = getattr(data_manager, name, None)
+        if method is None or inspect.isgeneratorfunction(method):
+            continue
+        setattr(data_manager, name, _timed(method, name))
+    return data_manager
+
+
+def _timed(method, name):
+    labels = (name,)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            data_manager_errors.inc(labels)
+            raise
+        finally:
+            data_manager_duration.observe(time.perf_counter() - start, labels)
+
+    return wrapper
@@ -0,0 +1,186 @@
+import heapq
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    # Without numpy, queries fall back to a plain Python scan of the same arrays
+    np = None
+
+# Columns that filter_movies can sort by
+SORT_COLUMNS = ("rating", "year")
+
+
+def _number(value):
+    """Converts a stored year or rating to float, NaN when missing or invalid."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class MovieColumns:
+    """
+    Column-oriented copy of the fields used to filter and sort movies.
+
+    Each movie occupies one row across compact typed arrays (year, rating,
+    numeric user id, dictionary-encoded director), so range filters and
+    top-K sorts run over contiguous memory, vectorized with numpy when it is
+    installed. Deleted rows are tombstoned and reused by later inserts.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._years = array('d')
+        self._ratings = array('d')
+        self._user_ids = array('q')
+        self._directors = array('q')
+        self._alive = bytearray()
+        # (user_id, movie_id) -> row
+        self._rows = {}
+        self._free_rows = []
+        # lowercased director -> code stored in _directors (0 means unknown)
+        self._director_codes = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _director_code(self, director, create):
+        if not isinstance(director, str) or not director.strip():
+            return 0
+        key = director.strip().lower()
+        code = self._director_codes.get(key)
+        if code is None and create:
+            code = self._director_codes[key] = len(self._director_codes) + 1
+        return code
+
+    def add(self, key, movie):
+        """Stores (or overwrites) the row of a movie keyed by (user_id, movie_id)."""
+        try:
+            user_id = int(key[0])
+        except ValueError:
+            user_id = -1
+        values = (_number(movie.get("year")), _number(movie.get("rating")), user_id,
+                  self._director_code(movie.get("director"), create=True))
+
+        row = self._rows.get(key)
+        if row is None and self._free_rows:
+            row = self._free_rows.pop()
+        if row is None:
+            row = len(self._keys)
+            self._keys.append(key)
+            self._years.append(values[0])
+            self._ratings.append(values[1])
+            self._user_ids.append(values[2])
+            self._directors.append(values[3])
+            self._alive.append(1)
+        else:
+            self._keys[row] = key
+            self._years[row], self._ratings[row], self._user_ids[row], self._directors[row] = values
+            self._alive[row] = 1
+        self._rows[key] = row
+
+    def remove(self, key):
+        """Tombstones the row of a movie; unknown keys are ignored."""
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._alive[row] = 0
+            self._free_rows.append(row)
+
+    def query(self, year_from=None, year_to=None, min_rating=None, director=None, user_id=None,
+              sort=None, descending=True, limit=10, offset=0):
+        """
+        Finds the movies matching every given filter.
+
+        Args:
+            year_from, year_to: inclusive release year range.
+            min_rating: lowest rating to include.
+            director: exact director name, case-insensitive.
+            user_id: only movies of this user.
+            sort: "rating" or "year"; None keeps insertion order.
+        Returns:
+            A (total, keys) tuple: the number of matching movies, and the
+            (user_id, movie_id) keys of the requested page.
+        """
+        if sort is not None and sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort}; use one of {', '.join(SORT_COLUMNS)}")
+
+        director_code = None
+        if director is not None:
+            director_code = self._director_code(director, create=False)
+            if not director_code:
+                return 0, []
+        if user_id is not None:
+            try:
+                user_id = int(user_id)
+            except ValueError:
+                return 0, []
+
+        query = self._query_numpy if np is not None else self._query_python
+        total, rows = query(year_from, year_to, min_rating, director_code, user_id, sort, descending,
+                            offset + limit)
+        return total, [self._keys[row] for row in rows[offset:offset + limit]]
+
+    def _sort_values(self, sort):
+        return self._ratings if sort == "rating" else self._years
+
+    def _query_numpy(self, year_from, year_to, min_rating, director_code, user_id, sort, descending, k):
+        # Zero-copy views over the arrays; they must not outlive this call,
+        # or the arrays could not grow
+        mask = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        if not len(mask):
+            return 0, []
+        if year_from is not None:
+            mask &= np.frombuffer(self._years, dtype=np.float64) >= year_from
+        if year_to is not None:
+            mask &= np.frombuffer(self._years, dtype=np.float64) <= year_to
+        if min_rating is not None:
+            mask &= np.frombuffer(self._ratings, dtype=np.float64) >= min_rating
+        if director_code is not None:
+            mask &= np.frombuffer(self._directors, dtype=np.int64) == director_code
+        if user_id is not None:
+            mask &= np.frombuffer(self._user_ids, dtype=np.int64) == user_id
+
+        rows = np.flatnonzero(mask)
+        total = len(rows)
+        if sort is None or not total:
+            return total, rows[:k].tolist()
+
+        values = np.frombuffer(self._sort_values(sort), dtype=np.float64)[rows]
+        # Missing values sort last either way
+        values = np.where(np.isnan(values), np.inf, -values if descending else values)
+        if k < total:
+            # Only the first k need ordering: partition first, then sort those.
+            # Every row tied with the k-th value is kept, so that ties are
+            # broken by row, as in _query_python, and pages stay stable
+            kth = np.partition(values, k - 1)[k - 1]
+            top = np.flatnonzero(values <= kth)
+            order = top[np.lexsort((rows[top], values[top]))][:k]
+        else:
+            order = np.lexsort((rows, values))
+        return total, rows[order].tolist()
+
+    def _query_python(self, year_from, year_to, min_rating, director_code, user_id, sort, descending, k):
+        years, ratings = self._years, self._ratings
+        rows = [
+            row for row in range(len(self._keys))
+            if self._alive[row]
+            and (year_from is None or years[row] >= year_from)
+            and (year_to is None or years[row] <= year_to)
+            and (min_rating is None or ratings[row] >= min_rating)
+            and (director_code is None or self._directors[row] == director_code)
+            and (user_id is None or self._user_ids[row] == user_id)
+        ]
+        if sort is None:
+            return len(rows), rows[:k]
+
+        values = self._sort_values(sort)
+
+        def sort_key(row):
+            value = values[row]
+            if math.isnan(value):
+                return math.inf, row
+            return (-value if descending else value), row
+
+        return len(rows), heapq.nsmallest(k, rows, key=sort_key)
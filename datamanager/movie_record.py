@@ -0,0 +1,85 @@
+import sys
+from collections.abc import Mapping
+
+# Fields every movie may have, stored in slots instead of a per-movie dict
+MOVIE_FIELDS = ("name", "director", "year", "rating", "poster", "actors", "plot", "enrichment_status")
+
+# Low-cardinality fields whose values are interned, so movies with the same
+# director or cast share one string object
+INTERNED_FIELDS = frozenset(("director", "actors", "enrichment_status"))
+
+# OMDb's placeholder for a missing poster, plot or cast
+NOT_AVAILABLE = sys.intern("N/A")
+
+
+def _compact(field, value):
+    """Returns value, replaced by a shared string object where possible."""
+    if isinstance(value, str):
+        if value == NOT_AVAILABLE:
+            return NOT_AVAILABLE
+        if field in INTERNED_FIELDS:
+            return sys.intern(value)
+    return value
+
+
+class MovieRecord(Mapping):
+    """
+    Memory-compact movie, used by JSONDataManager instead of a dict.
+
+    Known fields live in __slots__, so a movie carries no per-instance dict
+    and no copies of the key strings; a field that was never set is simply
+    missing, as it would be from a dict. Unknown fields go to a small extra
+    dict created only when needed.
+
+    It is a read-only Mapping with update(), so {**movie}, movie.get() and
+    templates work unchanged; serialize with to_dict() or json_default().
+    """
+
+    __slots__ = MOVIE_FIELDS + ("_extra",)
+
+    def __init__(self, fields=()):
+        self._extra = None
+        self.update(fields)
+
+    def update(self, fields):
+        """Sets the given fields, like dict.update()."""
+        for key, value in dict(fields).items():
+            if key in MOVIE_FIELDS:
+                setattr(self, key, _compact(key, value))
+            else:
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[sys.intern(key)] = value
+
+    def __getitem__(self, key):
+        if key in MOVIE_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for field in MOVIE_FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"MovieRecord({self.to_dict()!r})"
+
+    def to_dict(self):
+        return dict(self)
+
+
+def json_default(obj):
+    """json.dump(s) default hook that writes MovieRecords and other read-only mappings as objects."""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from datamanager.metrics import omdb_duration
+
+from datamanager.omdb_cache import OMDbCache, DEFAULT_TTL_SECONDS, DEFAULT_NEGATIVE_TTL_SECONDS
+from datamanager.omdb_client import OMDbClient, AsyncOMDbClient
+
+# Parallel OMDb lookups made by fetch_many_omdb_movie_details
+DEFAULT_BULK_WORKERS = 8
+
+# Placeholder stored when OMDb has no details for a movie
+MISSING_DETAILS = {
+    "poster": "N/A",
+    "actors": "N/A",
+    "plot": "N/A",
+}
+
+# Shared by every data manager; the file sits next to movies.json unless OMDB_CACHE_PATH is set
+omdb_cache = OMDbCache(
+    os.environ.get('OMDB_CACHE_PATH',
+                   os.path.join(os.path.dirname(__file__), '..', 'static', 'omdb_cache.db')),
+    ttl_seconds=int(os.environ.get('OMDB_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+    negative_ttl_seconds=int(os.environ.get('OMDB_CACHE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL_SECONDS)),
+)
+
+# Shared HTTP client; OMDB_BASE_URL can point it at a local stub server
+omdb_client = OMDbClient(
+    base_url=os.environ.get('OMDB_BASE_URL', 'http://www.omdbapi.com/'),
+    api_key=os.environ.get('OMDB_API_KEY', '968d14fd'),
+)
+
+# Built on first use by async_fetch_omdb_movie_details, as it needs httpx
+_async_omdb_client = None
+
+
+def get_async_omdb_client():
+    """Returns the shared AsyncOMDbClient, configured like omdb_client."""
+    global _async_omdb_client
+    if _async_omdb_client is None:
+        _async_omdb_client = AsyncOMDbClient(
+            base_url=os.environ.get('OMDB_BASE_URL', 'http://www.omdbapi.com/'),
+            api_key=os.environ.get('OMDB_API_KEY', '968d14fd'),
+        )
+    return _async_omdb_client
+
+
+async def close_async_omdb_client():
+    """Closes the async client's connections, if it was ever used."""
+    global _async_omdb_client
+    if _async_omdb_client is not None:
+        await _async_omdb_client.aclose()
+        _async_omdb_client = None
+
+
+def lookup_omdb_movie_details(title):
+    """
+    Like fetch_omdb_movie_details(), but raises instead of returning
+    placeholders when OMDb could not be asked: on network errors, error
+    answers, and while the client's circuit breaker is open. A movie OMDb
+    does not know still gets MISSING_DETAILS.
+    """
+    hit, details = omdb_cache.get(title)
+    if hit:
+        return details if details is not None else dict(MISSING_DETAILS)
+
+    start = time.perf_counter()
+    try:
+        details = omdb_client.fetch(title)
+    except Exception:
+        omdb_duration.observe(time.perf_counter() - start, ("error",))
+        raise
+    omdb_duration.observe(time.perf_counter() - start, ("found" if details is not None else "not_found",))
+
+    omdb_cache.put(title, details)
+    return details if details is not None else dict(MISSING_DETAILS)
+
+
+def fetch_omdb_movie_details(title):
+    """
+    Fetches additional details for a movie  from the OMDB API,
+    Args:
+        Title: the name of the movie
+    Returns:
+        A dictionary containing details(poster, plot, Actors) fetched from the OMDB API.
+
+    Answers are served from omdb_cache when possible. Successful lookups and
+    "not found" answers are cached; network errors, and calls skipped while
+    the client's circuit breaker is open, are not.
+    """
+    try:
+        return lookup_omdb_movie_details(title)
+    except Exception as e:
+        print(f"Error fetching details for movie {title} from OMDB API: {e}")
+        return dict(MISSING_DETAILS)
+
+
+def fetch_many_omdb_movie_details(titles, fetch=fetch_omdb_movie_details, max_workers=DEFAULT_BULK_WORKERS):
+    """
+    Fetches details for many movies with a bounded pool of parallel lookups.
+
+    Args:
+        titles: the movie names to look up.
+        fetch: the single-title lookup to use.
+    Returns:
+        A dictionary mapping each title to its details.
+    """
+    titles = list(titles)
+    if not titles:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(titles))) as executor:
+        return dict(zip(titles, executor.map(fetch, titles)))
+
+
+async def async_fetch_omdb_movie_details(title):
+    """
+    Coroutine version of fetch_omdb_movie_details(), for the async app.
+
+    The lookup itself goes through the async client; the cache, whose
+    second tier is a SQLite file, is read and written in a worker thread.
+    """
+    hit, details = await asyncio.to_thread(omdb_cache.get, title)
+    if hit:
+        return details if details is not None else dict(MISSING_DETAILS)
+
+    start = time.perf_counter()
+    try:
+        details = await get_async_omdb_client().fetch(title)
+    except Exception as e:
+        omdb_duration.observe(time.perf_counter() - start, ("error",))
+        print(f"Error fetching details for movie {title} from OMDB API: {e}")
+        return dict(MISSING_DETAILS)
+    omdb_duration.observe(time.perf_counter() - start, ("found" if details is not None else "not_found",))
+
+    await asyncio.to_thread(omdb_cache.put, title, details)
+    return details if details is not None else dict(MISSING_DETAILS)
+
+
+async def async_fetch_many_omdb_movie_details(titles, max_concurrency=DEFAULT_BULK_WORKERS):
+    """Looks many movies up at once, with at most max_concurrency lookups in flight."""
+    titles = list(titles)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(title):
+        async with semaphore:
+            return await async_fetch_omdb_movie_details(title)
+
+    return dict(zip(titles, await asyncio.gather(*(fetch(title) for title in titles))))
@@ -0,0 +1,132 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# How long a successful lookup is trusted
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# How long a "Movie not found!" answer is trusted
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+
+# Number of titles kept in the in-process tier
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def normalize_title(title):
+    """Returns the cache key for a title: lowercased, with whitespace collapsed."""
+    return " ".join(title.lower().split())
+
+
+class OMDbCache:
+    """
+    Two-tier cache of OMDb lookups keyed by normalized title.
+
+    The first tier is an in-process LRU dict bounded to max_entries. The
+    second tier is a SQLite file shared by every worker process, so a title
+    looked up once is never fetched again until its TTL runs out. Both
+    found and not-found answers are cached, with separate TTLs.
+
+    Each tier has its own lock, so memory hits never wait for disk I/O.
+    An entry that expired in memory is looked up on disk again, where
+    another worker may have refreshed it.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 negative_ttl_seconds=DEFAULT_NEGATIVE_TTL_SECONDS):
+        self._path = path
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        # normalized title -> (expires_at, details or None)
+        self._memory = OrderedDict()
+        # Guards _memory and the counters
+        self._lock = threading.Lock()
+        # Guards the on-disk tier's connection
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def path(self):
+        return self._path
+
+    def _connection(self):
+        """Opens the on-disk tier on first use; the caller must hold _db_lock."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self._path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS omdb_cache (
+                       title TEXT PRIMARY KEY,
+                       details TEXT,
+                       expires_at REAL NOT NULL
+                   )""")
+        return self._conn
+
+    def get(self, title):
+        """
+        Looks a title up in the cache.
+
+        Returns:
+            A (hit, details) tuple. details is None for a cached "not found"
+            answer; hit is False when the title has to be fetched from OMDb.
+        """
+        key = normalize_title(title)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return True, dict(entry[1]) if entry[1] is not None else None
+
+        # Missing or expired in memory
+        try:
+            with self._db_lock:
+                row = self._connection().execute(
+                    "SELECT expires_at, details FROM omdb_cache WHERE title = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading OMDB cache: {e}")
+            row = None
+
+        with self._lock:
+            if row is None or row[0] <= now:
+                self.misses += 1
+                return False, None
+            entry = (row[0], json.loads(row[1]) if row[1] is not None else None)
+            self._remember(key, entry)
+            self.hits += 1
+            return True, dict(entry[1]) if entry[1] is not None else None
+
+    def put(self, title, details):
+        """
+        Caches the answer for a title; details=None records "not found".
+        """
+        key = normalize_title(title)
+        ttl = self._ttl if details is not None else self._negative_ttl
+        entry = (time.time() + ttl, dict(details) if details is not None else None)
+        with self._lock:
+            self._remember(key, entry)
+        try:
+            with self._db_lock, self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO omdb_cache (title, details, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(entry[1]) if entry[1] is not None else None, entry[0]))
+        except sqlite3.Error as e:
+            print(f"Error writing OMDB cache: {e}")
+
+    def _remember(self, key, entry):
+        """Adds an entry to the in-process tier, evicting the least recently used; the caller must hold _lock."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self):
+        """Deletes expired rows from the on-disk tier."""
+        with self._db_lock:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM omdb_cache WHERE expires_at <= ?", (time.time(),))
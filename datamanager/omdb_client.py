@@ -0,0 +1,240 @@
+import asyncio
+import random
+import threading
+import time
+
+# Seconds to wait for the TCP connection and for the response
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 5
+
+# Attempts per lookup, and the backoff before the n-th retry is up to base * 2**n seconds
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_BASE = 0.2
+DEFAULT_BACKOFF_MAX = 2
+
+# Consecutive failed lookups that open the circuit, and how long it stays open
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+# HTTP statuses worth retrying; everything else is returned or raised at once
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OMDb while the circuit breaker is open."""
+
+
+class OMDbError(Exception):
+    """Raised when OMDb answers with an error that is not about the movie itself."""
+
+
+class OMDbClient:
+    """
+    HTTP client for the OMDB API.
+
+    Keeps a pool of keep-alive connections, puts connect and read timeouts
+    on every request, and retries transient failures with jittered
+    exponential backoff. After failure_threshold lookups in a row fail, the
+    circuit opens. fetch() then fails fast with CircuitOpenError for
+    reset_timeout seconds, after which a single trial lookup is let through.
+    """
+
+    def __init__(self, base_url, api_key, pool_size=10,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self._base_url = base_url
+        self._api_key = api_key
+        self._timeout = (connect_timeout, read_timeout)
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+
+        self._pool_size = pool_size
+        # Created by the first lookup; importing the HTTP library takes a
+        # noticeable part of the app's startup time
+        self._session = None
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = self._make_session(self._pool_size)
+            return self._session
+
+    @staticmethod
+    def _make_session(pool_size):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @property
+    def circuit_open(self):
+        return self._opened_at is not None
+
+    def fetch(self, title):
+        """
+        Looks a movie up by title.
+
+        Returns:
+            A dictionary with poster, actors and plot, or None if OMDb
+            answered that it does not know the movie.
+        Raises:
+            CircuitOpenError if OMDb has been failing; requests.RequestException
+            or OMDbError if the lookup failed after all retries.
+        """
+        self._before_call()
+        try:
+            data = self._get_with_retries(title)
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success()
+        return self._parse_details(data)
+
+    @staticmethod
+    def _parse_details(data):
+        """Turns an OMDb answer into poster, actors and plot, or None for "Movie not found!"."""
+        if data.get("Response") == "True":
+            actors_list = data.get("Actors", [])
+            actors_string = ",".join(actors_list) if isinstance(actors_list, list) else actors_list
+            return {
+                "poster": data.get("Poster", "N/A"),
+                "actors": actors_string if actors_string else "N/A",
+                "plot": data.get("Plot", "N/A"),
+            }
+        return None
+
+    @staticmethod
+    def _check_answer(data):
+        """Returns an answer about the movie; raises OMDbError for any other error."""
+        if data.get("Response") == "True" or data.get("Error") == "Movie not found!":
+            return data
+        # Bad API key, exhausted quota...: retrying will not help
+        raise OMDbError(data.get("Error", "Unknown error"))
+
+    def _get_with_retries(self, title):
+        import requests
+
+        session = self._get_session()
+        params = {"apikey": self._api_key, "t": title}
+        for attempt in range(self._max_attempts):
+            last_attempt = attempt == self._max_attempts - 1
+            try:
+                response = session.get(self._base_url, params=params, timeout=self._timeout)
+                if response.status_code in RETRY_STATUSES and not last_attempt:
+                    raise requests.HTTPError(f"OMDB API returned {response.status_code}", response=response)
+                response.raise_for_status()
+                data = response.json()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                status = e.response.status_code if e.response is not None else None
+                if last_attempt or (status is not None and status not in RETRY_STATUSES):
+                    raise
+                print(f"OMDB API attempt {attempt + 1} for {title} failed: {e}")
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            return self._check_answer(data)
+
+    def _backoff_delay(self, attempt):
+        # "Full jitter": spreads retries from many workers instead of syncing them up
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+
+    def _before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self._reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("OMDB API is unavailable, skipping lookup")
+            # Half-open: let this one call through to probe OMDb
+            self._trial_in_flight = True
+
+    def _record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def _record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._consecutive_failures >= self._failure_threshold:
+                if self._opened_at is None:
+                    print("OMDB API keeps failing, opening the circuit breaker")
+                self._opened_at = time.monotonic()
+
+
+class AsyncOMDbClient(OMDbClient):
+    """
+    OMDbClient for the async app: same timeouts, retries and circuit
+    breaker, but fetch() is a coroutine built on an httpx.AsyncClient, so
+    a lookup waiting on OMDb does not hold a thread. Needs httpx.
+    """
+
+    @staticmethod
+    def _make_session(pool_size):
+        try:
+            import httpx
+        except ImportError:
+            raise ValueError("The async OMDb client needs the httpx package (pip install httpx)")
+        return httpx.AsyncClient(limits=httpx.Limits(max_connections=pool_size,
+                                                     max_keepalive_connections=pool_size))
+
+    async def fetch(self, title):
+        """Coroutine version of OMDbClient.fetch(); raises httpx.HTTPError for network failures."""
+        self._before_call()
+        try:
+            data = await self._get_with_retries(title)
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success()
+        return self._parse_details(data)
+
+    async def _get_with_retries(self, title):
+        session = self._get_session()
+        import httpx
+
+        params = {"apikey": self._api_key, "t": title}
+        connect_timeout, read_timeout = self._timeout
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        for attempt in range(self._max_attempts):
+            last_attempt = attempt == self._max_attempts - 1
+            try:
+                response = await session.get(self._base_url, params=params, timeout=timeout)
+                if response.status_code in RETRY_STATUSES and not last_attempt:
+                    raise httpx.HTTPStatusError(f"OMDB API returned {response.status_code}",
+                                                request=response.request, response=response)
+                response.raise_for_status()
+                data = response.json()
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                print(f"OMDB API attempt {attempt + 1} for {title} failed: {e}")
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+            except httpx.HTTPStatusError as e:
+                if last_attempt or e.response.status_code not in RETRY_STATUSES:
+                    raise
+                print(f"OMDB API attempt {attempt + 1} for {title} failed: {e}")
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+
+            return self._check_answer(data)
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.aclose()
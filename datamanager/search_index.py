@@ -0,0 +1,148 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+
+# Movie fields that are searched, and how much a match in each one counts
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "director": 2.0,
+    "actors": 2.0,
+    "plot": 1.0,
+}
+
+# A prefix match counts for this fraction of an exact word match
+PREFIX_DISCOUNT = 0.5
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Splits text into lowercase words."""
+    if not isinstance(text, str):
+        return []
+    return _WORD.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    In-memory full-text index over movies.
+
+    Maps every word of a movie's name, director, actors and plot to the
+    movies containing it, with a weight per field. Documents are keyed by
+    (user_id, movie_id). The vocabulary is kept sorted so that the words
+    starting with a prefix are found by binary search; see bulk_add() for
+    building an index from many movies.
+    """
+
+    def __init__(self):
+        # word -> {doc_key: weight}
+        self._postings = {}
+        # doc_key -> words indexed for it, so it can be removed again
+        self._doc_words = {}
+        # Sorted list of every word in _postings, except those added inside
+        # bulk_add(), which wait in _pending_words until it ends
+        self._vocabulary = []
+        self._pending_words = None
+
+    def __len__(self):
+        return len(self._doc_words)
+
+    @contextmanager
+    def bulk_add(self):
+        """
+        Within this block, new words are collected in a set and merged into
+        the vocabulary with one sort at the end, instead of an insort each,
+        which would make building an index quadratic in its vocabulary.
+        """
+        self._pending_words = set()
+        try:
+            yield self
+        finally:
+            pending, self._pending_words = self._pending_words, None
+            if pending:
+                self._vocabulary = sorted(pending.union(self._vocabulary))
+
+    def add(self, doc_key, movie):
+        """Indexes a movie; replaces any previous entry for the same key."""
+        if doc_key in self._doc_words:
+            self.remove(doc_key)
+
+        weights = {}
+        for field, field_weight in FIELD_WEIGHTS.items():
+            for word in tokenize(movie.get(field)):
+                weights[word] = weights.get(word, 0) + field_weight
+
+        for word, weight in weights.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                if self._pending_words is not None:
+                    self._pending_words.add(word)
+                else:
+                    insort(self._vocabulary, word)
+            postings[doc_key] = weight
+        self._doc_words[doc_key] = list(weights)
+
+    def remove(self, doc_key):
+        """Drops a movie from the index; unknown keys are ignored."""
+        for word in self._doc_words.pop(doc_key, ()):
+            postings = self._postings[word]
+            del postings[doc_key]
+            if not postings:
+                del self._postings[word]
+                if self._pending_words is not None and word in self._pending_words:
+                    self._pending_words.discard(word)
+                else:
+                    del self._vocabulary[bisect_left(self._vocabulary, word)]
+
+    def _expand(self, term):
+        """Yields (word, discount) for the exact word and words it prefixes."""
+        if term in self._postings:
+            yield term, 1.0
+        # Every word with the prefix is expanded, so that short prefixes find
+        # (and count) all of their matches, as SQLite's prefix queries do
+        for index in range(bisect_left(self._vocabulary, term), len(self._vocabulary)):
+            word = self._vocabulary[index]
+            if not word.startswith(term):
+                break
+            if word != term:
+                yield word, PREFIX_DISCOUNT
+
+    def search(self, query, limit, offset=0):
+        """
+        Finds the movies matching every word of query (each word also
+        matches as a prefix).
+
+        Returns:
+            A (total, results) tuple: the number of matching movies, and
+            the (doc_key, score) pairs of the requested page, best first.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return 0, []
+
+        total_docs = max(len(self._doc_words), 1)
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for word, discount in self._expand(term):
+                postings = self._postings[word]
+                # Rare words say more about a movie than common ones
+                idf = math.log(1 + total_docs / len(postings))
+                for doc_key, weight in postings.items():
+                    score = weight * idf * discount
+                    if score > term_scores.get(doc_key, 0):
+                        term_scores[doc_key] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_key: score + term_scores[doc_key]
+                          for doc_key, score in scores.items() if doc_key in term_scores}
+            if not scores:
+                return 0, []
+
+        best = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+        return len(scores), best[offset:]
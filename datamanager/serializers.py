@@ -0,0 +1,106 @@
+import json
+import sys
+
+from datamanager.movie_record import json_default
+
+try:
+    import orjson
+except ImportError:
+    # Without orjson, the stdlib json module is used for every JSON format
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# First bytes of a msgpack snapshot; JSON can never start with them
+MSGPACK_MAGIC = b'MVPK\x01'
+
+
+class PrettyJSONSerializer:
+    """Indented JSON, the historical movies.json format; easy to read and diff."""
+
+    name = "pretty"
+
+    def dumps(self, data):
+        if orjson is not None:
+            return orjson.dumps(data, default=json_default, option=orjson.OPT_INDENT_2)
+        return json.dumps(data, indent=2, default=json_default).encode()
+
+
+class CompactJSONSerializer:
+    """JSON without whitespace, encoded with orjson when it is installed."""
+
+    name = "json"
+
+    def dumps(self, data):
+        if orjson is not None:
+            return orjson.dumps(data, default=json_default)
+        return json.dumps(data, separators=(',', ':'), default=json_default).encode()
+
+
+class MsgpackSerializer:
+    """Binary msgpack snapshot behind MSGPACK_MAGIC; needs the msgpack package."""
+
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ValueError("The msgpack snapshot format needs the msgpack package (pip install msgpack)")
+
+    def dumps(self, data):
+        return MSGPACK_MAGIC + msgpack.packb(data, default=json_default, use_bin_type=True)
+
+
+SERIALIZERS = {serializer.name: serializer for serializer in
+               (PrettyJSONSerializer, CompactJSONSerializer, MsgpackSerializer)}
+
+
+def get_serializer(name):
+    """Returns the serializer for "pretty", "json" or "msgpack"."""
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown snapshot format {name}; use one of {', '.join(SERIALIZERS)}")
+
+
+def loads(raw):
+    """
+    Decodes a snapshot written by any of the serializers, recognizing
+    msgpack by its magic bytes.
+
+    Raises:
+        ValueError if the data is corrupt or its format is not supported here.
+    """
+    if raw.startswith(MSGPACK_MAGIC):
+        if msgpack is None:
+            raise ValueError("Snapshot is in msgpack format, which needs the msgpack package")
+        try:
+            return msgpack.unpackb(raw[len(MSGPACK_MAGIC):], raw=False)
+        except Exception as e:
+            raise ValueError(f"Invalid msgpack snapshot: {e}")
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps_line(record):
+    """Encodes one journal record as a line of compact JSON."""
+    return CompactJSONSerializer().dumps(record) + b'\n'
+
+
+def convert(source, destination, format_name="pretty"):
+    """Rewrites a snapshot file in another format, e.g. to read a msgpack file."""
+    with open(source, 'rb') as fileobj:
+        data = loads(fileobj.read())
+    with open(destination, 'wb') as fileobj:
+        fileobj.write(get_serializer(format_name).dumps(data))
+
+
+if __name__ == '__main__':
+    # python -m datamanager.serializers SOURCE DESTINATION [pretty|json|msgpack]
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python -m datamanager.serializers SOURCE DESTINATION [pretty|json|msgpack]")
+    convert(*sys.argv[1:])
+    print(f"Wrote {sys.argv[2]}")
@@ -0,0 +1,674 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from datamanager import serializers
+from datamanager.data_manager_interface import DataManagerInterface, DEFAULT_MOVIES_PER_PAGE
+from datamanager.enrichment import EnrichmentWorker, PENDING_DETAILS
+from datamanager.json_data_manager import replay_journal
+from datamanager.locks import FileLock
+from datamanager.movie_columns import MovieColumns
+from datamanager.omdb import fetch_omdb_movie_details, fetch_many_omdb_movie_details
+from datamanager.search_index import InvertedIndex
+
+# Most movies kept in memory across all loaded user shards
+DEFAULT_MAX_CACHED_MOVIES = 100000
+
+
+def write_json_atomic(path, data):
+    """
+    Writes data as JSON to path through a fsynced temporary file and a
+    rename, so readers and crashes only ever see the old or the new file.
+    """
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.shard-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    # Make the rename itself durable (no-op where unsupported)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _stat_signature(path):
+    """Returns the (mtime, size) of a file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class ShardedJSONDataManager(DataManagerInterface):
+    """
+    Stores every user in a file of their own, users/<user_id>.json, shaped
+    like that user's entry in movies.json.
+
+    A small manifest.json lists the users with their name and movie count,
+    which is all startup, the user list and paging need. A user's file is
+    read on first access and kept in an LRU cache holding at most
+    max_cached_movies movies; mutations rewrite only that user's file (and
+    the manifest when the movie count changes). Cached shards are never
+    changed in place: a mutation changes a copy and swaps it into the
+    cache once it is saved, so readers never see a half-done change and
+    a failed write leaves memory as it was. search_movies and
+    filter_movies use a catalog-wide index built from every shard on the
+    first query and then kept up to date shard by shard: our own writes
+    reindex the changed shard, and shards changed by other processes are
+    noticed by their file signature and reindexed on the next query.
+
+    On first start, an existing movies.json is split into shards.
+    """
+
+    def __init__(self, shards_dir=None, max_cached_movies=DEFAULT_MAX_CACHED_MOVIES, deferred_enrichment=False,
+                 fetch=fetch_omdb_movie_details):
+        """
+        Args:
+            shards_dir: the directory holding manifest.json and users/;
+                defaults to movie_shards next to the static directory, as
+                everything under static/ is served publicly.
+            max_cached_movies: memory cap; least recently used shards are
+                dropped once the loaded shards hold more movies than this.
+            deferred_enrichment: if True, add_movie saves the movie at once
+                with pending OMDb fields and a background EnrichmentWorker
+                fills them in later.
+            fetch: the OMDb lookup add_movie and add_movies use, e.g. a stub
+                in benchmarks; defaults to fetch_omdb_movie_details().
+        """
+        self._shards_dir = shards_dir or os.path.join(
+            os.path.dirname(os.path.dirname(self.get_movies_json_path())), 'movie_shards')
+        self._max_cached_movies = max_cached_movies
+        self._fetch = fetch
+        # Guards the manifest, the shard cache and the versions; shard files
+        # are small, so they are read and written while holding it
+        self._lock = threading.RLock()
+        # Held by mutations across processes, so two workers never hand out
+        # the same user id or overwrite each other's shard and manifest writes
+        self._manifest_lock = FileLock(os.path.join(self._shards_dir, 'manifest.json.lock'))
+        # user_id -> {"name", "movie_count"}, in user id order
+        self._users = OrderedDict()
+        self._last_user_id = 0
+        self._manifest_signature = None
+        # user_id -> shard dict, least recently used first
+        self._shards = OrderedDict()
+        self._cached_movies = 0
+        # user_id -> Counter of the lowercased movie names of each cached
+        # shard, for the duplicate title checks
+        self._titles = {}
+        # user_id -> (mtime, size) of the shard file as last read or written,
+        # kept after eviction so outside changes are noticed on the next load
+        self._shard_signatures = {}
+        # Search and filter indexes over every shard's movies, and
+        # user_id -> (shard signature, movie ids) of the shards they hold
+        self._search_index = InvertedIndex()
+        self._columns = MovieColumns()
+        self._indexed_shards = {}
+
+        # Same version scheme as JSONDataManager.get_data_version()
+        self._version_token = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._modified_at = None
+        self._user_versions = {}
+        self._loaded_version = (0, None)
+
+        os.makedirs(os.path.join(self._shards_dir, 'users'), exist_ok=True)
+        with self._manifest_lock.acquire():
+            if not os.path.exists(self._manifest_path()):
+                self._split_movies_json()
+            self._load_manifest()
+        self._enrichment = EnrichmentWorker(self) if deferred_enrichment else None
+        if self._enrichment is not None:
+            self._enrichment.resume()
+
+    @property
+    def shards_dir(self):
+        return self._shards_dir
+
+    def get_movies_json_path(self):
+        # Get the absolute path to the project root directory
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+        # Construct the path to static/movies.json, the source for the initial split
+        return os.path.join(project_root, 'Movie_WebApi_App', 'static', 'movies.json')
+
+    def _manifest_path(self):
+        return os.path.join(self._shards_dir, 'manifest.json')
+
+    def _shard_path(self, user_id):
+        return os.path.join(self._shards_dir, 'users', f'{user_id}.json')
+
+    def _split_movies_json(self):
+        """Writes one shard per user of movies.json, then the manifest."""
+        try:
+            # movies.json may be in any snapshot format JSONDataManager writes
+            with open(self.get_movies_json_path(), 'rb') as fileobj:
+                data = serializers.loads(fileobj.read())
+        except FileNotFoundError:
+            data = {}
+        except ValueError as e:
+            raise ValueError(f"{self.get_movies_json_path()} is corrupt: {e}")
+        # Mutations JSONDataManager journaled but not yet folded into movies.json
+        replay_journal(self.get_movies_json_path() + '.journal', data)
+
+        for user_id, user in data.items():
+            write_json_atomic(self._shard_path(user_id), user)
+            self._users[user_id] = {"name": user.get("name"), "movie_count": len(user.get("movies", {}))}
+        self._last_user_id = max((int(user_id) for user_id in data), default=0)
+        self._save_manifest()
+
+    def _load_manifest(self):
+        """Reads manifest.json; every cached shard has to be checked again."""
+        self._manifest_signature = _stat_signature(self._manifest_path())
+        try:
+            with open(self._manifest_path(), 'r') as fileobj:
+                manifest = json.load(fileobj)
+        except ValueError as e:
+            raise ValueError(f"{self._manifest_path()} is corrupt: {e}")
+        self._users = OrderedDict(sorted(manifest.get("users", {}).items(), key=lambda item: int(item[0])))
+        self._last_user_id = manifest.get("last_user_id", 0)
+        self._shards.clear()
+        self._titles.clear()
+        self._cached_movies = 0
+
+        # Anything may have changed on disk, so every user gets a new version
+        self._version += 1
+        self._modified_at = self._manifest_signature[0] / 1e9 if self._manifest_signature else time.time()
+        self._user_versions = {}
+        self._loaded_version = (self._version, self._modified_at)
+
+    def _save_manifest(self):
+        write_json_atomic(self._manifest_path(), {"last_user_id": self._last_user_id, "users": self._users})
+        # Our own write should not trigger a reload on the next read
+        self._manifest_signature = _stat_signature(self._manifest_path())
+
+    def _refresh_manifest(self):
+        """Re-reads the manifest if another process changed it; caller holds _lock."""
+        if _stat_signature(self._manifest_path()) != self._manifest_signature:
+            self._load_manifest()
+
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Runs a mutation holding the manifest's file lock and _lock, with the
+        manifest re-read first if another process changed it.
+        """
+        with self._manifest_lock.acquire():
+            with self._lock:
+                self._refresh_manifest()
+                yield
+
+    def _bump_version(self, user_id):
+        self._version += 1
+        self._modified_at = time.time()
+        self._user_versions[user_id] = (self._version, self._modified_at)
+
+    def _check_shard(self, user_id):
+        """
+        Notices when another process changed a user's shard since we last
+        read or wrote it: bumps the user's version and drops the cached
+        copy. The caller holds _lock.
+        """
+        previous = self._shard_signatures.get(user_id)
+        if previous is not None and previous != _stat_signature(self._shard_path(user_id)):
+            self._bump_version(user_id)
+            del self._shard_signatures[user_id]
+            if user_id in self._shards:
+                self._drop_shard(user_id)
+
+    def _read_shard(self, user_id):
+        """Reads a user's shard from disk; caller holds _lock."""
+        self._shard_signatures[user_id] = _stat_signature(self._shard_path(user_id))
+        try:
+            with open(self._shard_path(user_id), 'r') as fileobj:
+                shard = json.load(fileobj)
+        except FileNotFoundError:
+            shard = {"id": user_id, "name": self._users[user_id]["name"], "movies": {}}
+        except ValueError as e:
+            raise ValueError(f"{self._shard_path(user_id)} is corrupt: {e}")
+        return shard
+
+    def _shard(self, user_id):
+        """
+        Returns a user's shard, loading it into the cache if needed, or None
+        if there is no such user; caller holds _lock.
+        """
+        user_id = str(user_id)
+        if user_id not in self._users:
+            return None
+
+        self._check_shard(user_id)
+        shard = self._shards.get(user_id)
+        if shard is not None:
+            self._shards.move_to_end(user_id)
+            return shard
+
+        shard = self._read_shard(user_id)
+        self._cache_shard(user_id, shard, self._count_titles(shard))
+        return shard
+
+    def _cache_shard(self, user_id, shard, titles):
+        """Puts a shard and its title counts into the cache, replacing any older copy; caller holds _lock."""
+        if user_id in self._shards:
+            self._drop_shard(user_id)
+        self._shards[user_id] = shard
+        self._titles[user_id] = titles
+        self._cached_movies += len(shard.get("movies", {}))
+        # Evict least recently used shards, but never this one
+        while self._cached_movies > self._max_cached_movies and len(self._shards) > 1:
+            self._drop_shard(next(iter(self._shards)))
+
+    def _drop_shard(self, user_id):
+        shard = self._shards.pop(user_id)
+        del self._titles[user_id]
+        self._cached_movies -= len(shard.get("movies", {}))
+
+    @staticmethod
+    def _count_titles(shard):
+        return Counter(movie["name"].lower() for movie in shard.get("movies", {}).values())
+
+    @staticmethod
+    def _copy_shard(shard):
+        """
+        Returns a copy of a shard whose movies mapping can be changed without
+        touching the original. Movies themselves are replaced, not changed,
+        so they are shared.
+        """
+        return {**shard, "movies": dict(shard.get("movies", {}))}
+
+    def _iter_shards(self, user_ids=None):
+        """
+        Yields (user_id, shard) for the given users (default: all) without
+        filling the cache, so full scans do not evict the working set;
+        caller holds _lock.
+        """
+        for user_id in list(self._users) if user_ids is None else user_ids:
+            self._check_shard(user_id)
+            shard = self._shards.get(user_id)
+            if shard is None:
+                shard = self._read_shard(user_id)
+            yield user_id, shard
+
+    def _index_shard(self, user_id, shard):
+        """Replaces a user's movies in the search and filter indexes; caller holds _lock."""
+        _, movie_ids = self._indexed_shards.pop(user_id, (None, ()))
+        for movie_id in movie_ids:
+            self._search_index.remove((user_id, movie_id))
+            self._columns.remove((user_id, movie_id))
+        if shard is None:
+            return
+        movies = shard.get("movies", {})
+        for movie_id, movie in movies.items():
+            self._search_index.add((user_id, movie_id), movie)
+            self._columns.add((user_id, movie_id), movie)
+        self._indexed_shards[user_id] = (self._shard_signatures.get(user_id), list(movies))
+
+    def _sync_indexes(self, user_ids=None):
+        """
+        Brings the search and filter indexes up to date for the given users
+        (default: all), reading only the shards that changed since they were
+        indexed; caller holds _lock.
+        """
+        if user_ids is None:
+            user_ids = list(self._users)
+            for user_id in [user_id for user_id in self._indexed_shards if user_id not in self._users]:
+                self._index_shard(user_id, None)
+        with self._search_index.bulk_add():
+            for user_id in user_ids:
+                self._check_shard(user_id)
+                indexed = self._indexed_shards.get(user_id)
+                if indexed is None or indexed[0] is None or indexed[0] != self._shard_signatures.get(user_id):
+                    shard = self._shards.get(user_id)
+                    if shard is None:
+                        shard = self._read_shard(user_id)
+                    self._index_shard(user_id, shard)
+
+    def _save_shard(self, user_id, shard, added=(), removed=()):
+        """
+        Writes a changed copy of a user's cached shard, then swaps it into the
+        cache; the manifest is rewritten too if their movie count changed.
+        added and removed are the movie names the change brought in and took
+        out. If the shard write fails, nothing in memory has changed.
+        The caller holds _lock.
+        """
+        write_json_atomic(self._shard_path(user_id), shard)
+        self._shard_signatures[user_id] = _stat_signature(self._shard_path(user_id))
+        titles = self._titles.get(user_id)
+        if titles is None:
+            titles = self._count_titles(shard)
+        else:
+            titles.update(name.lower() for name in added)
+            titles.subtract(name.lower() for name in removed)
+            titles += Counter()
+        self._cache_shard(user_id, shard, titles)
+        if user_id in self._indexed_shards:
+            self._index_shard(user_id, shard)
+        self._bump_version(user_id)
+
+        count = len(shard.get("movies", {}))
+        previous_count = self._users[user_id]["movie_count"]
+        if count != previous_count:
+            self._users[user_id]["movie_count"] = count
+            try:
+                self._save_manifest()
+            except BaseException:
+                self._users[user_id]["movie_count"] = previous_count
+                raise
+
+    def get_all_users(self):
+        """Returns every user with their movies; this reads every shard."""
+        with self._lock:
+            self._refresh_manifest()
+            return {user_id: self._copy_shard(shard) for user_id, shard in self._iter_shards()}
+
+    def get_user_movies(self, user_id):
+        """
+        Retrieves the movies of a specific user.
+
+        Args:
+            user_id: The ID of the user.
+        Returns: A dictionary containing the movies of the user.
+        """
+        with self._lock:
+            self._refresh_manifest()
+            shard = self._shard(user_id)
+            if shard is None:
+                print(f"Error: User with ID {user_id} not found.")
+                return {}
+            return dict(shard.get("movies", {}))
+
+    def get_user(self, user_id):
+        """Returns one user with their movies, or None; only that user's shard is read."""
+        with self._lock:
+            self._refresh_manifest()
+            shard = self._shard(user_id)
+            return None if shard is None else self._copy_shard(shard)
+
+    def get_data_version(self, user_id=None):
+        """
+        Returns a (version, modified_at) pair for all data or for one user,
+        checking the manifest and the user's shard for outside changes.
+        """
+        with self._lock:
+            self._refresh_manifest()
+            if user_id is None:
+                version, modified_at = self._version, self._modified_at
+            else:
+                user_id = str(user_id)
+                self._check_shard(user_id)
+                version, modified_at = self._user_versions.get(user_id, self._loaded_version)
+        return f"{self._version_token}-{version}", modified_at
+
+    def iter_user_movies(self, user_id, after=None):
+        """Iterates over a user's movies in id order, as (movie_id, movie) pairs."""
+        with self._lock:
+            self._refresh_manifest()
+            shard = self._shard(user_id)
+            if shard is None:
+                return
+            items = sorted(shard.get("movies", {}).items(), key=lambda item: int(item[0]))
+
+        for movie_id, movie in items:
+            if after is None or int(movie_id) > after:
+                yield movie_id, movie
+
+    def calculate_total_pages(self, movies_per_page=DEFAULT_MOVIES_PER_PAGE):
+        """Returns the number of index pages, from the manifest's movie counts."""
+        with self._lock:
+            self._refresh_manifest()
+            total_movies = sum(user["movie_count"] for user in self._users.values())
+        return (total_movies + movies_per_page - 1) // movies_per_page
+
+    def get_movies_page(self, page, per_page=DEFAULT_MOVIES_PER_PAGE):
+        """
+        Returns one page of movies across all users, shaped like movies.json.
+
+        Users before the page are skipped by their manifest movie count, so
+        only the shards of users on the page are read.
+        """
+        start = (page - 1) * per_page
+        end = start + per_page
+        page_data = {}
+        with self._lock:
+            self._refresh_manifest()
+            position = 0
+            for user_id, user in self._users.items():
+                if position >= end:
+                    break
+                count = user["movie_count"]
+                if position + count > start:
+                    movies = list(self._shard(user_id).get("movies", {}).items())
+                    selected = movies[max(start - position, 0):end - position]
+                    if selected:
+                        page_data[user_id] = {"name": user["name"], "movies": dict(selected)}
+                position += count
+        return page_data
+
+    def search_movies(self, query, page=1, per_page=DEFAULT_MOVIES_PER_PAGE):
+        """
+        Full-text search over movie names, directors, actors and plots, with
+        the same matching and ranking as JSONDataManager.search_movies().
+        Only the shards of the movies on the page are read.
+        """
+        with self._lock:
+            self._refresh_manifest()
+            self._sync_indexes()
+            total, matches = self._search_index.search(query, per_page, (page - 1) * per_page)
+            results = [
+                {**self._shard(user_id)["movies"][movie_id], "user_id": user_id, "movie_id": movie_id,
+                 "score": round(score, 3)}
+                for (user_id, movie_id), score in matches
+            ]
+        return {"total": total, "results": results}
+
+    def filter_movies(self, year_from=None, year_to=None, min_rating=None, director=None, user_id=None,
+                      sort=None, descending=True, page=1, per_page=10):
+        """
+        Filters and sorts movies like JSONDataManager.filter_movies(). When
+        user_id is given, only that user's shard is checked for changes.
+        """
+        with self._lock:
+            self._refresh_manifest()
+            if user_id is not None and str(user_id) not in self._users:
+                return {"total": 0, "results": []}
+            self._sync_indexes(None if user_id is None else [str(user_id)])
+            total, keys = self._columns.query(year_from, year_to, min_rating, director, user_id,
+                                              sort, descending, per_page, (page - 1) * per_page)
+            results = [{**self._shard(key[0])["movies"][key[1]], "user_id": key[0], "movie_id": key[1]}
+                       for key in keys]
+        return {"total": total, "results": results}
+
+    def add_user(self, user_name):
+        try:
+            with self._write_transaction():
+                user_id = str(self._last_user_id + 1)
+                write_json_atomic(self._shard_path(user_id), {"id": user_id, "name": user_name, "movies": {}})
+                self._shard_signatures[user_id] = _stat_signature(self._shard_path(user_id))
+                self._users[user_id] = {"name": user_name, "movie_count": 0}
+                self._last_user_id += 1
+                try:
+                    self._save_manifest()
+                except BaseException:
+                    del self._users[user_id]
+                    self._last_user_id -= 1
+                    raise
+                self._bump_version(user_id)
+            return f"User {user_name} added successfully with ID {user_id}"
+        except Exception as e:
+            raise ValueError(f"An error occurred: {e}")
+
+    def _check_new_movie(self, user_id, movie_name):
+        """Returns the user's shard; raises if the user is missing or has the movie already."""
+        shard = self._shard(user_id)
+        if shard is None:
+            raise ValueError(f"Error: User with ID {user_id} not found.")
+        if self._titles[user_id][movie_name.lower()]:
+            raise ValueError(f"Movie {movie_name} is already exist in the user's list")
+        return shard
+
+    def _check_rename(self, user_id, movie, updated_data):
+        """Raises if updated_data renames the movie to another of the user's titles, as add_movie would."""
+        new_name = updated_data.get("name")
+        if not isinstance(new_name, str) or new_name.lower() == str(movie.get("name")).lower():
+            return
+        if self._titles[user_id][new_name.lower()]:
+            raise ValueError(f"Movie {new_name} is already exist in the user's list")
+
+    @staticmethod
+    def _insert_movie(shard, movie):
+        """Stores a new movie in a shard under the next free id and returns the id."""
+        movies = shard.setdefault("movies", {})
+        new_movie_id = max([int(shard.get("last_movie_id", 0))] + [int(movie_id) for movie_id in movies]) + 1
+        # Persisted so that deleting the newest movie cannot free its id
+        shard["last_movie_id"] = new_movie_id
+        movies[str(new_movie_id)] = movie
+        return str(new_movie_id)
+
+    def add_movie(self, user_id, movie_name, director, year, rating, omdb_details=None):
+        """
+        Adds a new movie to a user's list of favorite movies.
+
+        Returns: the id of the new movie.
+        """
+        if movie_name is None:
+            raise ValueError("Movie name cannot be None")
+        user_id = str(user_id)
+
+        # Validate up front so we don't call OMDb for a movie we will reject
+        with self._lock:
+            self._refresh_manifest()
+            self._check_new_movie(user_id, movie_name)
+
+        if self._enrichment is not None:
+            omdb_data = PENDING_DETAILS
+        elif omdb_details is not None:
+            omdb_data = omdb_details
+        else:
+            omdb_data = self._fetch(movie_name)
+
+        with self._write_transaction():
+            # Check again, the data may have changed while OMDb was answering
+            shard = self._copy_shard(self._check_new_movie(user_id, movie_name))
+            new_movie_id = self._insert_movie(shard, {
+                "name": movie_name,
+                "director": director,
+                "year": year,
+                "rating": rating,
+                **omdb_data
+            })
+            self._save_shard(user_id, shard, added=[movie_name])
+
+        if self._enrichment is not None:
+            self._enrichment.submit(user_id, new_movie_id, movie_name)
+        return new_movie_id
+
+    def add_movies(self, user_id, movies, omdb_details=None):
+        """
+        Adds many movies to a user's list with a single shard write.
+
+        Returns:
+            A dict with "added" ({movie_id: name}) and "skipped" (names the
+            user already has, or that appear more than once in movies).
+        """
+        movies = list(movies)
+        if any(not movie.get("name") for movie in movies):
+            raise ValueError("Movie name cannot be None")
+        user_id = str(user_id)
+
+        with self._lock:
+            self._refresh_manifest()
+            if self._shard(user_id) is None:
+                raise ValueError(f"Error: User with ID {user_id} not found.")
+            existing = self._titles[user_id]
+        new_movies, skipped, seen = [], [], set()
+        for movie in movies:
+            key = movie["name"].lower()
+            if existing[key] or key in seen:
+                skipped.append(movie["name"])
+            else:
+                seen.add(key)
+                new_movies.append(movie)
+
+        if self._enrichment is not None:
+            details = {movie["name"]: PENDING_DETAILS for movie in new_movies}
+        else:
+            known = omdb_details or {}
+            details = fetch_many_omdb_movie_details([movie["name"] for movie in new_movies
+                                                     if movie["name"] not in known], fetch=self._fetch)
+            details.update(known)
+
+        added = {}
+        with self._write_transaction():
+            shard = self._shard(user_id)
+            if shard is None:
+                raise ValueError(f"Error: User with ID {user_id} not found.")
+            shard = self._copy_shard(shard)
+            existing = self._titles[user_id]
+            for movie in new_movies:
+                # Added by another request while OMDb was answering
+                if existing[movie["name"].lower()]:
+                    skipped.append(movie["name"])
+                    continue
+                new_movie_id = self._insert_movie(shard, {
+                    "name": movie["name"],
+                    "director": movie.get("director"),
+                    "year": movie.get("year"),
+                    "rating": movie.get("rating"),
+                    **details[movie["name"]]
+                })
+                added[new_movie_id] = movie["name"]
+            if added:
+                self._save_shard(user_id, shard, added=added.values())
+
+        if self._enrichment is not None:
+            for movie_id, name in added.items():
+                self._enrichment.submit(user_id, movie_id, name)
+        return {"added": added, "skipped": skipped}
+
+    def update_movie(self, user_id, movie_id, updated_data):
+        """
+        Updates a movie's fields; only the user's shard is rewritten.
+        """
+        try:
+            with self._write_transaction():
+                shard = self._shard(user_id)
+                if shard is None or str(movie_id) not in shard.get("movies", {}):
+                    return False
+                movie = shard["movies"][str(movie_id)]
+                self._check_rename(str(user_id), movie, updated_data)
+                shard = self._copy_shard(shard)
+                shard["movies"][str(movie_id)] = {**movie, **updated_data}
+                self._save_shard(str(user_id), shard, added=[shard["movies"][str(movie_id)]["name"]],
+                                 removed=[movie["name"]])
+            return True
+        except Exception as e:
+            raise ValueError(f"An error occurred: {e}")
+
+    def delete_movie(self, user_id, movie_id):
+        with self._write_transaction():
+            shard = self._shard(user_id)
+            if shard is None or str(movie_id) not in shard.get("movies", {}):
+                return False
+            shard = self._copy_shard(shard)
+            removed = shard["movies"].pop(str(movie_id))
+            self._save_shard(str(user_id), shard, removed=[removed["name"]])
+        return True
@@ -0,0 +1,624 @@
+import os
+import sqlite3
+import sys
+import threading
+import uuid
+
+from datamanager import serializers
+from datamanager.data_manager_interface import DataManagerInterface
+from datamanager.enrichment import EnrichmentWorker, PENDING_DETAILS
+from datamanager.omdb import fetch_omdb_movie_details, fetch_many_omdb_movie_details
+from datamanager.movie_columns import SORT_COLUMNS
+from datamanager.search_index import tokenize
+
+# Columns of the movies table that update_movie is allowed to change
+MOVIE_FIELDS = ("name", "director", "year", "rating", "poster", "actors", "plot", "enrichment_status")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    -- Highest movie id ever handed out to the user, so ids are never reused
+    last_movie_id INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS movies (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    movie_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    director TEXT,
+    year INTEGER,
+    rating REAL,
+    poster TEXT,
+    actors TEXT,
+    plot TEXT,
+    enrichment_status TEXT,
+    PRIMARY KEY (user_id, movie_id)
+);
+
+-- Serves per-user lookups (user_id is its leading column) and makes the
+-- case-insensitive duplicate check in add_movie an index probe
+CREATE UNIQUE INDEX IF NOT EXISTS idx_movies_user_name ON movies(user_id, lower(name));
+
+-- Title lookups across all users
+CREATE INDEX IF NOT EXISTS idx_movies_name ON movies(lower(name));
+
+-- Range filters and sorts in filter_movies
+CREATE INDEX IF NOT EXISTS idx_movies_year ON movies(year);
+CREATE INDEX IF NOT EXISTS idx_movies_rating ON movies(rating);
+CREATE INDEX IF NOT EXISTS idx_movies_director ON movies(lower(director));
+
+-- Full-text index over the movies table, kept up to date by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+    name, director, actors, plot, content='movies', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+    INSERT INTO movies_fts (rowid, name, director, actors, plot)
+    VALUES (new.rowid, new.name, new.director, new.actors, new.plot);
+END;
+
+CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+    INSERT INTO movies_fts (movies_fts, rowid, name, director, actors, plot)
+    VALUES ('delete', old.rowid, old.name, old.director, old.actors, old.plot);
+END;
+
+CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE ON movies BEGIN
+    INSERT INTO movies_fts (movies_fts, rowid, name, director, actors, plot)
+    VALUES ('delete', old.rowid, old.name, old.director, old.actors, old.plot);
+    INSERT INTO movies_fts (rowid, name, director, actors, plot)
+    VALUES (new.rowid, new.name, new.director, new.actors, new.plot);
+END;
+
+-- Version counters for conditional GETs: scope '*' covers all data, the
+-- other rows one user (by id) and their movies
+CREATE TABLE IF NOT EXISTS data_versions (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    modified_at REAL NOT NULL
+);
+
+-- Facts about the database itself, e.g. the version_token set when it was created
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Unix time with millisecond precision, in SQL
+_SQL_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+
+
+def _version_trigger(table, event, user_id):
+    """Returns a trigger bumping the global and the user's data version."""
+    bumps = "".join(
+        f"""
+    INSERT INTO data_versions (scope, version, modified_at) VALUES ({scope}, 1, {_SQL_NOW})
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1, modified_at = excluded.modified_at;"""
+        for scope in ("'*'", f"CAST({user_id} AS TEXT)"))
+    return f"""
+CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN{bumps}
+END;
+"""
+
+
+SCHEMA += "".join([
+    _version_trigger("movies", "INSERT", "new.user_id"),
+    _version_trigger("movies", "UPDATE", "new.user_id"),
+    _version_trigger("movies", "DELETE", "old.user_id"),
+    _version_trigger("users", "INSERT", "new.id"),
+    _version_trigger("users", "UPDATE", "new.id"),
+    _version_trigger("users", "DELETE", "old.id"),
+])
+
+# bm25() weights of the name, director, actors and plot columns
+FTS_WEIGHTS = "3.0, 2.0, 2.0, 1.0"
+
+
+def _parse_id(value):
+    """Returns a user or movie id as an int, or None if it is not numeric."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SQLiteDataManager(DataManagerInterface):
+    """
+    Stores users and movies in normalized SQLite tables.
+
+    Every thread gets its own connection, opened on first use and reused for
+    the rest of the thread's life. The database runs in WAL mode, so readers
+    are not blocked by a writer.
+    """
+
+    def __init__(self, db_path=None, deferred_enrichment=False, fetch=fetch_omdb_movie_details):
+        """
+        Args:
+            db_path: the SQLite file; defaults to movies.db next to movies.json.
+            deferred_enrichment: if True, add_movie saves the movie at once
+                with pending OMDb fields and a background EnrichmentWorker
+                fills them in later.
+            fetch: the OMDb lookup add_movie and add_movies use, e.g. a stub
+                in benchmarks; defaults to fetch_omdb_movie_details().
+        """
+        self._db_path = db_path or os.path.join(os.path.dirname(self.get_movies_json_path()), 'movies.db')
+        self._local = threading.local()
+        self._fetch = fetch
+        with self._connection() as conn:
+            has_fts = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'movies_fts'").fetchone()
+            conn.executescript(SCHEMA)
+            self._upgrade_schema(conn)
+            if not has_fts:
+                # Index the movies stored before full-text search existed
+                conn.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+            # Prefixed to the version counters, which start over in a recreated
+            # database, so its ETags never match ones handed out for the old one
+            conn.execute("INSERT OR IGNORE INTO metadata (key, value) VALUES ('version_token', ?)",
+                         (uuid.uuid4().hex[:8],))
+            self._version_token = conn.execute(
+                "SELECT value FROM metadata WHERE key = 'version_token'").fetchone()["value"]
+        self._enrichment = EnrichmentWorker(self) if deferred_enrichment else None
+        if self._enrichment is not None:
+            self._enrichment.resume()
+
+    @property
+    def db_path(self):
+        return self._db_path
+
+    def get_movies_json_path(self):
+        # Get the absolute path to the project root directory
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+        # Construct the path to static/movies.json, the source for migrate_from_json()
+        return os.path.join(project_root, 'Movie_WebApi_App', 'static', 'movies.json')
+
+    @staticmethod
+    def _upgrade_schema(conn):
+        """Adds columns introduced after a database was first created."""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(movies)")}
+        if "enrichment_status" not in columns:
+            conn.execute("ALTER TABLE movies ADD COLUMN enrichment_status TEXT")
+        user_columns = {row["name"] for row in conn.execute("PRAGMA table_info(users)")}
+        if "last_movie_id" not in user_columns:
+            conn.execute("ALTER TABLE users ADD COLUMN last_movie_id INTEGER NOT NULL DEFAULT 0")
+            conn.execute("""UPDATE users SET last_movie_id =
+                            (SELECT COALESCE(MAX(movie_id), 0) FROM movies WHERE movies.user_id = users.id)""")
+
+    def _connection(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _movie_to_dict(row):
+        movie = {field: row[field] for field in MOVIE_FIELDS}
+        # Movies that never went through deferred enrichment have no status
+        if movie["enrichment_status"] is None:
+            del movie["enrichment_status"]
+        return movie
+
+    def get_all_users(self):
+        """
+        Retrieves every user with their movies.
+
+        Returns: A dict shaped like movies.json ({user_id: {"id", "name", "movies"}}).
+        """
+        conn = self._connection()
+        users = {}
+        for row in conn.execute("SELECT id, name FROM users ORDER BY id"):
+            user_id = str(row["id"])
+            users[user_id] = {"id": user_id, "name": row["name"], "movies": {}}
+        for row in conn.execute("SELECT * FROM movies ORDER BY user_id, movie_id"):
+            users[str(row["user_id"])]["movies"][str(row["movie_id"])] = self._movie_to_dict(row)
+        return users
+
+    def get_user_movies(self, user_id):
+        """
+        Retrieves all the movies for a given user
+
+        Return all the movies of a specific user
+        """
+        user_id = _parse_id(user_id)
+        if user_id is None:
+            return {}
+        rows = self._connection().execute(
+            "SELECT * FROM movies WHERE user_id = ? ORDER BY movie_id", (user_id,))
+        return {str(row["movie_id"]): self._movie_to_dict(row) for row in rows}
+
+    def get_user(self, user_id):
+        """
+        Retrieves one user with their movies.
+
+        Returns: {"id", "name", "movies"}, or None if there is no such user.
+        """
+        user_id = _parse_id(user_id)
+        if user_id is None:
+            return None
+        conn = self._connection()
+        row = conn.execute("SELECT id, name FROM users WHERE id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        rows = conn.execute("SELECT * FROM movies WHERE user_id = ? ORDER BY movie_id", (user_id,))
+        return {"id": str(row["id"]), "name": row["name"],
+                "movies": {str(movie["movie_id"]): self._movie_to_dict(movie) for movie in rows}}
+
+    def get_data_version(self, user_id=None):
+        """
+        Reads the version counters kept up to date by the data_versions
+        triggers, so changes made by other processes are seen too.
+        """
+        scope = '*' if user_id is None else str(user_id)
+        rows = {row["scope"]: row for row in self._connection().execute(
+            "SELECT scope, version, modified_at FROM data_versions WHERE scope IN ('*', ?)", (scope,))}
+        row = rows.get(scope)
+        if row is None:
+            # Untouched since the table was created; the global time bounds it
+            modified_at = rows["*"]["modified_at"] if "*" in rows else None
+            return f"{self._version_token}-0", modified_at
+        return f"{self._version_token}-{row['version']}", row["modified_at"]
+
+    def iter_user_movies(self, user_id, after=None):
+        """
+        Iterates over a user's movies in id order, fetching rows lazily.
+
+        Yields: (movie_id, movie) pairs, starting after the given movie id.
+        """
+        user_id = _parse_id(user_id)
+        if user_id is None:
+            return
+        rows = self._connection().execute(
+            "SELECT * FROM movies WHERE user_id = ? AND movie_id > ? ORDER BY movie_id",
+            (user_id, after if after is not None else -1))
+        for row in rows:
+            yield str(row["movie_id"]), self._movie_to_dict(row)
+
+    def get_movies_page(self, page, per_page):
+        """
+        Returns one page of movies across all users.
+
+        Returns:
+            A dict shaped like movies.json ({user_id: {"name", "movies"}}),
+            holding only the movies on the requested page.
+        """
+        rows = self._connection().execute(
+            """SELECT movies.*, users.name AS user_name
+               FROM movies JOIN users ON users.id = movies.user_id
+               ORDER BY movies.user_id, movies.movie_id
+               LIMIT ? OFFSET ?""",
+            (per_page, (page - 1) * per_page))
+        page_data = {}
+        for row in rows:
+            user = page_data.setdefault(str(row["user_id"]), {"name": row["user_name"], "movies": {}})
+            user["movies"][str(row["movie_id"])] = self._movie_to_dict(row)
+        return page_data
+
+    def calculate_total_pages(self, movies_per_page):
+        total_movies = self._connection().execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+        return (total_movies + movies_per_page - 1) // movies_per_page
+
+    def search_movies(self, query, page=1, per_page=10):
+        """
+        Full-text search over movie names, directors, actors and plots.
+
+        Every word of the query must match, either exactly or as the start
+        of a word; matches in the name count most.
+
+        Returns:
+            A dict with "total" (number of matching movies) and "results",
+            the movies on the requested page, best match first. Each result
+            is the movie's fields plus user_id, movie_id and score.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return {"total": 0, "results": []}
+        match = " ".join(f'"{term}"*' for term in terms)
+
+        conn = self._connection()
+        total = conn.execute("SELECT COUNT(*) FROM movies_fts WHERE movies_fts MATCH ?", (match,)).fetchone()[0]
+        rows = conn.execute(
+            f"""SELECT movies.*, -bm25(movies_fts, {FTS_WEIGHTS}) AS score
+                FROM movies_fts JOIN movies ON movies.rowid = movies_fts.rowid
+                WHERE movies_fts MATCH ?
+                ORDER BY score DESC
+                LIMIT ? OFFSET ?""",
+            (match, per_page, (page - 1) * per_page))
+        results = [
+            {**self._movie_to_dict(row), "user_id": str(row["user_id"]), "movie_id": str(row["movie_id"]),
+             "score": round(row["score"], 3)}
+            for row in rows
+        ]
+        return {"total": total, "results": results}
+
+    def filter_movies(self, year_from=None, year_to=None, min_rating=None, director=None, user_id=None,
+                      sort=None, descending=True, page=1, per_page=10):
+        """
+        Filters and sorts movies across all users, or within one user.
+
+        Returns:
+            A dict with "total" (number of matching movies) and "results",
+            the movies on the requested page. Each result is the movie's
+            fields plus user_id and movie_id.
+        """
+        if sort is not None and sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort}; use one of {', '.join(SORT_COLUMNS)}")
+
+        conditions, params = [], []
+        if year_from is not None:
+            conditions.append("year >= ?")
+            params.append(year_from)
+        if year_to is not None:
+            conditions.append("year <= ?")
+            params.append(year_to)
+        if min_rating is not None:
+            conditions.append("rating >= ?")
+            params.append(min_rating)
+        if director is not None:
+            conditions.append("lower(director) = lower(?)")
+            params.append(director.strip())
+        if user_id is not None:
+            if _parse_id(user_id) is None:
+                return {"total": 0, "results": []}
+            conditions.append("user_id = ?")
+            params.append(_parse_id(user_id))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        order = "user_id, movie_id"
+        if sort is not None:
+            # Missing values sort last either way
+            order = f"{sort} IS NULL, {sort} {'DESC' if descending else 'ASC'}, {order}"
+
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM movies {where}", params).fetchone()[0]
+        rows = conn.execute(f"SELECT * FROM movies {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                            params + [per_page, (page - 1) * per_page])
+        results = [
+            {**self._movie_to_dict(row), "user_id": str(row["user_id"]), "movie_id": str(row["movie_id"])}
+            for row in rows
+        ]
+        return {"total": total, "results": results}
+
+    def add_user(self, user_name):
+        try:
+            with self._connection() as conn:
+                cursor = conn.execute("INSERT INTO users (name) VALUES (?)", (user_name,))
+            return f"User {user_name} added successfully with ID {cursor.lastrowid}"
+        except Exception as e:
+            raise ValueError(f"An error occurred: {e}")
+
+    def add_movie(self, user_id, movie_name, director, year, rating, omdb_details=None):
+        """
+        Adds a new movie to a user's list of favorite movies.
+
+        Raises ValueError if the user does not exist or already has a movie
+        with the same name (case-insensitive).
+
+        Returns: the id of the new movie.
+        """
+        if movie_name is None:
+            raise ValueError("Movie name cannot be None")
+
+        conn = self._connection()
+        if not self._user_exists(conn, user_id):
+            raise ValueError(f"Error: User with ID {user_id} not found.")
+        if self._has_movie(conn, user_id, movie_name):
+            raise ValueError(f"Movie {movie_name} is already exist in the user's list")
+
+        if self._enrichment is not None:
+            # Save right away; the enrichment worker fills in the details
+            omdb_data = PENDING_DETAILS
+        elif omdb_details is not None:
+            omdb_data = omdb_details
+        else:
+            # Fetch additional movie info from OMDB API, outside of the write transaction
+            omdb_data = self._fetch(movie_name)
+
+        try:
+            with conn:
+                new_movie_id = self._reserve_movie_ids(conn, user_id, 1)
+                if new_movie_id is None:
+                    raise ValueError(f"Error: User with ID {user_id} not found.")
+                conn.execute(
+                    """INSERT INTO movies (user_id, movie_id, name, director, year, rating, poster, actors, plot,
+                                           enrichment_status)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (int(user_id), new_movie_id, movie_name, director, year, rating, omdb_data["poster"],
+                     omdb_data["actors"], omdb_data["plot"], omdb_data.get("enrichment_status")))
+                new_movie_id = str(new_movie_id)
+        except sqlite3.IntegrityError:
+            # Another request added the same title while OMDb was answering
+            raise ValueError(f"Movie {movie_name} is already exist in the user's list")
+
+        if self._enrichment is not None:
+            self._enrichment.submit(user_id, new_movie_id, movie_name)
+        return new_movie_id
+
+    def add_movies(self, user_id, movies, omdb_details=None):
+        """
+        Adds many movies to a user's list in one transaction.
+
+        Returns:
+            A dict with "added" ({movie_id: name}) and "skipped" (names the
+            user already has, or that appear more than once in movies).
+        """
+        movies = list(movies)
+        if any(not movie.get("name") for movie in movies):
+            raise ValueError("Movie name cannot be None")
+
+        conn = self._connection()
+        if not self._user_exists(conn, user_id):
+            raise ValueError(f"Error: User with ID {user_id} not found.")
+        existing = {row[0] for row in conn.execute(
+            "SELECT lower(name) FROM movies WHERE user_id = ?", (int(user_id),))}
+
+        # Dedupe against the user's list and within the batch in one pass
+        new_movies, skipped = [], []
+        for movie in movies:
+            key = movie["name"].lower()
+            if key in existing:
+                skipped.append(movie["name"])
+            else:
+                existing.add(key)
+                new_movies.append(movie)
+
+        if self._enrichment is not None:
+            details = {movie["name"]: PENDING_DETAILS for movie in new_movies}
+        else:
+            # Look the remaining titles up in parallel, outside of the write transaction
+            known = omdb_details or {}
+            details = fetch_many_omdb_movie_details([movie["name"] for movie in new_movies
+                                                     if movie["name"] not in known], fetch=self._fetch)
+            details.update(known)
+
+        added = {}
+        try:
+            with conn:
+                next_id = self._reserve_movie_ids(conn, user_id, len(new_movies))
+                rows = []
+                for offset, movie in enumerate(new_movies):
+                    omdb_data = details[movie["name"]]
+                    rows.append((int(user_id), next_id + offset, movie["name"], movie.get("director"),
+                                 movie.get("year"), movie.get("rating"), omdb_data["poster"], omdb_data["actors"],
+                                 omdb_data["plot"], omdb_data.get("enrichment_status")))
+                    added[str(next_id + offset)] = movie["name"]
+                conn.executemany(
+                    """INSERT INTO movies (user_id, movie_id, name, director, year, rating, poster, actors, plot,
+                                           enrichment_status)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    rows)
+        except sqlite3.IntegrityError:
+            # Another request added one of the titles while OMDb was answering
+            raise ValueError("Some of the movies were added to the user's list concurrently, please retry")
+
+        if self._enrichment is not None:
+            for movie_id, name in added.items():
+                self._enrichment.submit(user_id, movie_id, name)
+        return {"added": added, "skipped": skipped}
+
+    @staticmethod
+    def _user_exists(conn, user_id):
+        user_id = _parse_id(user_id)
+        if user_id is None:
+            return False
+        return conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone() is not None
+
+    @staticmethod
+    def _reserve_movie_ids(conn, user_id, count):
+        """
+        Hands out count new movie ids for a user by advancing their
+        last_movie_id; the caller runs this inside its write transaction.
+
+        Returns: the first of the new ids, or None if there is no such user.
+        """
+        conn.execute("UPDATE users SET last_movie_id = last_movie_id + ? WHERE id = ?", (count, int(user_id)))
+        row = conn.execute("SELECT last_movie_id FROM users WHERE id = ?", (int(user_id),)).fetchone()
+        return None if row is None else row["last_movie_id"] - count + 1
+
+    @staticmethod
+    def _has_movie(conn, user_id, movie_name):
+        row = conn.execute("SELECT 1 FROM movies WHERE user_id = ? AND lower(name) = lower(?)",
+                           (int(user_id), movie_name)).fetchone()
+        return row is not None
+
+    def update_movie(self, user_id, movie_id, updated_data):
+        """
+        updated the user movie information
+        """
+        user_id, movie_id = _parse_id(user_id), _parse_id(movie_id)
+        if user_id is None or movie_id is None:
+            return False
+        try:
+            fields = [field for field in updated_data if field in MOVIE_FIELDS]
+            conn = self._connection()
+            with conn:
+                if not fields:
+                    row = conn.execute("SELECT 1 FROM movies WHERE user_id = ? AND movie_id = ?",
+                                       (user_id, movie_id)).fetchone()
+                    return row is not None
+                assignments = ", ".join(f"{field} = ?" for field in fields)
+                try:
+                    cursor = conn.execute(
+                        f"UPDATE movies SET {assignments} WHERE user_id = ? AND movie_id = ?",
+                        [updated_data[field] for field in fields] + [user_id, movie_id])
+                except sqlite3.IntegrityError:
+                    # idx_movies_user_name: renamed to another of the user's titles
+                    raise ValueError(f"Movie {updated_data.get('name')} is already exist in the user's list")
+            return cursor.rowcount > 0
+        except Exception as e:
+            raise ValueError(f"An error occurred: {e}")
+
+    def delete_movie(self, user_id, movie_id):
+        user_id, movie_id = _parse_id(user_id), _parse_id(movie_id)
+        if user_id is None or movie_id is None:
+            return False
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM movies WHERE user_id = ? AND movie_id = ?",
+                                  (user_id, movie_id))
+        return cursor.rowcount > 0
+
+    def migrate_from_json(self, json_path=None):
+        """
+        Copies every user and movie from a movies.json file into the database.
+
+        Existing rows with the same ids are overwritten, so the migration can
+        be re-run safely. A movie whose title matches another of the user's
+        titles apart from case is skipped and reported, as titles are unique
+        per user here.
+
+        Returns: a (users, movies) tuple with the number of rows copied.
+        """
+        # movies.json may be in any snapshot format JSONDataManager writes
+        with open(json_path or self.get_movies_json_path(), 'rb') as fileobj:
+            data = serializers.loads(fileobj.read())
+
+        user_rows = []
+        movie_rows = []
+        for user_id, user in data.items():
+            # Keeps ids freed by deletions in movies.json from being reused
+            last_movie_id = max([int(user.get("last_movie_id", 0))] +
+                                [int(movie_id) for movie_id in user.get("movies", {})])
+            user_rows.append((int(user_id), user.get("name"), last_movie_id))
+            for movie_id, movie in user.get("movies", {}).items():
+                movie_rows.append((int(user_id), int(movie_id)) + tuple(movie.get(field) for field in MOVIE_FIELDS))
+
+        with self._connection() as conn:
+            conn.executemany(
+                """INSERT INTO users (id, name, last_movie_id) VALUES (?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET name = excluded.name,
+                       last_movie_id = max(last_movie_id, excluded.last_movie_id)""",
+                user_rows)
+            # An upsert rather than INSERT OR REPLACE, so the full-text triggers
+            # fire; one row at a time, so a duplicate title skips just its row
+            skipped = 0
+            for row in movie_rows:
+                try:
+                    conn.execute(
+                        """INSERT INTO movies
+                           (user_id, movie_id, name, director, year, rating, poster, actors, plot,
+                            enrichment_status)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                           ON CONFLICT(user_id, movie_id) DO UPDATE SET
+                               name = excluded.name, director = excluded.director, year = excluded.year,
+                               rating = excluded.rating, poster = excluded.poster, actors = excluded.actors,
+                               plot = excluded.plot, enrichment_status = excluded.enrichment_status""",
+                        row)
+                except sqlite3.IntegrityError:
+                    print(f"Skipping movie {row[1]} of user {row[0]}: "
+                          f"{row[2]!r} duplicates another of the user's titles")
+                    skipped += 1
+        return len(user_rows), len(movie_rows) - skipped
+
+
+if __name__ == '__main__':
+    # Usage: python -m datamanager.sqlite_data_manager [movies.json] [movies.db]
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    target = sys.argv[2] if len(sys.argv) > 2 else None
+    users_copied, movies_copied = SQLiteDataManager(target).migrate_from_json(source)
+    print(f"Migrated {users_copied} users and {movies_copied} movies")
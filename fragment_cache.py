@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+
+# Number of rendered fragments kept
+DEFAULT_MAX_ENTRIES = 512
+
+
+class FragmentCache:
+    """
+    Bounded LRU cache of rendered HTML.
+
+    Keys include the data version the fragment was rendered from (see
+    get_data_version() on the data managers), so a mutation never has to
+    delete anything: it bumps the version, later lookups use the new key,
+    and the stale fragments age out of the cache.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self._max_entries = max_entries
+        # key -> rendered HTML
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_render(self, key, render):
+        """
+        Returns the fragment cached under key, calling render() to build
+        and store it on a miss. With max_entries=0 nothing is cached.
+        """
+        html = self._get(key)
+        if html is None:
+            # Rendered outside the lock; two threads missing the same key both
+            # render it, which is cheaper than making every lookup wait
+            html = render()
+            self._put(key, html)
+        return html
+
+    async def get_or_render_async(self, key, render):
+        """get_or_render() for the async app, where render() is a coroutine function."""
+        html = self._get(key)
+        if html is None:
+            html = await render()
+            self._put(key, html)
+        return html
+
+    def _get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        return None
+
+    def _put(self, key, html):
+        if self._max_entries > 0:
+            with self._lock:
+                self._entries[key] = html
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,159 @@
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Milliseconds between two stack samples of a slow request
+DEFAULT_INTERVAL_MS = 5
+
+# Number of slow request profiles kept
+DEFAULT_MAX_PROFILES = 20
+
+# Deepest stack recorded per sample
+MAX_STACK_DEPTH = 128
+
+
+class SlowRequestProfiler:
+    """
+    WSGI middleware that records a sampled stack profile of slow requests.
+
+    Every request registers its thread on the way in and unregisters once
+    the server closes its response body, so the time spent producing a
+    streamed body counts too; nothing else happens on the request's own
+    thread. A background thread samples the stacks of the requests that
+    have been running for longer than sample_after_ms (half the threshold
+    by default), and a request that ends up taking longer than threshold_ms
+    keeps its samples as a profile. The last max_profiles profiles are kept
+    in a ring buffer. While no request is in flight the sampler thread
+    sleeps on an event instead of waking up every interval.
+
+    Profiles are in the collapsed stack format ("outer;inner;leaf count"
+    per line) that flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, app, threshold_ms, interval_ms=DEFAULT_INTERVAL_MS, max_profiles=DEFAULT_MAX_PROFILES,
+                 sample_after_ms=None):
+        self._app = app
+        self._threshold = threshold_ms / 1000
+        self._interval = interval_ms / 1000
+        self._sample_after = (threshold_ms / 2 if sample_after_ms is None else sample_after_ms) / 1000
+        # thread id -> the request running on it; _busy is set while it is
+        # not empty, both guarded by _active_lock
+        self._active = {}
+        self._busy = threading.Event()
+        self._active_lock = threading.Lock()
+        self._profiles = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._sampler = threading.Thread(target=self._sample_forever, name='slow-request-sampler', daemon=True)
+        self._sampler.start()
+
+    def __call__(self, environ, start_response):
+        thread_id = threading.get_ident()
+        request = {
+            "method": environ.get('REQUEST_METHOD'),
+            "path": environ.get('PATH_INFO', ''),
+            "query": environ.get('QUERY_STRING', ''),
+            "start": time.perf_counter(),
+            "stacks": Counter(),
+        }
+        with self._active_lock:
+            self._active[thread_id] = request
+            self._busy.set()
+        try:
+            body = self._app(environ, start_response)
+        except BaseException:
+            self._finish(thread_id, request)
+            raise
+        return _ProfiledBody(body, lambda: self._finish(thread_id, request))
+
+    def _finish(self, thread_id, request):
+        """Unregisters a request and keeps its profile if it was slow."""
+        with self._active_lock:
+            if self._active.get(thread_id) is request:
+                del self._active[thread_id]
+            if not self._active:
+                self._busy.clear()
+        duration = time.perf_counter() - request["start"]
+        if duration >= self._threshold:
+            self._keep(request, duration)
+
+    def _keep(self, request, duration):
+        with self._lock:
+            self._profiles.append({
+                "id": next(self._ids),
+                "method": request["method"],
+                "path": request["path"],
+                "query": request["query"],
+                "finished_at": time.time(),
+                "duration_ms": round(duration * 1000, 1),
+                "samples": sum(request["stacks"].values()),
+                "interval_ms": self._interval * 1000,
+                "stacks": request["stacks"],
+            })
+
+    def _sample_forever(self):
+        while True:
+            self._busy.wait()
+            time.sleep(self._interval)
+            now = time.perf_counter()
+            with self._active_lock:
+                active = list(self._active.items())
+            slow = {thread_id: request for thread_id, request in active
+                    if now - request["start"] >= self._sample_after}
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            stacks = {thread_id: self._collapse(frames[thread_id]) for thread_id in slow if thread_id in frames}
+            del frames
+            # Under the lock, so a request being kept is not counted into at the same time
+            with self._lock:
+                for thread_id, stack in stacks.items():
+                    slow[thread_id]["stacks"][stack] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        """Returns a frame's stack as "outer;...;inner", one file:function:line per frame."""
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append(f"{code.co_filename}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def profiles(self):
+        """Returns a summary of each kept profile, newest first."""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [{key: value for key, value in profile.items() if key != "stacks"} for profile in reversed(profiles)]
+
+    def collapsed(self, profile_id):
+        """Returns a kept profile in the collapsed stack format, or None if it is gone."""
+        with self._lock:
+            profile = next((profile for profile in self._profiles if profile["id"] == profile_id), None)
+            if profile is None:
+                return None
+            stacks = profile["stacks"].most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+
+class _ProfiledBody:
+    """Passes a WSGI response body through and calls finish once the server closes it."""
+
+    def __init__(self, body, finish):
+        self._body = body
+        self._finish = finish
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            close = getattr(self._body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            finish, self._finish = self._finish, None
+            if finish is not None:
+                finish()
@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Records how long each phase of a worker's startup took."""
+
+    def __init__(self, started_at=None):
+        self._started_at = time.perf_counter() if started_at is None else started_at
+        # phase name -> duration in milliseconds, in the order the phases ended
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._phases[name] = round(seconds * 1000, 1)
+
+    def report(self):
+        """Returns the duration of each phase and the time since startup began, in milliseconds."""
+        with self._lock:
+            phases = dict(self._phases)
+        return {"phases_ms": phases, "uptime_ms": round((time.perf_counter() - self._started_at) * 1000, 1)}
+
+    def summary(self):
+        return ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.report()["phases_ms"].items())
+
+
+class LazyDataManager:
+    """
+    Stands in for a data manager that is only built on first use.
+
+    Building one may mean parsing all of movies.json, so a new worker
+    creates this placeholder instead and can answer health checks at once.
+    The manager is built by the first request that needs it, or ahead of
+    time by load() from a warm-up thread; callers arriving meanwhile wait
+    for that one build. Attribute access is then forwarded to the manager.
+    on_load, if given, is called with the manager once it has been built.
+    """
+
+    def __init__(self, factory, on_load=None):
+        self._factory = factory
+        self._on_load = on_load
+        self._manager = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._manager is not None
+
+    def load(self):
+        """Builds the manager if that has not happened yet, and returns it."""
+        manager = self._manager
+        if manager is None:
+            with self._lock:
+                if self._manager is None:
+                    self._manager = self._factory()
+                    if self._on_load is not None:
+                        self._on_load(self._manager)
+                manager = self._manager
+        return manager
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
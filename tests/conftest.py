@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from tests.omdb_stub import StubOMDbServer
+
+STATIC_MOVIES_JSON = os.path.join(os.path.dirname(__file__), '..', 'static', 'movies.json')
+
+# Started before any test module imports datamanager.omdb, which reads
+# OMDB_BASE_URL and OMDB_CACHE_PATH once at import time
+stub_omdb = StubOMDbServer().start()
+os.environ['OMDB_BASE_URL'] = stub_omdb.url
+os.environ['OMDB_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(), 'omdb_cache.db')
+# Tests that need the admin endpoints set their own token
+os.environ.pop('MOVIES_ADMIN_TOKEN', None)
+
+
+@pytest.fixture
+def omdb_stub():
+    stub_omdb.reset()
+    yield stub_omdb
+    stub_omdb.reset()
+
+
+@pytest.fixture
+def movies_json(tmp_path):
+    """A copy of static/movies.json that a test may change."""
+    path = tmp_path / 'movies.json'
+    shutil.copy(STATIC_MOVIES_JSON, path)
+    return str(path)
+
+
+def manager_class(base, json_path):
+    """base with its movies.json (and what it derives from it) moved to json_path."""
+
+    class TestDataManager(base):
+        def get_movies_json_path(self):
+            return json_path
+
+    return TestDataManager
+
+
+@pytest.fixture
+def make_json_manager(movies_json):
+    """Builds JSONDataManagers on the test's copy of movies.json."""
+    from datamanager.json_data_manager import JSONDataManager
+
+    return lambda **kwargs: manager_class(JSONDataManager, movies_json)(**kwargs)
+
+
+@pytest.fixture(params=['json', 'sqlite', 'sharded'])
+def any_manager(request, movies_json, tmp_path):
+    """A data manager of each backend, holding the test's copy of movies.json."""
+    from datamanager.json_data_manager import JSONDataManager
+    from datamanager.sharded_json_data_manager import ShardedJSONDataManager
+    from datamanager.sqlite_data_manager import SQLiteDataManager
+
+    if request.param == 'json':
+        return manager_class(JSONDataManager, movies_json)()
+    if request.param == 'sharded':
+        return manager_class(ShardedJSONDataManager, movies_json)(str(tmp_path / 'shards'))
+    manager = SQLiteDataManager(str(tmp_path / 'movies.db'))
+    manager.migrate_from_json(movies_json)
+    return manager
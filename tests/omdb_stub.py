@@ -0,0 +1,79 @@
+"""A local stand-in for the OMDB API, so tests never reach omdbapi.com."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubOMDbServer:
+    """
+    Answers OMDb lookups on a free local port.
+
+    Titles starting with "Unknown" get OMDb's "Movie not found!" answer and
+    every other title gets made-up details. failures makes the next that
+    many requests answer fail_status instead, and delay holds every answer
+    back by that many seconds. requests lists the titles asked for.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.failures = 0
+        self.fail_status = 503
+        self.delay = 0
+        self.answer = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}/"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def reset(self):
+        with self._lock:
+            self.requests = []
+            self.failures = 0
+            self.fail_status = 503
+            self.delay = 0
+            self.answer = None
+
+    def _respond(self, title):
+        with self._lock:
+            self.requests.append(title)
+            if self.failures > 0:
+                self.failures -= 1
+                return self.fail_status, {}
+        if self.answer is not None:
+            return 200, self.answer
+        if title.startswith("Unknown"):
+            return 200, {"Response": "False", "Error": "Movie not found!"}
+        return 200, {"Response": "True", "Poster": f"poster-{title}", "Actors": "Some Actor",
+                     "Plot": f"The plot of {title}."}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                title = parse_qs(urlparse(self.path).query).get("t", [""])[0]
+                status, answer = stub._respond(title)
+                time.sleep(stub.delay)
+                body = json.dumps(answer).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except ConnectionError:
+                    # The client gave up waiting, e.g. after a read timeout
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
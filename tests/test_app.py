@@ -0,0 +1,214 @@
+import re
+import threading
+
+import pytest
+
+import app as web_app
+
+
+@pytest.fixture
+def manager(make_json_manager, monkeypatch):
+    manager = make_json_manager()
+    monkeypatch.setattr(web_app, 'data_manager', manager)
+    return manager
+
+
+@pytest.fixture
+def client(manager):
+    web_app.app.config['TESTING'] = True
+    # Streamed bodies are read in full with buffered=True, so their request
+    # context is closed before the next request starts
+    return web_app.app.test_client()
+
+
+def page_links(response):
+    return re.findall(r'class="page-link" href="[^"]*">([^<]+)<', response.get_data(as_text=True))
+
+
+def test_index_renders_a_window_of_page_links(client):
+    # 48 movies, 2 per page
+    assert page_links(client.get('/?page=12&per_page=2')) == ['&laquo;', '1', '10', '11', '12', '13', '14', '24',
+                                                              '&raquo;']
+    assert page_links(client.get('/?page=1&per_page=2')) == ['1', '2', '3', '24', '&raquo;']
+    assert page_links(client.get('/?page=24&per_page=2')) == ['&laquo;', '1', '22', '23', '24']
+
+
+@pytest.mark.parametrize('movie', [
+    {"name": 5, "year": 2001, "rating": 7},
+    {"name": "", "year": 2001, "rating": 7},
+    {"name": "Typed Director", "director": ["a"], "year": 2001, "rating": 7},
+    {"name": "Typed Year", "year": {"a": 1}, "rating": 7},
+    {"name": "Typed Rating", "year": 2001, "rating": True},
+    {"name": "Missing Rating", "year": 2001},
+    "not an object",
+])
+def test_bulk_import_rejects_badly_typed_movies(client, manager, movie):
+    before = manager.get_user_movies('1')
+    response = client.post('/users/1/add_movies', json=[{"name": "Valid One", "year": 2001, "rating": 7}, movie])
+    assert response.status_code == 400
+    assert manager.get_user_movies('1') == before
+
+
+def test_bulk_import(client, manager, omdb_stub):
+    response = client.post('/users/1/add_movies', json=[
+        {"name": "Bulk Import One", "year": "2001", "rating": 7},
+        {"name": "Bulk Import Two", "director": "Someone", "year": 2002, "rating": "8.5"},
+    ])
+    assert response.status_code == 201
+    added = response.get_json()['added']
+    assert sorted(added.values()) == ['Bulk Import One', 'Bulk Import Two']
+    movies = manager.get_user_movies('1')
+    for movie_id, name in added.items():
+        assert movies[movie_id]['poster'] == f'poster-{name}'
+
+
+def test_bulk_import_skips_titles_the_user_has(client, manager, omdb_stub):
+    existing = next(iter(manager.get_user_movies('1').values()))['name']
+    response = client.post('/users/1/add_movies', json=[
+        {"name": existing.upper(), "year": 2001, "rating": 7},
+        {"name": "Bulk Import New", "year": 2001, "rating": 7},
+    ])
+    assert response.status_code == 201
+    assert response.get_json()['skipped'] == [existing.upper()]
+    assert omdb_stub.requests == ['Bulk Import New']
+
+
+def test_bulk_import_as_ndjson(client, manager, omdb_stub):
+    body = b'{"name": "Streamed One", "year": 2001, "rating": 7}\n\n{"name": "Streamed Two", "year": 2001, "rating": 7}\n'
+    response = client.post('/users/1/add_movies', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 201
+    assert len(response.get_json()['added']) == 2
+
+
+def test_search(client):
+    found = client.get('/search?q=avatar+cameron&format=json').get_json()
+    assert [result['name'] for result in found['results']] == ['Avatar']
+    assert found['total'] == 1
+
+    html = client.get('/search?q=the&per_page=1&page=3')
+    assert html.status_code == 200
+    assert page_links(html)[:3] == ['&laquo;', '1', '2']
+
+
+def test_movies_by_user_follows_cursors(client, manager):
+    ids = []
+    url = '/movies_by_user/1?limit=2'
+    while url:
+        response = client.get(url, buffered=True)
+        assert response.status_code == 200
+        ids += list(response.get_json())
+        url = response.headers.get('Link', '').partition('>')[0].lstrip('<') or None
+        assert (url is None) == ('X-Next-Cursor' not in response.headers)
+    assert ids == list(manager.get_user_movies('1'))
+
+
+def test_movies_by_user_as_ndjson(client, manager):
+    response = client.get('/movies_by_user/1?format=ndjson&limit=1', buffered=True)
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(response.get_data(as_text=True).splitlines()) == 1
+    assert 'format=ndjson' in response.headers['Link']
+
+
+@pytest.mark.parametrize('query', ['cursor=%%%', 'cursor=YWJj', 'limit=0'])
+def test_movies_by_user_rejects_bad_cursors(client, query):
+    response = client.get(f'/movies_by_user/1?{query}', buffered=True)
+    assert response.status_code == 400
+
+
+def test_unchanged_pages_answer_304(client, manager):
+    first = client.get('/users/1/movies', buffered=True)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    assert client.get('/users/1/movies', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/users/1/movies', headers={'If-Modified-Since': first.headers['Last-Modified']}
+                      ).status_code == 304
+
+    # Another user's change leaves this user's page alone, but not the user list
+    users_etag = client.get('/users').headers['ETag']
+    manager.add_movie('2', 'A Conditional Movie', 'Someone', 2001, 7.0)
+    assert client.get('/users/1/movies', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/users', headers={'If-None-Match': users_etag}).status_code == 200
+
+    manager.add_movie('1', 'A Conditional Movie', 'Someone', 2001, 7.0)
+    assert client.get('/users/1/movies', headers={'If-None-Match': etag}, buffered=True).status_code == 200
+
+
+def test_ndjson_has_its_own_etag(client):
+    as_json = client.get('/movies_by_user/1', buffered=True)
+    as_ndjson = client.get('/movies_by_user/1', headers={'Accept': 'application/x-ndjson'}, buffered=True)
+    assert as_json.headers['ETag'] != as_ndjson.headers['ETag']
+    assert 'Accept' in as_ndjson.headers['Vary']
+    assert client.get('/movies_by_user/1', headers={'If-None-Match': as_json.headers['ETag'],
+                                                    'Accept': 'application/x-ndjson'},
+                      buffered=True).status_code == 200
+
+
+def test_rendered_fragments_follow_the_data(client, manager):
+    web_app.fragment_cache.clear()
+    assert 'A Cached Movie' not in client.get('/users/1/movies').get_data(as_text=True)
+    hits = web_app.fragment_cache.hits
+    client.get('/users/1/movies')
+    assert web_app.fragment_cache.hits == hits + 1
+
+    manager.add_movie('1', 'A Cached Movie', 'Someone', 2001, 7.0)
+    assert 'A Cached Movie' in client.get('/users/1/movies').get_data(as_text=True)
+
+
+def test_metrics_need_the_admin_token(client, monkeypatch):
+    assert client.get('/metrics').status_code == 404
+    monkeypatch.setenv('MOVIES_ADMIN_TOKEN', 'secret')
+    assert client.get('/metrics').status_code == 404
+    assert client.get('/metrics', headers={'X-Admin-Token': 'wrong'}).status_code == 404
+    client.get('/users')
+    response = client.get('/metrics', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert 'movies_http_request_duration_seconds' in response.get_data(as_text=True)
+    assert client.get('/metrics?token=secret').status_code == 200
+
+
+def test_profiles_are_admin_only(client, monkeypatch):
+    from profiling import SlowRequestProfiler
+
+    profiler = SlowRequestProfiler(web_app.app.wsgi_app, threshold_ms=0)
+    monkeypatch.setattr(web_app, 'slow_request_profiler', profiler)
+    monkeypatch.setattr(web_app.app, 'wsgi_app', profiler)
+
+    def get(url, **kwargs):
+        # A request is sampled until the server closes its body, which
+        # buffered=True does before returning
+        return client.get(url, buffered=True, **kwargs)
+
+    get('/users')
+    assert get('/admin/profiles').status_code == 404
+
+    monkeypatch.setenv('MOVIES_ADMIN_TOKEN', 'secret')
+    admin = {'X-Admin-Token': 'secret'}
+    profiles = get('/admin/profiles', headers=admin).get_json()['profiles']
+    users = next(profile for profile in profiles if profile['path'] == '/users')
+    response = get(f"/admin/profiles/{users['id']}", headers=admin)
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    assert get('/admin/profiles/999', headers=admin).status_code == 404
+    assert not profiler._active
+
+
+def test_readyz_waits_for_the_warm_up(make_json_manager, monkeypatch):
+    from startup import LazyDataManager
+
+    monkeypatch.setattr(web_app, 'warm_up_done', threading.Event())
+    monkeypatch.setattr(web_app, '_warm_up_thread', None)
+    monkeypatch.setattr(web_app, 'data_manager',
+                        LazyDataManager(make_json_manager, on_load=lambda manager: web_app.warm_up_done.set()))
+    client = web_app.app.test_client()
+    assert client.get('/healthz').get_json()['data_loaded'] is False
+    # The first check starts the warm-up
+    assert client.get('/readyz').status_code == 503
+    web_app._warm_up_thread.join(10)
+    assert client.get('/readyz').get_json() == {"status": "ready"}
+    assert client.get('/healthz').get_json()['data_loaded'] is True
+
+
+def test_create_app_can_skip_the_warm_up(monkeypatch):
+    monkeypatch.setattr(web_app, 'warm_up_done', threading.Event())
+    monkeypatch.setenv('MOVIES_WARM_UP', '0')
+    assert web_app.create_app() is web_app.app
+    assert web_app.warm_up_done.is_set()
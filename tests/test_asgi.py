@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+pytest.importorskip('quart')
+
+import app as sync_app
+import asgi
+from datamanager.async_data_manager import AsyncDataManager
+from tests.test_async_data_manager import run
+
+
+@pytest.fixture
+def manager(make_json_manager, monkeypatch):
+    manager = make_json_manager()
+    async_manager = AsyncDataManager(manager, max_workers=2)
+    monkeypatch.setattr(sync_app, 'data_manager', manager)
+    monkeypatch.setattr(asgi, 'data_manager', async_manager)
+    yield manager
+    async_manager.shutdown()
+
+
+def get(url, **kwargs):
+    async def body():
+        response = await asgi.app.test_client().get(url, **kwargs)
+        return response, await response.get_data()
+
+    return run(body)
+
+
+def test_pages_render(manager):
+    for url in ('/', '/users', '/list_of_users', '/users/1/movies', '/movies?min_rating=8', '/search?q=avatar'):
+        response, _ = get(url)
+        assert response.status_code == 200, url
+
+
+def test_unchanged_pages_answer_304(manager):
+    response, _ = get('/users/1/movies')
+    etag = response.headers['ETag']
+    assert get('/users/1/movies', headers={'If-None-Match': etag})[0].status_code == 304
+    manager.add_movie('1', 'An Async Conditional Movie', 'Someone', 2001, 7.0)
+    assert get('/users/1/movies', headers={'If-None-Match': etag})[0].status_code == 200
+
+
+def test_movies_by_user_follows_cursors(manager):
+    ids = []
+    url = '/movies_by_user/1?limit=2'
+    while url:
+        response, body = get(url)
+        ids += list(json.loads(body))
+        url = response.headers.get('Link', '').partition('>')[0].lstrip('<') or None
+    assert ids == list(manager.get_user_movies('1'))
+    assert get('/movies_by_user/1?cursor=%%%')[0].status_code == 400
+
+
+def test_add_movie_and_add_movies(manager, omdb_stub):
+    async def body():
+        client = asgi.app.test_client()
+        one = await client.post('/users/1/add_movie', json={"name": "ASGI Movie", "year": 2001, "rating": 7})
+        many = await client.post('/users/1/add_movies', json=[{"name": "ASGI Bulk", "year": 2001, "rating": 7},
+                                                                {"name": "asgi movie", "year": 2001, "rating": 7}])
+        duplicate = await client.post('/users/1/add_movie', json={"name": "ASGI MOVIE", "year": 2001, "rating": 7})
+        return (one.status_code, await one.get_json(), many.status_code, await many.get_json(),
+                duplicate.status_code)
+
+    one_status, one, many_status, many, duplicate_status = run(body)
+    assert one_status == 200 and manager.get_user_movies('1')[one['movie_id']]['poster'] == 'poster-ASGI Movie'
+    assert many_status == 201 and list(many['added'].values()) == ['ASGI Bulk'] and many['skipped'] == ['asgi movie']
+    assert duplicate_status == 400
+    assert omdb_stub.requests == ['ASGI Movie', 'ASGI Bulk']
+
+
+def test_admin_endpoints_need_the_token(manager, monkeypatch):
+    assert get('/metrics')[0].status_code == 404
+    monkeypatch.setenv('MOVIES_ADMIN_TOKEN', 'secret')
+    response, body = get('/metrics', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200 and b'movies_http_request_duration_seconds' in body
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from datamanager.async_data_manager import AsyncDataManager
+from datamanager.omdb import close_async_omdb_client
+
+
+def run(coroutine_function):
+    """Runs a test body on a fresh event loop, closing the async OMDb client it used."""
+    async def body():
+        try:
+            return await coroutine_function()
+        finally:
+            await close_async_omdb_client()
+
+    return asyncio.run(body())
+
+
+@pytest.fixture
+def title(request):
+    """Makes titles unique per backend, as OMDb answers are cached across tests."""
+    return lambda name: f"{name} {request.node.callspec.id}"
+
+
+@pytest.fixture
+def async_manager(any_manager):
+    manager = AsyncDataManager(any_manager, max_workers=2)
+    yield manager
+    manager.shutdown()
+
+
+def test_add_movie_prefetches_the_details(async_manager, omdb_stub, title):
+    movie_id = run(lambda: async_manager.add_movie('1', title('Async Prefetched'), 'Someone', 2001, 7.0))
+    assert omdb_stub.requests == [title('Async Prefetched')]
+    movie = async_manager.data_manager.get_user_movies('1')[movie_id]
+    assert movie['poster'] == f"poster-{title('Async Prefetched')}"
+
+
+def test_rejected_movies_are_not_looked_up(async_manager, omdb_stub):
+    existing = next(iter(async_manager.data_manager.get_user_movies('1').values()))['name']
+    with pytest.raises(ValueError):
+        run(lambda: async_manager.add_movie('1', existing.lower(), 'Someone', 2001, 7.0))
+    with pytest.raises(ValueError):
+        run(lambda: async_manager.add_movie('999', 'Async Nobody', 'Someone', 2001, 7.0))
+    with pytest.raises(ValueError):
+        run(lambda: async_manager.add_movies('999', [{"name": "Async Nobody Either"}]))
+    assert omdb_stub.requests == []
+
+
+def test_add_movies_looks_up_only_new_titles(async_manager, omdb_stub, title):
+    existing = next(iter(async_manager.data_manager.get_user_movies('1').values()))['name']
+    result = run(lambda: async_manager.add_movies('1', [
+        {"name": existing.upper(), "year": 2001, "rating": 7.0},
+        {"name": title("Async Bulk One"), "year": 2001, "rating": 7.0},
+        {"name": title("Async Bulk One").lower(), "year": 2001, "rating": 7.0},
+    ]))
+    assert list(result['added'].values()) == [title('Async Bulk One')]
+    assert sorted(result['skipped']) == sorted([existing.upper(), title('Async Bulk One').lower()])
+    assert omdb_stub.requests == [title('Async Bulk One')]
+
+
+def test_iter_user_movies_in_batches(async_manager):
+    async def collect():
+        return [movie_id async for movie_id, _ in async_manager.iter_user_movies('1', batch_size=2)]
+
+    assert run(collect) == [movie_id for movie_id, _ in async_manager.data_manager.iter_user_movies('1')]
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import app as web_app
+from benchmarks import run
+
+
+@pytest.mark.parametrize('args', [
+    ['--backend', 'json', '--journal', '--snapshot-format', 'msgpack'],
+    ['--backend', 'sqlite'],
+    ['--backend', 'sharded'],
+])
+def test_a_small_run(args, tmp_path, omdb_stub, monkeypatch):
+    if 'msgpack' in args:
+        pytest.importorskip('msgpack')
+    # The route benchmarks install their manager in the app
+    monkeypatch.setattr(web_app, 'data_manager', web_app.data_manager)
+    output = tmp_path / 'results.json'
+    run.main(args + ['--users', '3', '--movies-per-user', '4', '--runs', '3', '--requests', '4',
+                     '--concurrency', '2', '--output', str(output)])
+    report = json.loads(output.read_text())
+    names = {entry['name'] for entry in report['results']}
+    assert {'data_manager.add_movie', 'route.index', 'route.search'} <= names
+    # Every movie was looked up with the stub, never over HTTP
+    assert omdb_stub.requests == []
+
+
+def test_journal_needs_the_json_backend():
+    with pytest.raises(SystemExit):
+        run.main(['--backend', 'sqlite', '--journal'])
@@ -0,0 +1,62 @@
+"""Behaviour every DataManagerInterface backend shares."""
+import pytest
+
+
+def test_add_movie_rejects_a_duplicate_title(any_manager):
+    name = next(iter(any_manager.get_user_movies('1').values()))['name']
+    with pytest.raises(ValueError):
+        any_manager.add_movie('1', name.upper(), None, 2001, 7.0)
+
+
+def test_renaming_to_another_title_is_rejected(any_manager):
+    (first_id, first), (second_id, second) = list(any_manager.get_user_movies('1').items())[:2]
+    with pytest.raises(ValueError):
+        any_manager.update_movie('1', second_id, {"name": first['name'].lower()})
+    assert any_manager.get_user_movies('1')[second_id]['name'] == second['name']
+
+
+def test_renaming_a_movie_to_its_own_title_is_allowed(any_manager):
+    movie_id, movie = next(iter(any_manager.get_user_movies('1').items()))
+    assert any_manager.update_movie('1', movie_id, {"name": movie['name'].upper()}) is True
+    assert any_manager.get_user_movies('1')[movie_id]['name'] == movie['name'].upper()
+    assert any_manager.update_movie('1', movie_id, {"name": 'A Brand New Title'}) is True
+
+
+def test_missing_users_and_movies(any_manager):
+    assert any_manager.update_movie('1', '999', {"name": "Nothing"}) is False
+    assert any_manager.delete_movie('999', '1') is False
+    with pytest.raises(ValueError):
+        any_manager.add_movie('999', 'Nobody', None, 2001, 7.0)
+
+
+def test_filter_movies_pages_without_repeats(any_manager):
+    first = any_manager.filter_movies(min_rating=5, sort='rating', per_page=5)
+    pages = (first['total'] + 4) // 5
+    results = first['results'] + [movie for page in range(2, pages + 1)
+                                  for movie in any_manager.filter_movies(min_rating=5, sort='rating',
+                                                                         page=page, per_page=5)['results']]
+    keys = [(str(movie['user_id']), str(movie['movie_id'])) for movie in results]
+    assert len(keys) == len(set(keys)) == first['total'] > 0
+    ratings = [float(movie['rating']) for movie in results]
+    assert min(ratings) >= 5 and ratings == sorted(ratings, reverse=True)
+    with pytest.raises(ValueError):
+        any_manager.filter_movies(sort='name')
+
+
+def test_iter_user_movies_resumes_after_an_id(any_manager):
+    movies = list(any_manager.iter_user_movies('1'))
+    ids = [int(movie_id) for movie_id, _ in movies]
+    assert ids == sorted(ids) and len(ids) == len(any_manager.get_user_movies('1'))
+    assert [int(movie_id) for movie_id, _ in any_manager.iter_user_movies('1', ids[1])] == ids[2:]
+    assert list(any_manager.iter_user_movies('1', ids[-1])) == []
+    assert list(any_manager.iter_user_movies('999')) == []
+
+
+def test_data_version_changes_with_the_data(any_manager):
+    before, user_before = any_manager.get_data_version(), any_manager.get_data_version('1')
+    other_before = any_manager.get_data_version('2')
+    any_manager.add_movie('1', 'A Versioned Movie', 'Someone', 2001, 7.0)
+    assert any_manager.get_data_version()[0] != before[0]
+    assert any_manager.get_data_version('1')[0] != user_before[0]
+    # Another user's movies did not change
+    assert any_manager.get_data_version('2')[0] == other_before[0]
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from datamanager.enrichment import EnrichmentWorker, ENRICHMENT_DONE, ENRICHMENT_FAILED, ENRICHMENT_PENDING, \
+    PENDING_DETAILS
+
+DETAILS = {"poster": "poster", "actors": "actors", "plot": "plot"}
+
+
+def wait_for_status(manager, user_id, movie_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        movie = manager.get_user_movies(user_id).get(movie_id)
+        if movie and movie.get('enrichment_status') == status:
+            return movie
+        time.sleep(0.01)
+    pytest.fail(f"movie {movie_id} never reached {status}")
+
+
+def pending_movie(manager, name):
+    movie_id = manager.add_movie('1', name, None, 2001, 7.0)
+    manager.update_movie('1', movie_id, dict(PENDING_DETAILS))
+    return movie_id
+
+
+def test_worker_fills_in_details(make_json_manager):
+    manager = make_json_manager()
+    movie_id = pending_movie(manager, 'Enrich Me')
+    worker = EnrichmentWorker(manager, fetch=lambda title: dict(DETAILS))
+    worker.submit('1', movie_id, 'Enrich Me').result()
+
+    movie = manager.get_user_movies('1')[movie_id]
+    assert movie['enrichment_status'] == ENRICHMENT_DONE
+    assert movie['plot'] == 'plot'
+
+
+def test_unreachable_omdb_marks_the_movie_failed(make_json_manager):
+    def unreachable(title):
+        raise ConnectionError("OMDb is down")
+
+    manager = make_json_manager()
+    movie_id = pending_movie(manager, 'Unlucky')
+    EnrichmentWorker(manager, fetch=unreachable).submit('1', movie_id, 'Unlucky').result()
+    assert manager.get_user_movies('1')[movie_id]['enrichment_status'] == ENRICHMENT_FAILED
+
+
+def test_deleted_movie_is_skipped(make_json_manager):
+    manager = make_json_manager()
+    movie_id = pending_movie(manager, 'Gone Soon')
+    manager.delete_movie('1', movie_id)
+    EnrichmentWorker(manager, fetch=lambda title: dict(DETAILS)).submit('1', movie_id, 'Gone Soon').result()
+    assert movie_id not in manager.get_user_movies('1')
+
+
+def test_resume_queues_pending_and_failed_movies(make_json_manager):
+    manager = make_json_manager()
+    pending = pending_movie(manager, 'Left Pending')
+    failed = pending_movie(manager, 'Failed Before')
+    manager.update_movie('1', failed, {"enrichment_status": ENRICHMENT_FAILED})
+
+    worker = EnrichmentWorker(manager, fetch=lambda title: dict(DETAILS))
+    assert worker.resume().result() == 2
+    worker.shutdown()
+    for movie_id in (pending, failed):
+        assert manager.get_user_movies('1')[movie_id]['enrichment_status'] == ENRICHMENT_DONE
+
+
+def test_deferred_add_movie_returns_before_omdb_answers(make_json_manager, omdb_stub):
+    omdb_stub.delay = 0.2
+    manager = make_json_manager(deferred_enrichment=True)
+    started = time.monotonic()
+    movie_id = manager.add_movie('1', 'Deferred Movie', None, 2001, 7.0)
+    assert time.monotonic() - started < 0.2
+    assert manager.get_user_movies('1')[movie_id]['enrichment_status'] == ENRICHMENT_PENDING
+
+    movie = wait_for_status(manager, '1', movie_id, ENRICHMENT_DONE)
+    assert movie['poster'] == 'poster-Deferred Movie'
+
+
+def test_pending_movies_are_enriched_after_a_restart(make_json_manager, omdb_stub):
+    manager = make_json_manager()
+    movie_id = pending_movie(manager, 'Restarted Movie')
+
+    restarted = make_json_manager(deferred_enrichment=True)
+    movie = wait_for_status(restarted, '1', movie_id, ENRICHMENT_DONE)
+    assert movie['poster'] == 'poster-Restarted Movie'
@@ -0,0 +1,45 @@
+import asyncio
+
+from fragment_cache import FragmentCache
+
+
+def test_renders_once_per_key():
+    cache = FragmentCache()
+    calls = []
+    render = lambda: calls.append(1) or '<p>one</p>'
+    assert cache.get_or_render(('card', '1', 'v1'), render) == '<p>one</p>'
+    assert cache.get_or_render(('card', '1', 'v1'), render) == '<p>one</p>'
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (1, 1)
+    # A new data version is a new key
+    cache.get_or_render(('card', '1', 'v2'), render)
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = FragmentCache(max_entries=2)
+    cache.get_or_render('a', lambda: 'A')
+    cache.get_or_render('b', lambda: 'B')
+    cache.get_or_render('a', lambda: 'A')
+    cache.get_or_render('c', lambda: 'C')
+    assert len(cache) == 2
+    assert cache.get_or_render('a', lambda: 'new A') == 'A'
+    assert cache.get_or_render('b', lambda: 'new B') == 'new B'
+
+
+def test_size_zero_caches_nothing():
+    cache = FragmentCache(max_entries=0)
+    cache.get_or_render('a', lambda: 'A')
+    assert len(cache) == 0
+    assert cache.get_or_render('a', lambda: 'new A') == 'new A'
+
+
+def test_async_render():
+    cache = FragmentCache()
+
+    async def render():
+        return 'A'
+
+    assert asyncio.run(cache.get_or_render_async('a', render)) == 'A'
+    assert cache.get_or_render('a', lambda: 'new A') == 'A'
+    cache.clear()
+    assert len(cache) == 0
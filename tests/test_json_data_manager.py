@@ -0,0 +1,323 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from datamanager import json_data_manager
+from datamanager.movie_record import MovieRecord
+
+
+def read_json(path):
+    with open(path) as fileobj:
+        return json.load(fileobj)
+
+
+def test_reads_come_from_memory_until_the_file_changes(make_json_manager, movies_json, monkeypatch):
+    manager = make_json_manager()
+    loads = []
+    load_movies_data = manager.load_movies_data
+    monkeypatch.setattr(manager, 'load_movies_data', lambda: loads.append(1) or load_movies_data())
+    manager.get_all_users()
+    manager.get_user_movies('1')
+    assert loads == []
+
+    data = read_json(movies_json)
+    data['1']['name'] = 'Renamed Outside'
+    with open(movies_json, 'w') as fileobj:
+        json.dump(data, fileobj)
+    assert manager.get_all_users()['1']['name'] == 'Renamed Outside'
+    manager.get_all_users()
+    assert loads == [1]
+
+
+def test_pages_cover_every_movie_once(make_json_manager):
+    manager = make_json_manager()
+    expected = [(user_id, movie_id) for user_id, user in manager.get_all_users().items()
+                for movie_id in user.get('movies', {})]
+    seen = []
+    for page in range(1, manager.calculate_total_pages(7) + 1):
+        for user_id, user in manager.get_movies_page(page, 7).items():
+            seen += [(user_id, movie_id) for movie_id in user['movies']]
+    assert seen == expected
+
+
+def test_pages_follow_adds_and_deletes(make_json_manager):
+    manager = make_json_manager()
+    movie_id = manager.add_movie('20', 'Paged In', None, 2001, 7.0)
+    manager.delete_movie('1', next(iter(manager.get_user_movies('1'))))
+    expected = [(user_id, movie_id) for user_id, user in manager.get_all_users().items()
+                for movie_id in user.get('movies', {})]
+    seen = []
+    for page in range(1, manager.calculate_total_pages(5) + 1):
+        for user_id, user in manager.get_movies_page(page, 5).items():
+            seen += [(user_id, movie_id) for movie_id in user['movies']]
+    assert seen == expected
+    assert ('20', movie_id) in seen
+
+
+def test_journal_appends_instead_of_rewriting(make_json_manager, movies_json):
+    with open(movies_json, 'rb') as fileobj:
+        snapshot = fileobj.read()
+    manager = make_json_manager(journal=True)
+    movie_id = manager.add_movie('1', 'Journal Movie', 'Someone', 2001, 7.0)
+
+    with open(movies_json, 'rb') as fileobj:
+        assert fileobj.read() == snapshot
+    with open(manager.journal_path) as journal:
+        assert len(journal.readlines()) == 1
+    reloaded = make_json_manager(journal=True)
+    assert reloaded.get_user_movies('1')[movie_id]['name'] == 'Journal Movie'
+
+
+def test_journal_replay_skips_a_torn_last_record(make_json_manager):
+    manager = make_json_manager(journal=True)
+    movie_id = manager.add_movie('1', 'Before The Crash', None, 2001, 7.0)
+    with open(manager.journal_path, 'ab') as journal:
+        journal.write(b'{"op": "put_movie", "user_id": "1", "mov')
+
+    reloaded = make_json_manager(journal=True)
+    assert reloaded.get_user_movies('1')[movie_id]['name'] == 'Before The Crash'
+
+
+def test_journal_is_compacted_at_the_threshold(make_json_manager, movies_json):
+    manager = make_json_manager(journal=True, compact_threshold=3)
+    first = manager.add_movie('1', 'Compacted One', None, 2001, 7.0)
+    manager.add_movie('1', 'Compacted Two', None, 2002, 7.0)
+    assert os.path.getsize(manager.journal_path) > 0
+    manager.delete_movie('1', first)
+
+    assert os.path.getsize(manager.journal_path) == 0
+    names = [movie['name'] for movie in read_json(movies_json)['1']['movies'].values()]
+    assert 'Compacted Two' in names and 'Compacted One' not in names
+
+
+def test_replaying_an_already_compacted_journal_is_harmless(make_json_manager):
+    manager = make_json_manager(journal=True)
+    manager.add_movie('1', 'Replayed', None, 2001, 7.0)
+    with open(manager.journal_path, 'rb') as journal:
+        records = journal.read()
+    manager.compact()
+    # As if the process died between writing movies.json and truncating the journal
+    with open(manager.journal_path, 'wb') as journal:
+        journal.write(records)
+
+    movies = make_json_manager(journal=True).get_user_movies('1')
+    assert [movie['name'] for movie in movies.values()].count('Replayed') == 1
+
+
+def fail_once(monkeypatch, module, name):
+    """Makes module.name raise OSError on its next call only."""
+    original = getattr(module, name)
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, failing)
+
+
+def test_failed_journal_write_is_retried(make_json_manager, monkeypatch):
+    manager = make_json_manager(journal=True)
+    fail_once(monkeypatch, json_data_manager.os, 'fsync')
+    first = manager.add_movie('1', 'Unlucky Write', None, 2001, 7.0)
+    assert first in manager.get_user_movies('1')
+    # The failed append was cut back off the journal
+    assert not os.path.exists(manager.journal_path) or os.path.getsize(manager.journal_path) == 0
+
+    second = manager.add_movie('1', 'Next Write', None, 2001, 7.0)
+    with open(manager.journal_path) as journal:
+        assert len(journal.readlines()) == 2
+    movies = make_json_manager(journal=True).get_user_movies('1')
+    assert movies[first]['name'] == 'Unlucky Write' and movies[second]['name'] == 'Next Write'
+
+
+def test_failed_snapshot_write_is_retried(make_json_manager, movies_json, monkeypatch):
+    manager = make_json_manager()
+    fail_once(monkeypatch, json_data_manager.os, 'replace')
+    movie_id = manager.add_movie('1', 'Unlucky Save', None, 2001, 7.0)
+    assert movie_id not in read_json(movies_json)['1']['movies']
+    assert movie_id in manager.get_user_movies('1')
+
+    manager.flush()
+    assert read_json(movies_json)['1']['movies'][movie_id]['name'] == 'Unlucky Save'
+
+
+def test_failed_compaction_keeps_the_journal(make_json_manager, monkeypatch):
+    manager = make_json_manager(journal=True)
+    movie_id = manager.add_movie('1', 'Only In The Journal', None, 2001, 7.0)
+    fail_once(monkeypatch, json_data_manager.os, 'replace')
+    manager.compact()
+
+    assert os.path.getsize(manager.journal_path) > 0
+    assert make_json_manager(journal=True).get_user_movies('1')[movie_id]['name'] == 'Only In The Journal'
+
+
+def test_snapshot_writes_leave_no_temporary_files(make_json_manager, movies_json):
+    manager = make_json_manager()
+    manager.add_movie('1', 'Atomic Write', None, 2001, 7.0)
+    assert os.listdir(os.path.dirname(movies_json)) == ['movies.json']
+    assert 'Atomic Write' in [movie['name'] for movie in read_json(movies_json)['1']['movies'].values()]
+
+
+def test_commit_window_writes_on_flush(make_json_manager, movies_json):
+    manager = make_json_manager(commit_window_ms=60000)
+    movie_id = manager.add_movie('1', 'Group Commit', None, 2001, 7.0)
+    manager.add_movie('1', 'Group Commit Two', None, 2001, 7.0)
+    assert movie_id in manager.get_user_movies('1')
+    assert movie_id not in read_json(movies_json)['1']['movies']
+
+    manager.flush()
+    names = [movie['name'] for movie in read_json(movies_json)['1']['movies'].values()]
+    assert 'Group Commit' in names and 'Group Commit Two' in names
+
+
+def new_user_id(manager, name):
+    manager.add_user(name)
+    return max(manager.get_all_users(), key=int)
+
+
+def test_process_safe_managers_see_each_others_writes(make_json_manager):
+    first = make_json_manager(process_safe=True)
+    second = make_json_manager(process_safe=True)
+
+    first_user = new_user_id(first, 'First Worker')
+    second_user = new_user_id(second, 'Second Worker')
+    assert first_user != second_user
+
+    first.add_movie(second_user, 'Across Workers', None, 2001, 7.0)
+    second.add_movie(second_user, 'Across Workers Two', None, 2001, 7.0)
+    names = {movie['name'] for movie in make_json_manager().get_user_movies(second_user).values()}
+    assert names == {'Across Workers', 'Across Workers Two'}
+
+
+def _add_users(make_manager, worker, count):
+    manager = make_manager(process_safe=True, journal=True, compact_threshold=4)
+    for i in range(count):
+        manager.add_user(f'worker {worker} user {i}')
+
+
+def test_process_safe_workers_do_not_lose_updates(make_json_manager):
+    before = len(make_json_manager().get_all_users())
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_add_users, args=(make_json_manager, worker, 5)) for worker in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    users = make_json_manager(journal=True).get_all_users()
+    assert len(users) == before + 15
+
+
+def test_concurrent_adds_get_distinct_ids(make_json_manager):
+    manager = make_json_manager()
+    with ThreadPoolExecutor(8) as executor:
+        movie_ids = list(executor.map(lambda i: manager.add_movie('1', f'Concurrent {i}', None, 2001, 7.0),
+                                      range(20)))
+    assert len(set(movie_ids)) == 20
+    assert all(movie_id in manager.get_user_movies('1') for movie_id in movie_ids)
+
+
+def test_movie_ids_are_not_reused(make_json_manager):
+    manager = make_json_manager(journal=True)
+    first = manager.add_movie('1', 'Newest', None, 2001, 7.0)
+    manager.delete_movie('1', first)
+    second = manager.add_movie('1', 'Newer Still', None, 2001, 7.0)
+    assert int(second) > int(first)
+
+    manager.delete_movie('1', second)
+    third = make_json_manager(journal=True).add_movie('1', 'After Reload', None, 2001, 7.0)
+    assert int(third) > int(second)
+
+
+def test_title_index_follows_deletes_and_renames(make_json_manager):
+    manager = make_json_manager()
+    movie_id = manager.add_movie('1', 'Indexed Title', None, 2001, 7.0)
+    manager.update_movie('1', movie_id, {"name": "Renamed Title"})
+    manager.add_movie('1', 'indexed title', None, 2001, 7.0)
+    with pytest.raises(ValueError):
+        manager.add_movie('1', 'RENAMED TITLE', None, 2001, 7.0)
+
+    manager.delete_movie('1', movie_id)
+    manager.add_movie('1', 'Renamed Title', None, 2001, 7.0)
+
+
+def test_movies_are_kept_as_records_and_saved_as_objects(make_json_manager, movies_json):
+    manager = make_json_manager()
+    movie_id = manager.add_movie('1', 'A Compact Movie', 'Someone', 2001, 7.0)
+    manager.update_movie('1', movie_id, {"rating": 8.0})
+    assert all(isinstance(movie, MovieRecord) for movie in manager.get_user_movies('1').values())
+    assert read_json(movies_json)['1']['movies'][movie_id]['rating'] == 8.0
+
+
+def test_a_failed_transaction_changes_nothing(make_json_manager, movies_json, monkeypatch):
+    manager = make_json_manager()
+    movies = dict(manager.get_user_movies('1'))
+    version, pages = manager.get_data_version(), manager.calculate_total_pages(1)
+    on_disk = read_json(movies_json)
+
+    def fail(record):
+        raise RuntimeError("disk gone")
+
+    # Fails after the movie was stored and indexed, before it is written out
+    monkeypatch.setattr(manager, '_queue_commit', fail)
+    with pytest.raises(RuntimeError):
+        manager.add_movie('1', 'A Rolled Back Movie', 'Someone', 2001, 7.0)
+    assert dict(manager.get_user_movies('1')) == movies
+    assert (manager.get_data_version(), manager.calculate_total_pages(1)) == (version, pages)
+    assert manager.search_movies('Rolled Back')['total'] == 0
+    assert read_json(movies_json) == on_disk
+
+    monkeypatch.undo()
+    movie_id = manager.add_movie('1', 'A Rolled Back Movie', 'Someone', 2001, 7.0)
+    assert manager.search_movies('Rolled Back')['results'][0]['movie_id'] == movie_id
+
+
+def test_a_failed_update_is_rolled_back(make_json_manager, movies_json):
+    manager = make_json_manager()
+    movie_id, movie = next(iter(manager.get_user_movies('1').items()))
+    version = manager.get_data_version()
+
+    with pytest.raises(ValueError):
+        # The search index cannot take a name of None
+        manager.update_movie('1', movie_id, {"name": None})
+
+    assert manager.get_user_movies('1')[movie_id]['name'] == movie['name']
+    assert manager.get_data_version() == version
+    assert read_json(movies_json)['1']['movies'][movie_id]['name'] == movie['name']
+    results = manager.search_movies(movie['name'])['results']
+    assert ('1', movie_id) in [(result['user_id'], result['movie_id']) for result in results]
+
+
+def test_readers_see_whole_snapshots_while_writing(make_json_manager):
+    manager = make_json_manager()
+    count = len(manager.get_user_movies('1'))
+
+    def write():
+        for i in range(50):
+            manager.add_movie('1', f'A Concurrent Movie {i}', 'Someone', 2001, 7.0)
+
+    def read():
+        seen = []
+        for _ in range(200):
+            users = manager.get_all_users()
+            # Iterating a snapshot while the writer publishes the next one
+            movies = [movie_id for movie_id in users['1']['movies']]
+            seen.append(len(movies))
+            assert len(set(movies)) == len(movies)
+        return seen
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        writer = executor.submit(write)
+        readers = [executor.submit(read) for _ in range(2)]
+        writer.result()
+        for reader in readers:
+            seen = reader.result()
+            assert seen == sorted(seen) and count <= seen[0] and seen[-1] <= count + 50
+    assert len(manager.get_user_movies('1')) == count + 50
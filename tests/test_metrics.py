@@ -0,0 +1,70 @@
+import pytest
+
+from datamanager import metrics
+
+
+def test_counters_and_histograms_render_in_the_prometheus_format():
+    registry = metrics.MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls.", ("method",))
+    calls.inc(("get",))
+    calls.inc(("get",), 2)
+    assert registry.counter("calls_total", "Calls.", ("method",)) is calls
+    durations = registry.histogram("duration_seconds", "Durations.", ("method",), buckets=(0.1, 1))
+    durations.observe(0.05, ("get",))
+    durations.observe(0.5, ("get",))
+    durations.observe(5, ("get",))
+
+    assert registry.render().splitlines() == [
+        '# HELP calls_total Calls.',
+        '# TYPE calls_total counter',
+        'calls_total{method="get"} 3',
+        '# HELP duration_seconds Durations.',
+        '# TYPE duration_seconds histogram',
+        'duration_seconds_bucket{method="get",le="0.1"} 1',
+        'duration_seconds_bucket{method="get",le="1.0"} 2',
+        'duration_seconds_bucket{method="get",le="+Inf"} 3',
+        'duration_seconds_sum{method="get"} 5.55',
+        'duration_seconds_count{method="get"} 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = metrics.MetricsRegistry()
+    registry.counter("paths_total", "Paths.", ("path",)).inc(('a"b\\c\nd',))
+    assert 'paths_total{path="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_callbacks_are_read_at_scrape_time():
+    registry = metrics.MetricsRegistry()
+    sizes = {("movies.json",): 10}
+    registry.callback("file_size_bytes", "Sizes.", ("file",), lambda: sizes)
+    assert 'file_size_bytes{file="movies.json"} 10' in registry.render()
+    sizes[("movies.json",)] = 20
+    assert 'file_size_bytes{file="movies.json"} 20' in registry.render()
+
+    registry.callback("broken", "Raises.", (), lambda: 1 / 0)
+    assert '# TYPE broken gauge' in registry.render()
+
+
+def test_instrument_times_calls_and_counts_errors():
+    class Manager:
+        def get_user(self, user_id):
+            if user_id is None:
+                raise ValueError("no user")
+            return {"id": user_id}
+
+        def iter_user_movies(self, user_id, after=None):
+            yield from ()
+
+    manager = metrics.instrument(Manager())
+    before = dict((labels, value) for _, labels, value in metrics.data_manager_errors.samples())
+    assert manager.get_user('1') == {"id": '1'}
+    with pytest.raises(ValueError):
+        manager.get_user(None)
+    # Generators are left alone
+    assert 'iter_user_movies' not in vars(manager)
+
+    errors = dict((labels, value) for _, labels, value in metrics.data_manager_errors.samples())
+    assert errors['{method="get_user"}'] == before.get('{method="get_user"}', 0) + 1
+    rendered = metrics.registry.render()
+    assert 'movies_data_manager_call_duration_seconds_count{method="get_user"}' in rendered
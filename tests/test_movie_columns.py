@@ -0,0 +1,91 @@
+import pytest
+
+from datamanager import movie_columns
+from datamanager.movie_columns import MovieColumns
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def columns_module(request, monkeypatch):
+    """Runs a test with numpy queries and again with the plain Python fallback."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(movie_columns, 'np', None)
+    return request.param
+
+
+def build(movies):
+    columns = MovieColumns()
+    for key, movie in movies.items():
+        columns.add(key, movie)
+    return columns
+
+
+def page_through(columns, per_page, **filters):
+    keys = []
+    total = None
+    offset = 0
+    while total is None or offset < total:
+        total, page = columns.query(limit=per_page, offset=offset, **filters)
+        keys += page
+        offset += per_page
+    return total, keys
+
+
+def test_filters(columns_module):
+    columns = build({
+        ('1', '1'): {"year": 1979, "rating": 8.5, "director": "Ridley Scott"},
+        ('1', '2'): {"year": 1986, "rating": 8.4, "director": "James Cameron"},
+        ('2', '1'): {"year": 1982, "rating": 8.1, "director": " ridley scott "},
+        ('2', '2'): {"year": "unknown", "rating": None, "director": None},
+    })
+    assert columns.query(year_from=1980) == (2, [('1', '2'), ('2', '1')])
+    assert columns.query(year_to=1982, min_rating=8.2) == (1, [('1', '1')])
+    assert columns.query(director='RIDLEY SCOTT') == (2, [('1', '1'), ('2', '1')])
+    assert columns.query(director='Nobody') == (0, [])
+    assert columns.query(user_id='2') == (2, [('2', '1'), ('2', '2')])
+    assert columns.query(user_id='abc') == (0, [])
+
+
+def test_sorting_puts_missing_values_last(columns_module):
+    columns = build({
+        ('1', '1'): {"year": 2000, "rating": 7.0},
+        ('1', '2'): {"year": 2001, "rating": None},
+        ('1', '3'): {"year": 2002, "rating": 9.0},
+    })
+    assert columns.query(sort='rating')[1] == [('1', '3'), ('1', '1'), ('1', '2')]
+    assert columns.query(sort='rating', descending=False)[1] == [('1', '1'), ('1', '3'), ('1', '2')]
+    assert columns.query(sort='year', limit=1, offset=1)[1] == [('1', '2')]
+    with pytest.raises(ValueError):
+        columns.query(sort='name')
+
+
+@pytest.mark.parametrize('sort', ['rating', 'year'])
+def test_paging_through_tied_values_is_stable(columns_module, sort):
+    # Mostly equal values, so many page boundaries fall inside a run of ties
+    columns = build({('1', str(i)): {"year": 2000 + i % 3, "rating": 7.0 if i % 10 else 8.0} for i in range(200)})
+    total, keys = page_through(columns, 10, sort=sort)
+    assert total == 200
+    assert len(keys) == len(set(keys)) == 200
+    # Paging gives the same order as one page holding everything
+    assert keys == columns.query(sort=sort, limit=200)[1]
+
+
+def test_numpy_and_python_agree(monkeypatch):
+    pytest.importorskip('numpy')
+    columns = build({('1', str(i)): {"year": 2000 + i % 7, "rating": (i * 37) % 5} for i in range(300)})
+    queries = [dict(sort='rating', limit=10, offset=offset) for offset in (0, 10, 50, 290)] + \
+              [dict(sort='year', descending=False, limit=25, offset=100), dict(min_rating=2, sort='rating', limit=7)]
+    with_numpy = [columns.query(**query) for query in queries]
+    monkeypatch.setattr(movie_columns, 'np', None)
+    assert [columns.query(**query) for query in queries] == with_numpy
+
+
+def test_removed_rows_are_reused(columns_module):
+    columns = build({('1', str(i)): {"year": 2000, "rating": i} for i in range(5)})
+    columns.remove(('1', '4'))
+    columns.remove(('9', '9'))
+    columns.add(('2', '1'), {"year": 1990, "rating": 1})
+    assert len(columns) == 5
+    assert columns.query(sort='rating')[1][0] == ('1', '3')
+    assert columns.query(year_to=1995) == (1, [('2', '1')])
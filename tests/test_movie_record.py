@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from datamanager.movie_record import MovieRecord, NOT_AVAILABLE, json_default
+
+MOVIE = {"name": "Alien", "director": "Ridley Scott", "year": 1979, "rating": 8.5,
+         "poster": "N/A", "actors": "Sigourney Weaver", "plot": "In space.", "enrichment_status": "done"}
+
+
+def test_behaves_like_the_dict_it_was_built_from():
+    record = MovieRecord(MOVIE)
+    assert record == MOVIE and dict(record) == MOVIE and {**record} == MOVIE
+    assert len(record) == len(MOVIE) and list(record) == list(MOVIE)
+    assert record.get("plot") == "In space." and record.get("missing", 1) == 1
+    with pytest.raises(KeyError):
+        record["missing"]
+
+
+def test_unset_and_unknown_fields():
+    record = MovieRecord({"name": "Alien", "imdb_id": "tt0078748"})
+    assert "director" not in record and "imdb_id" in record
+    assert record.to_dict() == {"name": "Alien", "imdb_id": "tt0078748"}
+    record.update({"rating": 8.5, "seen": True})
+    assert record.to_dict() == {"name": "Alien", "rating": 8.5, "imdb_id": "tt0078748", "seen": True}
+    assert not hasattr(record, '__dict__')
+
+
+def test_repeated_strings_are_shared():
+    first = MovieRecord({**MOVIE, "director": "".join(["Ridley", " Scott"])})
+    second = MovieRecord({**MOVIE, "director": "".join(["Ridley ", "Scott"])})
+    assert first["director"] is second["director"]
+    assert first["poster"] is NOT_AVAILABLE
+    # Free text is left alone
+    assert first["plot"] == second["plot"]
+
+
+def test_serializes_as_an_object():
+    record = MovieRecord(MOVIE)
+    assert json.loads(json.dumps({"1": record}, default=json_default)) == {"1": MOVIE}
+    with pytest.raises(TypeError):
+        json_default(object())
@@ -0,0 +1,52 @@
+import time
+
+from datamanager.omdb_cache import OMDbCache
+
+DETAILS = {"poster": "p", "actors": "a", "plot": "x"}
+
+
+def test_hits_misses_and_not_found_answers(tmp_path):
+    cache = OMDbCache(str(tmp_path / 'cache.db'))
+    assert cache.get('Alien') == (False, None)
+    cache.put('Alien', DETAILS)
+    cache.put('Nothing Like It', None)
+
+    assert cache.get('  ALIEN ') == (True, DETAILS)
+    assert cache.get('nothing like it') == (True, None)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_entries_expire(tmp_path):
+    cache = OMDbCache(str(tmp_path / 'cache.db'), ttl_seconds=0.05, negative_ttl_seconds=0.05)
+    cache.put('Alien', DETAILS)
+    cache.put('Nothing Like It', None)
+    time.sleep(0.1)
+    assert cache.get('Alien') == (False, None)
+    assert cache.get('Nothing Like It') == (False, None)
+
+
+def test_disk_tier_is_shared_and_outlives_eviction(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = OMDbCache(path, max_entries=1)
+    cache.put('Alien', DETAILS)
+    cache.put('Heat', DETAILS)
+    # Evicted from memory, still on disk
+    assert cache.get('Alien') == (True, DETAILS)
+    assert OMDbCache(path).get('Heat') == (True, DETAILS)
+
+
+def test_entry_expired_in_memory_is_read_again_from_disk(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = OMDbCache(path, ttl_seconds=0.05)
+    cache.put('Alien', DETAILS)
+    # Another worker refreshes the title with a longer TTL
+    OMDbCache(path).put('Alien', dict(DETAILS, plot='refreshed'))
+    time.sleep(0.1)
+    assert cache.get('Alien') == (True, dict(DETAILS, plot='refreshed'))
+
+
+def test_cached_details_are_copies(tmp_path):
+    cache = OMDbCache(str(tmp_path / 'cache.db'))
+    cache.put('Alien', DETAILS)
+    cache.get('Alien')[1]['plot'] = 'changed'
+    assert cache.get('Alien') == (True, DETAILS)
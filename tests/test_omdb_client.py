@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+import requests
+
+from datamanager import omdb
+from datamanager.omdb_client import OMDbClient, AsyncOMDbClient, CircuitOpenError, OMDbError
+
+
+def make_client(stub, **kwargs):
+    options = dict(api_key='test', backoff_base=0, max_attempts=3, failure_threshold=2, reset_timeout=60)
+    options.update(kwargs)
+    return OMDbClient(stub.url, **options)
+
+
+def test_fetch_returns_details(omdb_stub):
+    details = make_client(omdb_stub).fetch('Alien')
+    assert details == {"poster": "poster-Alien", "actors": "Some Actor", "plot": "The plot of Alien."}
+
+
+def test_fetch_returns_none_for_unknown_movie(omdb_stub):
+    assert make_client(omdb_stub).fetch('Unknown Film') is None
+    assert omdb_stub.requests == ['Unknown Film']
+
+
+def test_transient_errors_are_retried(omdb_stub):
+    omdb_stub.failures = 2
+    client = make_client(omdb_stub)
+    assert client.fetch('Heat')['poster'] == 'poster-Heat'
+    assert omdb_stub.requests == ['Heat'] * 3
+    assert not client.circuit_open
+
+
+def test_gives_up_after_max_attempts(omdb_stub):
+    omdb_stub.failures = 10
+    with pytest.raises(requests.HTTPError):
+        make_client(omdb_stub, max_attempts=3).fetch('Heat')
+    assert len(omdb_stub.requests) == 3
+
+
+def test_client_errors_are_not_retried(omdb_stub):
+    omdb_stub.failures, omdb_stub.fail_status = 1, 404
+    with pytest.raises(requests.HTTPError):
+        make_client(omdb_stub).fetch('Heat')
+    assert len(omdb_stub.requests) == 1
+
+
+def test_error_answers_are_not_retried(omdb_stub):
+    omdb_stub.answer = {"Response": "False", "Error": "Invalid API key!"}
+    with pytest.raises(OMDbError):
+        make_client(omdb_stub).fetch('Heat')
+    assert len(omdb_stub.requests) == 1
+
+
+def test_read_timeout(omdb_stub):
+    omdb_stub.delay = 0.5
+    with pytest.raises(requests.Timeout):
+        make_client(omdb_stub, read_timeout=0.05, max_attempts=1).fetch('Heat')
+
+
+def test_circuit_opens_after_consecutive_failures(omdb_stub):
+    omdb_stub.failures = 100
+    client = make_client(omdb_stub, max_attempts=1, failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.fetch('Heat')
+    assert client.circuit_open
+
+    with pytest.raises(CircuitOpenError):
+        client.fetch('Heat')
+    # The open circuit fails fast, without asking OMDb
+    assert len(omdb_stub.requests) == 2
+
+
+def test_circuit_lets_a_trial_through_after_reset_timeout(omdb_stub):
+    omdb_stub.failures = 2
+    client = make_client(omdb_stub, max_attempts=1, failure_threshold=2, reset_timeout=0)
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.fetch('Heat')
+    assert client.circuit_open
+
+    assert client.fetch('Heat')['poster'] == 'poster-Heat'
+    assert not client.circuit_open
+
+
+def test_failed_trial_reopens_the_circuit(omdb_stub):
+    omdb_stub.failures = 3
+    client = make_client(omdb_stub, max_attempts=1, failure_threshold=2, reset_timeout=0)
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client.fetch('Heat')
+    assert client.circuit_open
+    assert len(omdb_stub.requests) == 3
+
+
+def test_success_resets_the_failure_count(omdb_stub):
+    client = make_client(omdb_stub, max_attempts=1, failure_threshold=2)
+    omdb_stub.failures = 1
+    with pytest.raises(requests.HTTPError):
+        client.fetch('Heat')
+    client.fetch('Heat')
+    omdb_stub.failures = 1
+    with pytest.raises(requests.HTTPError):
+        client.fetch('Heat')
+    assert not client.circuit_open
+
+
+def test_fetch_falls_back_to_placeholders_while_the_circuit_is_open(omdb_stub, monkeypatch):
+    client = make_client(omdb_stub, max_attempts=1, failure_threshold=1)
+    monkeypatch.setattr(omdb, 'omdb_client', client)
+    omdb_stub.failures = 100
+
+    assert omdb.fetch_omdb_movie_details('Circuit Test One') == omdb.MISSING_DETAILS
+    assert client.circuit_open
+    assert omdb.fetch_omdb_movie_details('Circuit Test Two') == omdb.MISSING_DETAILS
+    assert omdb_stub.requests == ['Circuit Test One']
+
+
+def test_lookups_are_cached(omdb_stub):
+    assert omdb.fetch_omdb_movie_details('Cache Test')['poster'] == 'poster-Cache Test'
+    assert omdb.fetch_omdb_movie_details('Cache Test')['poster'] == 'poster-Cache Test'
+    assert omdb.fetch_omdb_movie_details('Unknown Cache Test') == omdb.MISSING_DETAILS
+    assert omdb.fetch_omdb_movie_details('Unknown Cache Test') == omdb.MISSING_DETAILS
+    assert omdb_stub.requests == ['Cache Test', 'Unknown Cache Test']
+
+
+def test_failed_lookups_are_not_cached(omdb_stub, monkeypatch):
+    monkeypatch.setattr(omdb, 'omdb_client', make_client(omdb_stub, max_attempts=1))
+    omdb_stub.failures = 1
+    assert omdb.fetch_omdb_movie_details('Retry Later') == omdb.MISSING_DETAILS
+    assert omdb.fetch_omdb_movie_details('Retry Later')['poster'] == 'poster-Retry Later'
+
+
+def test_async_client_retries_and_opens_the_circuit(omdb_stub):
+    pytest.importorskip('httpx')
+    import httpx
+
+    async def run():
+        client = AsyncOMDbClient(omdb_stub.url, 'test', backoff_base=0, max_attempts=2, failure_threshold=1)
+        try:
+            omdb_stub.failures = 1
+            assert (await client.fetch('Heat'))['poster'] == 'poster-Heat'
+
+            omdb_stub.failures = 2
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.fetch('Heat')
+            with pytest.raises(CircuitOpenError):
+                await client.fetch('Heat')
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert len(omdb_stub.requests) == 4
+
+
+def test_lookup_raises_where_fetch_falls_back(omdb_stub, monkeypatch):
+    client = make_client(omdb_stub, max_attempts=1, failure_threshold=1)
+    monkeypatch.setattr(omdb, 'omdb_client', client)
+    omdb_stub.failures = 100
+
+    with pytest.raises(requests.HTTPError):
+        omdb.lookup_omdb_movie_details('Lookup Test One')
+    with pytest.raises(CircuitOpenError):
+        omdb.lookup_omdb_movie_details('Lookup Test Two')
+
+
+def test_lookup_of_an_unknown_movie_gives_placeholders(omdb_stub):
+    assert omdb.lookup_omdb_movie_details('Unknown Lookup Test') == omdb.MISSING_DETAILS
@@ -0,0 +1,86 @@
+import sys
+import time
+
+import pytest
+
+from profiling import SlowRequestProfiler
+
+
+def slow_app(delay, body=(b'ok',)):
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        time.sleep(delay)
+        return list(body)
+    return app
+
+
+def streaming_app(delay):
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        def body():
+            yield b'first'
+            time.sleep(delay)
+            yield b'second'
+        return body()
+    return app
+
+
+def call(profiler, path='/slow'):
+    body = profiler({'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': 'a=1'}, lambda *args: None)
+    try:
+        return b''.join(body)
+    finally:
+        body.close()
+
+
+def test_slow_requests_are_profiled():
+    profiler = SlowRequestProfiler(slow_app(0.1), threshold_ms=50, interval_ms=2)
+    assert call(profiler) == b'ok'
+    (profile,) = profiler.profiles()
+    assert profile['path'] == '/slow' and profile['query'] == 'a=1' and profile['duration_ms'] >= 50
+    assert profile['samples'] > 0
+    collapsed = profiler.collapsed(profile['id'])
+    assert 'test_profiling.py:app:' in collapsed
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed.splitlines())
+    assert profiler.collapsed(profile['id'] + 1) is None
+
+
+def test_fast_requests_are_not_kept():
+    profiler = SlowRequestProfiler(slow_app(0), threshold_ms=50, interval_ms=2)
+    call(profiler)
+    assert profiler.profiles() == []
+
+
+def test_streamed_bodies_count_until_closed():
+    profiler = SlowRequestProfiler(streaming_app(0.1), threshold_ms=50, interval_ms=2)
+    assert call(profiler) == b'firstsecond'
+    (profile,) = profiler.profiles()
+    assert profile['duration_ms'] >= 50
+
+
+def test_only_the_last_profiles_are_kept():
+    profiler = SlowRequestProfiler(slow_app(0.02), threshold_ms=10, max_profiles=2)
+    for path in ('/a', '/b', '/c'):
+        call(profiler, path)
+    assert [profile['path'] for profile in profiler.profiles()] == ['/c', '/b']
+
+
+def test_the_sampler_sleeps_while_idle():
+    profiler = SlowRequestProfiler(slow_app(0.05), threshold_ms=20, interval_ms=1)
+    assert not profiler._busy.is_set()
+    call(profiler)
+    assert not profiler._busy.is_set() and profiler._active == {}
+    time.sleep(0.02)
+    # Blocked on the event, not polling
+    assert sys._current_frames()[profiler._sampler.ident].f_code.co_name == 'wait'
+
+
+def test_failing_requests_are_unregistered():
+    def failing_app(environ, start_response):
+        raise RuntimeError("boom")
+
+    profiler = SlowRequestProfiler(failing_app, threshold_ms=20)
+    with pytest.raises(RuntimeError):
+        call(profiler)
+    assert profiler._active == {} and not profiler._busy.is_set()
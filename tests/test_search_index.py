@@ -0,0 +1,100 @@
+from datamanager.search_index import InvertedIndex, tokenize
+
+MOVIES = {
+    ('1', '1'): {"name": "Alien", "director": "Ridley Scott", "actors": "Sigourney Weaver", "plot": "In space."},
+    ('1', '2'): {"name": "Aliens", "director": "James Cameron", "actors": "Sigourney Weaver", "plot": "More aliens."},
+    ('2', '1'): {"name": "Blade Runner", "director": "Ridley Scott", "actors": "Harrison Ford", "plot": "Replicants."},
+    ('2', '2'): {"name": "Heat", "director": "Michael Mann", "actors": "Al Pacino", "plot": "An alien heist."},
+}
+
+
+def build_index(bulk=False):
+    index = InvertedIndex()
+    if bulk:
+        with index.bulk_add():
+            for doc_key, movie in MOVIES.items():
+                index.add(doc_key, movie)
+    else:
+        for doc_key, movie in MOVIES.items():
+            index.add(doc_key, movie)
+    return index
+
+
+def keys(results):
+    return [doc_key for doc_key, _ in results]
+
+
+def test_tokenize():
+    assert tokenize("Blade Runner: 2049!") == ['blade', 'runner', '2049']
+    assert tokenize(None) == []
+
+
+def test_every_word_must_match():
+    total, results = build_index().search('ridley scott blade', 10)
+    assert (total, keys(results)) == (1, [('2', '1')])
+    assert build_index().search('ridley cameron', 10) == (0, [])
+    assert build_index().search('', 10) == (0, [])
+
+
+def test_name_matches_rank_first_and_prefixes_match():
+    total, results = build_index().search('alien', 10)
+    assert total == 3
+    # An exact name match beats a prefix of a name, which beats a plot match
+    assert keys(results) == [('1', '1'), ('1', '2'), ('2', '2')]
+    assert build_index().search('replic', 10)[0] == 1
+
+
+def test_short_prefixes_count_every_match():
+    index = InvertedIndex()
+    with index.bulk_add():
+        for i in range(500):
+            index.add(('1', str(i)), {"name": f"word{i}"})
+    total, results = index.search('wor', 10)
+    assert total == 500
+    assert len(results) == 10
+
+
+def test_paging_covers_every_match_once():
+    index = InvertedIndex()
+    for i in range(20):
+        index.add(('1', str(i)), {"name": f"Same Title {i}"})
+    pages = [keys(index.search('same title', 3, offset)[1]) for offset in range(0, 21, 3)]
+    assert sorted(key for page in pages for key in page) == sorted(('1', str(i)) for i in range(20))
+
+
+def test_remove_and_replace():
+    index = build_index()
+    index.remove(('1', '1'))
+    index.remove(('9', '9'))
+    assert keys(index.search('alien', 10)[1]) == [('1', '2'), ('2', '2')]
+    index.add(('2', '2'), {"name": "Heat", "plot": "A heist."})
+    assert keys(index.search('alien', 10)[1]) == [('1', '2')]
+    assert index.search('sigourney', 10)[0] == 1
+    assert len(index) == 3
+
+
+def test_bulk_add_builds_the_same_index():
+    for query in ('alien', 'ridley', 'a', 'heist', 'sc'):
+        assert build_index(bulk=True).search(query, 10) == build_index().search(query, 10)
+
+
+def test_data_manager_search(any_manager, omdb_stub):
+    omdb_stub.answer = {"Response": "True", "Poster": "N/A", "Actors": "Nobody", "Plot": "Nothing happens."}
+    results = any_manager.search_movies('avat')['results']
+    assert [(result['user_id'], result['movie_id'], result['name']) for result in results] == [('4', '2', 'Avatar')]
+    assert any_manager.search_movies('james cameron avatar')['total'] == 1
+
+    movie_id = any_manager.add_movie('2', 'Searchable Addition', 'Christopher Nolan', 2001, 7.0)
+    assert any_manager.search_movies('searchable')['results'][0]['movie_id'] == movie_id
+    any_manager.update_movie('2', movie_id, {"name": "Renamed Addition"})
+    assert any_manager.search_movies('searchable')['total'] == 0
+    any_manager.delete_movie('2', movie_id)
+    assert any_manager.search_movies('renamed addition')['total'] == 0
+
+
+def test_data_manager_search_pages(any_manager):
+    total = any_manager.search_movies('the', per_page=100)['total']
+    seen = []
+    for page in range(1, total // 3 + 2):
+        seen += [(r['user_id'], r['movie_id']) for r in any_manager.search_movies('the', page, 3)['results']]
+    assert len(seen) == total == len(set(seen))
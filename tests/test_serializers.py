@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from datamanager import serializers
+from datamanager.movie_record import MovieRecord
+
+DATA = {"1": {"name": "Ana", "movies": {"1": MovieRecord({"name": "Amélie", "year": 2001, "rating": 8.3})}}}
+PLAIN = {"1": {"name": "Ana", "movies": {"1": {"name": "Amélie", "year": 2001, "rating": 8.3}}}}
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def json_module(request, monkeypatch):
+    """Runs a test with orjson and again with the stdlib json fallback."""
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(serializers, 'orjson', None)
+    return request.param
+
+
+@pytest.mark.parametrize('name', ['pretty', 'json', 'msgpack'])
+def test_every_format_round_trips(json_module, name):
+    if name == 'msgpack':
+        pytest.importorskip('msgpack')
+    raw = serializers.get_serializer(name).dumps(DATA)
+    assert serializers.loads(raw) == PLAIN
+
+
+def test_formats(json_module):
+    assert b'\n  ' in serializers.get_serializer('pretty').dumps(DATA)
+    assert b' ' not in serializers.get_serializer('json').dumps({"a": [1, 2]})
+    line = serializers.dumps_line({"op": "delete_movie", "user_id": "1", "movie_id": "2"})
+    assert line.endswith(b'\n') and line.count(b'\n') == 1
+    assert json.loads(line) == {"op": "delete_movie", "user_id": "1", "movie_id": "2"}
+    with pytest.raises(ValueError):
+        serializers.get_serializer('yaml')
+
+
+def test_corrupt_snapshots_raise_value_error(json_module):
+    pytest.importorskip('msgpack')
+    with pytest.raises(ValueError):
+        serializers.loads(b'{"1": ')
+    with pytest.raises(ValueError):
+        serializers.loads(serializers.MSGPACK_MAGIC + b'\xc1')
+
+
+def test_msgpack_needs_the_package(monkeypatch):
+    monkeypatch.setattr(serializers, 'msgpack', None)
+    with pytest.raises(ValueError):
+        serializers.get_serializer('msgpack')
+    with pytest.raises(ValueError):
+        serializers.loads(serializers.MSGPACK_MAGIC + b'\x80')
+
+
+def test_convert(tmp_path):
+    pytest.importorskip('msgpack')
+    source, destination = tmp_path / 'movies.json', tmp_path / 'movies.pretty.json'
+    source.write_bytes(serializers.get_serializer('msgpack').dumps(DATA))
+    serializers.convert(str(source), str(destination))
+    assert json.loads(destination.read_text()) == PLAIN
+
+
+def test_manager_reads_and_writes_msgpack(make_json_manager, movies_json):
+    pytest.importorskip('msgpack')
+    manager = make_json_manager(snapshot_format='msgpack')
+    movie_id = manager.add_movie('1', 'A Packed Movie', 'Someone', 2001, 7.0)
+    with open(movies_json, 'rb') as fileobj:
+        assert fileobj.read().startswith(serializers.MSGPACK_MAGIC)
+    # Any format is read back, whatever the manager writes
+    assert make_json_manager().get_user_movies('1')[movie_id]['name'] == 'A Packed Movie'
@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from datamanager import sharded_json_data_manager
+from datamanager.sharded_json_data_manager import ShardedJSONDataManager
+from tests.conftest import STATIC_MOVIES_JSON, manager_class
+
+
+@pytest.fixture
+def make_manager(movies_json, tmp_path):
+    """Builds ShardedJSONDataManagers sharing one shard directory."""
+    return lambda **kwargs: manager_class(ShardedJSONDataManager, movies_json)(str(tmp_path / 'shards'), **kwargs)
+
+
+def test_movies_json_is_split_into_shards(make_manager, movies_json, tmp_path):
+    manager = make_manager()
+    with open(movies_json) as fileobj:
+        data = json.load(fileobj)
+    assert sorted(os.listdir(tmp_path / 'shards' / 'users')) == sorted(f'{user_id}.json' for user_id in data)
+    assert manager.get_user_movies('1') == data['1']['movies']
+    assert manager.calculate_total_pages(1) == sum(len(user['movies']) for user in data.values())
+
+
+def test_the_split_replays_the_journal(make_json_manager, make_manager, movies_json):
+    json_manager = make_json_manager(journal=True)
+    movie_id = json_manager.add_movie('1', 'A Journaled Movie', 'Someone', 2001, 7.0)
+    json_manager.flush()
+    assert os.path.exists(movies_json + '.journal')
+    assert make_manager().get_user_movies('1')[movie_id]['name'] == 'A Journaled Movie'
+
+
+def test_the_default_directory_is_not_served(tmp_path):
+    static = tmp_path / 'app' / 'static'
+    static.mkdir(parents=True)
+    shutil.copy(STATIC_MOVIES_JSON, static / 'movies.json')
+    manager = manager_class(ShardedJSONDataManager, str(static / 'movies.json'))()
+    assert manager.shards_dir == str(tmp_path / 'app' / 'movie_shards')
+
+
+def test_readers_get_copies(make_manager):
+    manager = make_manager()
+    user = manager.get_user('1')
+    movies = manager.get_user_movies('1')
+    users = manager.get_all_users()
+    count = len(movies)
+
+    manager.add_movie('1', 'A Copied Movie', 'Someone', 2001, 7.0)
+    # Iterating what was read before the change still works, and is unchanged
+    assert [movie_id for movie_id in movies] and len(movies) == count
+    assert len(user['movies']) == len(users['1']['movies']) == count
+
+    user['movies'].clear()
+    movies.clear()
+    assert len(manager.get_user_movies('1')) == count + 1
+
+
+def test_a_failed_write_leaves_memory_unchanged(make_manager, monkeypatch):
+    manager = make_manager()
+    movies = manager.get_user_movies('1')
+    movie_id, movie = next(iter(movies.items()))
+    version = manager.get_data_version('1')
+
+    def fail(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sharded_json_data_manager, 'write_json_atomic', fail)
+    with pytest.raises(OSError):
+        manager.add_movie('1', 'A Lost Movie', 'Someone', 2001, 7.0)
+    with pytest.raises(ValueError):
+        manager.update_movie('1', movie_id, {"name": "A Lost Title"})
+    with pytest.raises(OSError):
+        manager.delete_movie('1', movie_id)
+    with pytest.raises(ValueError):
+        manager.add_user('Lost User')
+    assert manager.get_user_movies('1') == movies
+    assert manager.get_data_version('1') == version
+    assert manager.calculate_total_pages(1) == make_manager().calculate_total_pages(1)
+
+    monkeypatch.undo()
+    # The title index did not keep the names of the failed changes either
+    new_id = manager.add_movie('1', 'A Lost Movie', 'Someone', 2001, 7.0)
+    assert manager.update_movie('1', movie_id, {"name": "A Lost Title"}) is True
+    assert set(manager.get_user_movies('1')) == set(movies) | {new_id}
+    assert "added successfully with ID" in manager.add_user('Found User')
+
+
+def test_renames_and_deletes_update_the_title_index(make_manager):
+    manager = make_manager()
+    movie_id, movie = next(iter(manager.get_user_movies('1').items()))
+    manager.update_movie('1', movie_id, {"name": "A Renamed Movie"})
+    # The old title is free again, the new one is taken
+    manager.add_movie('1', movie['name'], 'Someone', 2001, 7.0)
+    with pytest.raises(ValueError):
+        manager.add_movie('1', 'a renamed movie', 'Someone', 2001, 7.0)
+    manager.delete_movie('1', movie_id)
+    manager.add_movie('1', 'A Renamed Movie', 'Someone', 2001, 7.0)
+
+
+def test_changes_of_another_process_are_seen(make_manager):
+    first, second = make_manager(), make_manager()
+    assert first.search_movies('Avatar')['total'] == 1
+    movie_id = second.add_movie('4', 'Another Avatar Film', 'Someone', 2001, 7.0)
+    assert first.search_movies('Avatar')['total'] == 2
+    assert first.get_user_movies('4')[movie_id]['name'] == 'Another Avatar Film'
+    with pytest.raises(ValueError):
+        first.add_movie('4', 'Another Avatar Film', 'Someone', 2001, 7.0)
+
+
+def test_managers_sharing_a_directory_hand_out_distinct_user_ids(make_manager):
+    first, second = make_manager(), make_manager()
+    messages = [first.add_user('First'), second.add_user('Second'), first.add_user('Third')]
+    ids = [message.rsplit(' ', 1)[1] for message in messages]
+    assert len(set(ids)) == 3
+    assert {first.get_user(user_id)['name'] for user_id in ids} == {'First', 'Second', 'Third'}
+
+
+def test_least_recently_used_shards_are_evicted(make_manager):
+    manager = make_manager(max_cached_movies=1)
+    manager.get_user_movies('1')
+    manager.get_user_movies('2')
+    assert list(manager._shards) == ['2']
+    assert manager.get_user_movies('1')
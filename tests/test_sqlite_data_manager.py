@@ -0,0 +1,123 @@
+import json
+import sqlite3
+
+import pytest
+
+from datamanager.sqlite_data_manager import SQLiteDataManager
+
+OLD_SCHEMA = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+    CREATE TABLE movies (user_id INTEGER NOT NULL, movie_id INTEGER NOT NULL, name TEXT NOT NULL,
+                         director TEXT, year INTEGER, rating REAL, poster TEXT, actors TEXT, plot TEXT,
+                         PRIMARY KEY (user_id, movie_id));
+    INSERT INTO users VALUES (1, 'Old User');
+    INSERT INTO movies (user_id, movie_id, name) VALUES (1, 7, 'Old Movie');
+"""
+
+
+@pytest.fixture
+def manager(tmp_path, movies_json):
+    manager = SQLiteDataManager(str(tmp_path / 'movies.db'))
+    manager.migrate_from_json(movies_json)
+    return manager
+
+
+def test_migrate_from_json_copies_every_user_and_movie(manager, movies_json):
+    with open(movies_json) as fileobj:
+        data = json.load(fileobj)
+
+    users = manager.get_all_users()
+    assert set(users) == set(data)
+    for user_id, user in data.items():
+        assert users[user_id]['name'] == user['name']
+        movies = manager.get_user_movies(user_id)
+        assert set(movies) == set(user.get('movies', {}))
+        for movie_id, movie in user.get('movies', {}).items():
+            assert movies[movie_id]['name'] == movie['name']
+            assert movies[movie_id]['rating'] == movie['rating']
+
+
+def test_migration_can_be_rerun(manager, movies_json):
+    before = manager.get_all_users()
+    assert manager.migrate_from_json(movies_json)[0] == len(before)
+    assert manager.get_all_users() == before
+
+
+def test_movie_ids_are_not_reused(manager):
+    first = manager.add_movie('1', 'Newest', None, 2001, 7.0)
+    manager.delete_movie('1', first)
+    second = manager.add_movie('1', 'Newer Still', None, 2001, 7.0)
+    assert int(second) > int(first)
+
+
+def test_migration_keeps_ids_freed_in_movies_json(tmp_path, movies_json):
+    with open(movies_json) as fileobj:
+        data = json.load(fileobj)
+    data['1']['last_movie_id'] = 100
+    with open(movies_json, 'w') as fileobj:
+        json.dump(data, fileobj)
+
+    manager = SQLiteDataManager(str(tmp_path / 'movies.db'))
+    manager.migrate_from_json(movies_json)
+    assert int(manager.add_movie('1', 'After Migration', None, 2001, 7.0)) == 101
+
+
+def test_old_databases_are_upgraded(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    conn.close()
+
+    manager = SQLiteDataManager(path)
+    assert manager.get_user_movies(1)['7']['name'] == 'Old Movie'
+    assert manager.search_movies('old')['total'] == 1
+    assert manager.add_movie(1, 'New Movie', None, None, None) == '8'
+
+
+def test_non_numeric_ids_are_not_found(manager):
+    assert manager.get_user('abc') is None
+    assert manager.get_user_movies('abc') == {}
+    assert list(manager.iter_user_movies('abc')) == []
+    assert manager.update_movie('1', 'abc', {"name": "Renamed"}) is False
+    assert manager.delete_movie('abc', '1') is False
+    with pytest.raises(ValueError):
+        manager.add_movie('abc', 'Nobody', None, 2001, 7.0)
+
+
+def test_iter_user_movies_resumes_after_a_cursor(manager):
+    movie_ids = [movie_id for movie_id, _ in manager.iter_user_movies('1')]
+    assert movie_ids == sorted(movie_ids, key=int)
+    assert [movie_id for movie_id, _ in manager.iter_user_movies('1', after=int(movie_ids[0]))] == movie_ids[1:]
+
+
+def test_migration_skips_titles_that_differ_only_in_case(tmp_path, movies_json):
+    with open(movies_json) as fileobj:
+        data = json.load(fileobj)
+    first_id, first = next(iter(data['1']['movies'].items()))
+    data['1']['movies']['99'] = dict(first, name=first['name'].upper())
+    with open(movies_json, 'w') as fileobj:
+        json.dump(data, fileobj)
+
+    manager = SQLiteDataManager(str(tmp_path / 'movies.db'))
+    users, movies = manager.migrate_from_json(movies_json)
+    assert movies == sum(len(user.get('movies', {})) for user in data.values()) - 1
+    assert manager.get_user_movies('1')[first_id]['name'] == first['name']
+    assert '99' not in manager.get_user_movies('1')
+
+
+def test_a_recreated_database_has_new_data_versions(tmp_path, movies_json):
+    path = tmp_path / 'fresh.db'
+    first = SQLiteDataManager(str(path))
+    first.migrate_from_json(movies_json)
+    version = first.get_data_version()
+    # Reopening keeps the token...
+    assert SQLiteDataManager(str(path)).get_data_version() == version
+
+    for suffix in ('', '-wal', '-shm'):
+        if (tmp_path / f'fresh.db{suffix}').exists():
+            (tmp_path / f'fresh.db{suffix}').unlink()
+    recreated = SQLiteDataManager(str(path))
+    recreated.migrate_from_json(movies_json)
+    # ...but a database built again from scratch counts from the start with another one
+    assert recreated.get_data_version()[0].rpartition('-')[2] == version[0].rpartition('-')[2]
+    assert recreated.get_data_version()[0] != version[0]
@@ -0,0 +1,54 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from startup import LazyDataManager, StartupTimer
+
+
+def test_the_manager_is_built_once_on_first_use():
+    built, loaded = [], []
+
+    class Manager:
+        def get_user(self, user_id):
+            return {"id": user_id}
+
+    def factory():
+        time.sleep(0.05)
+        built.append(Manager())
+        return built[-1]
+
+    lazy = LazyDataManager(factory, on_load=loaded.append)
+    assert not lazy.loaded and built == []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        managers = list(executor.map(lambda _: lazy.load(), range(4)))
+    assert len(built) == 1 and loaded == built and all(manager is built[0] for manager in managers)
+    assert lazy.loaded and lazy.get_user('1') == {"id": '1'}
+
+
+def test_a_failed_build_is_tried_again():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("not yet")
+        return object()
+
+    lazy = LazyDataManager(factory)
+    try:
+        lazy.load()
+    except OSError:
+        pass
+    assert not lazy.loaded
+    assert lazy.load() is lazy.load() and len(attempts) == 2
+
+
+def test_startup_timer_reports_phases():
+    timer = StartupTimer()
+    with timer.phase('templates'):
+        pass
+    timer.record('data_manager', 0.25)
+    report = timer.report()
+    assert list(report['phases_ms']) == ['templates', 'data_manager']
+    assert report['phases_ms']['data_manager'] == 250.0 and report['uptime_ms'] >= 0
+    assert timer.summary().endswith('data_manager 250 ms')
@@ -0,0 +1,222 @@
+"""
+Request parsing, content negotiation, conditional GET and streaming helpers
+shared by the Flask app (app.py) and the Quart app (asgi.py).
+
+Nothing here imports either framework: helpers take the request, its args
+or a response as arguments, and both frameworks build those on werkzeug's
+data structures.
+"""
+import base64
+import binascii
+import hmac
+import json
+import os
+from datetime import datetime, timezone
+
+from datamanager.movie_record import json_default
+
+# Upper bound for the ?per_page= query parameter
+MAX_MOVIES_PER_PAGE = 100
+
+# Number of movies serialized per chunk of a streamed response
+STREAM_CHUNK_SIZE = 100
+
+
+def is_admin_request(request):
+    """
+    True if the request may use the admin endpoints (/metrics and the
+    profiles): it carries the MOVIES_ADMIN_TOKEN in an X-Admin-Token header
+    or ?token=. Without a configured token the admin endpoints are off.
+    """
+    token = os.environ.get('MOVIES_ADMIN_TOKEN')
+    if not token:
+        return False
+    given = request.headers.get('X-Admin-Token') or request.args.get('token') or ''
+    return hmac.compare_digest(given.encode(), token.encode())
+
+
+def parse_page_args(args, default_per_page):
+    """Returns the (page, per_page) of a query string, clamped to valid values."""
+    page = max(args.get('page', 1, type=int), 1)
+    per_page = min(max(args.get('per_page', default_per_page, type=int), 1), MAX_MOVIES_PER_PAGE)
+    return page, per_page
+
+
+def wants_json(request):
+    """True if the client prefers a JSON response over HTML."""
+    if request.args.get('format') == 'json':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json' and request.accept_mimetypes[best] > request.accept_mimetypes['text/html']
+
+
+def wants_ndjson(request):
+    """True if the client asked for newline-delimited JSON."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+
+def parse_movie_filters(args):
+    """
+    Reads the movie filter parameters from a query string.
+
+    Supports year_from, year_to, min_rating, director, sort (rating or year)
+    and order (asc or desc). Returns only the parameters that were given,
+    as keyword arguments for filter_movies().
+    """
+    filters = {}
+    for name, convert in (('year_from', int), ('year_to', int), ('min_rating', float)):
+        value = args.get(name)
+        if value not in (None, ''):
+            filters[name] = convert(value)
+    if args.get('director'):
+        filters['director'] = args['director']
+    if args.get('sort'):
+        filters['sort'] = args['sort']
+    order = args.get('order')
+    if order:
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be asc or desc")
+        filters['descending'] = order == 'desc'
+    return filters
+
+
+def parse_movie_entry(entry):
+    """Validates one movie of a bulk import and converts its year and rating."""
+    if not isinstance(entry, dict):
+        raise ValueError("Each movie must be a JSON object")
+    name, director = entry.get('name'), entry.get('director')
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Movie name must be a non-empty string")
+    if director is not None and not isinstance(director, str):
+        raise ValueError("Director must be a string")
+    year, rating = entry.get('year'), entry.get('rating')
+    if year is None or rating is None:
+        raise ValueError("Year and Rating are required fields")
+    # bool is an int, and int() and float() raise TypeError for lists and objects
+    if any(isinstance(value, bool) or not isinstance(value, (int, float, str)) for value in (year, rating)):
+        raise ValueError("Year and Rating must be numbers")
+
+    return {
+        "name": name,
+        "director": director,
+        "year": int(year),
+        "rating": float(rating),
+    }
+
+
+def encode_cursor(movie_id):
+    """Turns the last movie id of a batch into an opaque continuation token."""
+    return base64.urlsafe_b64encode(str(movie_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Reverses encode_cursor; raises ValueError for a malformed token."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def cache_validators(version, variant=None):
+    """
+    Returns the (etag, last_modified) of a response built from data at the
+    given (version, modified_at), as returned by get_data_version().
+
+    variant tells apart representations of the same URL, e.g. "ndjson".
+    """
+    version, modified_at = version
+    etag = f"{variant}-{version}" if variant else version
+    last_modified = datetime.fromtimestamp(int(modified_at), timezone.utc) if modified_at else None
+    return etag, last_modified
+
+
+def is_fresh(request, etag, last_modified):
+    """True if the client's copy is current, so a 304 Not Modified will do."""
+    # If-None-Match wins over If-Modified-Since when a client sends both
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    return (last_modified is not None and request.if_modified_since is not None
+            and last_modified <= request.if_modified_since)
+
+
+def add_validators(response, etag, last_modified):
+    """Sets a strong ETag and Last-Modified header on a response and returns it."""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Caches may keep the page but must check back with us before reusing it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _json_object_member(index, movie_id, movie):
+    return ('' if index == 0 else ',') + json.dumps(str(movie_id)) + ':' + json.dumps(movie, default=json_default)
+
+
+def _ndjson_line(movie_id, movie):
+    return json.dumps({"movie_id": str(movie_id), **movie}, default=json_default) + '\n'
+
+
+def stream_json_object(movies):
+    """Yields a {movie_id: movie} JSON object chunk by chunk."""
+    yield '{'
+    chunk = []
+    for index, (movie_id, movie) in enumerate(movies):
+        chunk.append(_json_object_member(index, movie_id, movie))
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append('}')
+    yield ''.join(chunk)
+
+
+def stream_ndjson(movies):
+    """Yields one {"movie_id": ..., ...movie} JSON document per line."""
+    chunk = []
+    for movie_id, movie in movies:
+        chunk.append(_ndjson_line(movie_id, movie))
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+async def _iterate(movies):
+    """Iterates over a list of movies or an async generator of them alike."""
+    if hasattr(movies, '__aiter__'):
+        async for movie in movies:
+            yield movie
+    else:
+        for movie in movies:
+            yield movie
+
+
+async def async_stream_json_object(movies):
+    """stream_json_object() for a list or an async generator of movies."""
+    yield '{'
+    chunk = []
+    index = 0
+    async for movie_id, movie in _iterate(movies):
+        chunk.append(_json_object_member(index, movie_id, movie))
+        index += 1
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append('}')
+    yield ''.join(chunk)
+
+
+async def async_stream_ndjson(movies):
+    """stream_ndjson() for a list or an async generator of movies."""
+    chunk = []
+    async for movie_id, movie in _iterate(movies):
+        chunk.append(_ndjson_line(movie_id, movie))
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)